@@ -1,15 +1,30 @@
+import sys
 import click
+from contextlib import contextmanager
 from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, Optional
 from platformdirs import user_data_dir, user_config_dir
+from dooit.startup_profile import startup_profile
+from dooit.transfer_formats import FORMATS, guess_format
 
 OLD_CONFIG = Path(user_data_dir("dooit")) / "todo.yaml"
 VERSION = "3.0.4"
 
 
-def run_dooit():
-    from dooit.ui.tui import Dooit
+def run_dooit(profile: bool = False, connection_string: Optional[str] = None):
+    if profile:
+        startup_profile.enable()
 
-    Dooit().run()
+    with startup_profile.phase("imports"):
+        from dooit.ui.tui import Dooit
+
+    app = Dooit(connection_string)
+    if not profile:
+        return app.run()
+
+    # exits as soon as the first frame is drawn
+    app.run(headless=True)
+    print(startup_profile.report())
 
 
 @click.group(
@@ -22,11 +37,23 @@ def run_dooit():
     is_flag=True,
     help="Show version and exit.",
 )
+@click.option(
+    "--startup-profile",
+    is_flag=True,
+    help="Show the time spent in each phase of startup and exit.",
+)
+@click.option(
+    "--database",
+    type=click.Path(dir_okay=False),
+    help="Use this database file instead of the default one.",
+)
 @click.pass_context
-def main(ctx, version: bool) -> None:
+def main(ctx, version: bool, startup_profile: bool, database: Optional[str]) -> None:
     if version:
         return print(f"dooit - {VERSION}")
 
+    ctx.obj = f"sqlite:///{database}" if database else None
+
     if ctx.invoked_subcommand is None:
         if OLD_CONFIG.exists():
             from dooit.utils.cli_logger import logger
@@ -37,18 +64,26 @@ def main(ctx, version: bool) -> None:
             )
             return
 
-        run_dooit()
+        run_dooit(startup_profile, ctx.obj)
 
 
 @main.command(help="Migrate data from v2 to v3.")
-def migrate() -> None:
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Only check that the data can be migrated, without writing anything.",
+)
+@click.pass_context
+def migrate(ctx, dry_run: bool) -> None:
     from dooit.utils.cli_logger import logger
 
     logger.info("Migrating from v2 ...")
     from dooit.backport.migrate_from_v2 import Migrator2to3
 
-    migrator = Migrator2to3()
-    migrator.migrate()
+    database = ctx.parent.params.get("database")
+    migrator = Migrator2to3(new_location=Path(database) if database else None)
+    if not migrator.migrate(dry_run):
+        ctx.exit(1)
 
 
 @main.command(help="Show config location.")
@@ -57,5 +92,203 @@ def config_loc() -> None:
     print(Path(user_config_dir("dooit")) / "config.py")
 
 
+# ----------------- HEADLESS COMMANDS -----------------
+# These print every todo they touch as a line of json and never load the tui.
+# With `--batch`, the arguments are read from stdin (one json object, or
+# just the main argument, per line) and applied in a single transaction.
+
+batch_option = click.option(
+    "--batch",
+    is_flag=True,
+    help="Read one operation per line from stdin, all applied at once.",
+)
+
+
+def run_headless(
+    ctx: click.Context,
+    operation: Callable[..., Any],
+    key: str,
+    batch: bool,
+    arguments: Dict[str, Any],
+) -> None:
+    from dooit.api import manager
+    from dooit.api.exceptions import DooitError
+    from dooit.utils import headless
+
+    manager.connect(ctx.obj)
+
+    # options which are not given do not override the ones read from stdin
+    arguments = {k: v for k, v in arguments.items() if v is not None}
+
+    try:
+        if batch:
+            rows = headless.run_batch(operation, sys.stdin, key, **arguments)
+        elif key in arguments:
+            rows = [operation(**arguments)]
+        else:
+            raise click.UsageError(f"Missing argument {key.upper()}.")
+    except (DooitError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+    headless.dump(rows, sys.stdout.write)
+
+
+def todo_fields(func: Callable) -> Callable:
+    for option in reversed(
+        [
+            click.option("--due", help="Due date, an empty string removes it."),
+            click.option(
+                "--recurrence",
+                help="Recurrence such as 2d or 1w, an empty string removes it.",
+            ),
+            click.option("--urgency", type=int),
+            click.option("--effort", type=int),
+        ]
+    ):
+        func = option(func)
+
+    return func
+
+
+@main.command(help="Add a todo.")
+@click.argument("description", required=False)
+@click.option("--workspace", "-w", help="Workspace id or name, created if missing.")
+@click.option("--parent", "-p", help="Id of the parent todo.")
+@todo_fields
+@batch_option
+@click.pass_context
+def add(ctx, batch: bool, **arguments) -> None:
+    from dooit.utils.headless import add
+
+    run_headless(ctx, add, "description", batch, arguments)
+
+
+@main.command(name="list", help="List todos.")
+@click.option("--workspace", "-w", help="Workspace id or name.")
+@click.option("--status", type=click.Choice(["pending", "overdue", "completed"]))
+@click.option("--search", "-s", help="Search like in dooit, @tag matches tags.")
+@click.pass_context
+def list_(ctx, **arguments) -> None:
+    from dooit.api import manager
+    from dooit.api.exceptions import DooitError
+    from dooit.utils.headless import dump, list_todos
+
+    manager.connect(ctx.obj)
+    try:
+        dump(list_todos(**arguments), sys.stdout.write)
+    except DooitError as e:
+        raise click.ClickException(str(e))
+
+
+@main.command(help="Edit a todo.")
+@click.argument("id", required=False)
+@click.option("--description")
+@todo_fields
+@batch_option
+@click.pass_context
+def edit(ctx, batch: bool, **arguments) -> None:
+    from dooit.utils.headless import edit
+
+    run_headless(ctx, edit, "id", batch, arguments)
+
+
+@main.command(help="Mark a todo as completed.")
+@click.argument("id", required=False)
+@batch_option
+@click.pass_context
+def done(ctx, batch: bool, **arguments) -> None:
+    from dooit.utils.headless import done
+
+    run_headless(ctx, done, "id", batch, arguments)
+
+
+@main.command(help="Remove a todo (with its children).")
+@click.argument("id", required=False)
+@batch_option
+@click.pass_context
+def rm(ctx, batch: bool, **arguments) -> None:
+    from dooit.utils.headless import remove
+
+    run_headless(ctx, remove, "id", batch, arguments)
+
+
+# ----------------- EXPORT / IMPORT -----------------
+
+
+@contextmanager
+def open_file(path: str, mode: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+        return
+
+    # csv handles the line endings itself
+    with open(path, mode, encoding="utf-8", newline="") as file:
+        yield file
+
+
+@main.command(name="export", help="Export all the workspaces and todos.")
+@click.argument("file", default="-", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option(
+    "--format",
+    "-f",
+    "format_",
+    type=click.Choice(FORMATS),
+    help="Guessed from the extension of FILE, json lines by default.",
+)
+@click.pass_context
+def export(ctx, file: str, format_: Optional[str]) -> None:
+    from dooit.api import manager
+    from dooit.utils.transfer import export
+
+    manager.connect(ctx.obj)
+    with open_file(file, "w") as f:
+        export(f, format_ or guess_format(file))
+
+
+@main.command(name="import", help="Import workspaces and todos from a file.")
+@click.argument("file", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option(
+    "--format",
+    "-f",
+    "format_",
+    type=click.Choice(FORMATS),
+    help="Guessed from the extension of FILE, json lines by default.",
+)
+@click.option(
+    "--workspace",
+    "-w",
+    help="Workspace for the todo.txt tasks without a +project.",
+)
+@click.option(
+    "--fix-pending",
+    is_flag=True,
+    help="Complete the children of completed todos, and the todos whose "
+    "children are all completed.",
+)
+@click.pass_context
+def import_(
+    ctx,
+    file: str,
+    format_: Optional[str],
+    workspace: Optional[str],
+    fix_pending: bool,
+) -> None:
+    from dooit.api import manager
+    from dooit.api.exceptions import DooitError
+    from dooit.utils.headless import dump
+    from dooit.utils.transfer import import_file
+
+    manager.connect(ctx.obj)
+    try:
+        with open_file(file, "r") as f:
+            counts = import_file(
+                f, format_ or guess_format(file), workspace, fix_pending
+            )
+    except DooitError as e:
+        raise click.ClickException(str(e))
+
+    dump([counts], sys.stdout.write)
+
+
 if __name__ == "__main__":
     main()
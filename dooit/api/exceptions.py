@@ -41,3 +41,9 @@ class NoNodeError(DooitError):
 
     def __str__(self) -> str:  # pragma: no cover
         return "No item selected"
+
+
+class ModelNotFoundError(DooitError):
+    """
+    Raised when there is no item with the given id
+    """
@@ -1,8 +1,121 @@
-from sqlalchemy import event
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Type
+from sqlalchemy import (
+    Connection,
+    bindparam,
+    event,
+    false,
+    func,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from ..model import DooitModel
 from ..workspace import Workspace
 from ..todo import Todo
 
 
+def _move_descendants(
+    connection: Connection, target: DooitModel, old_path: str, old_depth: int
+) -> None:
+    """
+    Rewrite the paths of all the descendants after `target` is reparented
+    """
+
+    cls = target.__class__
+    table = cls.__table__
+    old_prefix = f"{old_path}{target.id}/"
+    new_prefix = target.subtree_path
+    delta = target.nest_level - old_depth
+
+    query = (
+        update(table)
+        .where(cls._in_subtree(old_prefix))
+        .values(
+            path=new_prefix + func.substr(table.c.path, len(old_prefix) + 1),
+            depth=table.c.depth + delta,
+        )
+    )
+    connection.execute(query)
+
+    session = object_session(target)
+    if session is None:  # pragma: no cover
+        return
+
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, cls) and obj.path and obj.path.startswith(old_prefix):
+            set_committed_value(obj, "path", new_prefix + obj.path[len(old_prefix) :])
+            set_committed_value(obj, "depth", obj.depth + delta)
+            obj.bump_version()
+
+
+def _parent_path(
+    connection: Connection, target: DooitModel, relation: str
+) -> Optional[Tuple[str, int]]:
+    """
+    `path` and `depth` of `target` under its parent in `relation`,
+    None if the parent did not change
+
+    The parent is never lazy loaded: the relationship is only used when it
+    was set, otherwise the parent is looked up by id
+    """
+
+    state = inspect(target)
+    column = f"{relation}_id"
+
+    if state.attrs[relation].history.has_changes():
+        parent = state.dict.get(relation)
+    elif not state.persistent or state.attrs[column].history.has_changes():
+        parent_id = state.dict.get(column)
+        if parent_id is None:
+            return "/", 0
+
+        mapper = state.mapper.relationships[relation].mapper
+        key = mapper.identity_key_from_primary_key([parent_id])
+        parent = state.session.identity_map.get(key)
+
+        if parent is None:
+            table = mapper.local_table
+            path, depth, is_root = connection.execute(
+                select(
+                    table.c.path,
+                    table.c.depth,
+                    table.c.is_root if "is_root" in table.c else false(),
+                ).where(table.c.id == parent_id)
+            ).one()
+
+            if is_root:
+                return "/", 0
+
+            return f"{path}{parent_id}/", depth + 1
+    else:
+        return None
+
+    if parent is None or getattr(parent, "is_root", False):
+        return "/", 0
+
+    return parent.subtree_path, parent.nest_level + 1
+
+
+def _fix_path(connection: Connection, target: DooitModel, relation: str):
+    new = _parent_path(connection, target, relation)
+    if new is None:
+        return
+
+    path, depth = new
+    old_path, old_depth = target.path, target.depth
+    if old_path == path and old_depth == depth:
+        return
+
+    target.path, target.depth = path, depth
+
+    # `path` is only missing for rows which are not in the database yet
+    if old_path is not None and target.id is not None:
+        _move_descendants(connection, target, old_path, old_depth or 0)
+
+
 @event.listens_for(Workspace, "before_update")
 @event.listens_for(Workspace, "before_insert")
 def fix_order_id_workspace(mapper, connection, target: Workspace):
@@ -13,8 +126,69 @@ def fix_order_id_workspace(mapper, connection, target: Workspace):
         target.order_index = len(target.siblings) - 1
 
 
+@event.listens_for(Workspace, "before_update")
+@event.listens_for(Workspace, "before_insert")
+def fix_path_workspace(mapper, connection, target: Workspace):
+    _fix_path(connection, target, "parent_workspace")
+
+
 @event.listens_for(Todo, "before_insert")
 @event.listens_for(Todo, "before_update")
 def fix_order_id_todo(mapper, connection, target: Todo):
     if target.order_index is None or target.order_index == -1:
         target.order_index = len(target.siblings) - 1
+
+
+@event.listens_for(Todo, "before_insert")
+@event.listens_for(Todo, "before_update")
+def fix_path_todo(mapper, connection, target: Todo):
+    _fix_path(connection, target, "parent_todo")
+
+
+def rebuild_paths(connection: Connection) -> None:
+    """
+    Recompute `path` and `depth` for every row in the database
+
+    Used to backfill rows which were written without going through the
+    ORM hooks, e.g. databases created before these columns existed
+    """
+
+    models: List[Tuple[Type[DooitModel], str]] = [
+        (Workspace, "parent_workspace_id"),
+        (Todo, "parent_todo_id"),
+    ]
+
+    for model, parent_column in models:
+        table = model.__table__
+        rows = connection.execute(select(table.c.id, table.c[parent_column])).all()
+
+        children: Dict[Optional[int], List[int]] = defaultdict(list)
+        for _id, parent_id in rows:
+            children[parent_id].append(_id)
+
+        top_level = list(children.pop(None, []))
+        if model is Workspace:
+            roots = connection.execute(
+                select(table.c.id).where(table.c.is_root == True)  # noqa: E712
+            ).scalars()
+            for root in roots:
+                top_level.extend(children.pop(root, []))
+
+        values = []
+        stack = [(_id, "/", 0) for _id in top_level]
+        while stack:
+            _id, path, depth = stack.pop()
+            values.append({"b_id": _id, "b_path": path, "b_depth": depth})
+            stack.extend(
+                (child, f"{path}{_id}/", depth + 1) for child in children.get(_id, [])
+            )
+
+        if not values:
+            continue
+
+        query = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(path=bindparam("b_path"), depth=bindparam("b_depth"))
+        )
+        connection.execute(query, values)
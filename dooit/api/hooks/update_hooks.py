@@ -1,62 +1,101 @@
 from datetime import datetime
-from sqlalchemy import event, update
-from ..todo import Todo
+from typing import List, Optional, Type
+from sqlalchemy import Connection, delete, event, exists, insert, select, update
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history, set_committed_value
+from ..model import DooitModel
+from ..todo import Todo, todo_tag, unique_tags
+from ..workspace import Workspace
+
+
+def _pending_changed(todo: Todo) -> bool:
+    return get_history(todo, "pending").has_changes()
+
+
+def _sync_pending(target: Todo, ids: List[int], pending: bool) -> None:
+    """
+    Reflect a bulk pending update on the instances already loaded in the session
+    """
+
+    session = object_session(target)
+    if session is None:  # pragma: no cover
+        return
+
+    for _id in ids:
+        todo = session.identity_map.get(session.identity_key(Todo, _id))
+        if todo is not None:
+            set_committed_value(todo, "pending", pending)
+            todo.bump_version()
+
+
+def _set_pending(connection: Connection, target: Todo, ids: List[int], pending: bool):
+    if not ids:
+        return
+
+    query = update(Todo).where(Todo.id.in_(ids)).values(pending=pending)
+    connection.execute(query)
+    _sync_pending(target, ids, pending)
 
 
 @event.listens_for(Todo, "before_update")
 def update_pending_status_child(_, connection, target: Todo):
-    to_update = []
+    if not _pending_changed(target):
+        return
 
-    def update_children(todo: Todo):
-        for child in todo.todos:
-            to_update.append(child.id)
-            update_children(child)
+    # mark all the descendants with the same status
+    todo = Todo.__table__
+    child = todo.alias()
 
-    # mark all siblings as completed
-    update_children(target)
-    query = update(Todo).where(Todo.id.in_(to_update)).values(pending=target.pending)
-    connection.execute(query)
+    descendants = (
+        select(todo.c.id)
+        .where(todo.c.parent_todo_id == target.id)
+        .cte("descendants", recursive=True)
+    )
+    descendants = descendants.union_all(
+        select(child.c.id).where(child.c.parent_todo_id == descendants.c.id)
+    )
+
+    ids = list(connection.execute(select(descendants.c.id)).scalars())
+    _set_pending(connection, target, ids, target.pending)
 
 
 @event.listens_for(Todo, "before_update")
 def update_pending_status_parent(mapper, connection, target: Todo):
-    to_update_as_pending = []
+    if not _pending_changed(target) or target.parent_todo_id is None:
+        return
 
-    def update_parent_pending(todo: Todo):
-        parent = todo.parent_todo
-        if not parent:
-            return
+    todo = Todo.__table__
+    parent = todo.alias()
 
-        to_update_as_pending.append(parent.id)
-        update_parent_pending(parent)
+    def others_completed(node, child_id):
+        # the row of `child_id` is not written yet, so it is left out
+        sibling = todo.alias()
+        return ~exists().where(
+            sibling.c.parent_todo_id == node.c.id,
+            sibling.c.id != child_id,
+            sibling.c.pending == True,
+        )
 
-    to_update_as_completed = []
+    # a pending todo makes all its ancestors pending, whereas a completed
+    # one completes its ancestors only as long as their other children are
+    ancestors = select(todo.c.id, todo.c.parent_todo_id).where(
+        todo.c.id == target.parent_todo_id
+    )
+    if not target.pending:
+        ancestors = ancestors.where(others_completed(todo, target.id))
 
-    def update_parent_completed(todo: Todo):
-        parent = todo.parent_todo
-        if not parent:
-            return
+    ancestors = ancestors.cte("ancestors", recursive=True)
 
-        all_sibling_completed = all([not sibling.pending for sibling in parent.todos])
-        if all_sibling_completed:
-            parent.pending = False
-            to_update_as_completed.append(parent.id)
-            update_parent_completed(parent)
+    step = select(parent.c.id, parent.c.parent_todo_id).where(
+        parent.c.id == ancestors.c.parent_todo_id
+    )
+    if not target.pending:
+        step = step.where(others_completed(parent, ancestors.c.id))
 
-    if target.pending:
-        update_parent_pending(target)
-        query = (
-            update(Todo).where(Todo.id.in_(to_update_as_pending)).values(pending=True)
-        )
-    else:
-        update_parent_completed(target)
-        query = (
-            update(Todo)
-            .where(Todo.id.in_(to_update_as_completed))
-            .values(pending=False)
-        )
+    ancestors = ancestors.union_all(step)
 
-    connection.execute(query)
+    ids = list(connection.execute(select(ancestors.c.id)).scalars())
+    _set_pending(connection, target, ids, target.pending)
 
 
 @event.listens_for(Todo, "before_update")
@@ -72,3 +111,67 @@ def update_due_for_recurrence(mapper, connection, todo: Todo):
 
     todo.pending = True
     todo.due += todo.recurrence
+
+
+def _bump_loaded(
+    session: Optional[Session], model: Type[DooitModel], _id: Optional[int]
+) -> None:
+    if session is None or _id is None:
+        return
+
+    obj = session.identity_map.get(session.identity_key(model, _id))
+    if obj is not None:
+        obj.bump_version()
+
+
+@event.listens_for(Workspace, "after_insert")
+@event.listens_for(Workspace, "after_update")
+@event.listens_for(Workspace, "after_delete")
+@event.listens_for(Todo, "after_insert")
+@event.listens_for(Todo, "after_update")
+@event.listens_for(Todo, "after_delete")
+def update_version(mapper, connection, target: DooitModel):
+    target.bump_version()
+
+    # parents may render something based on their children
+    session = object_session(target)
+    _bump_loaded(session, Workspace, target.parent_workspace_id)
+    if isinstance(target, Todo):
+        _bump_loaded(session, Todo, target.parent_todo_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def update_version_on_rollback(session: Session, previous_transaction):
+    for obj in session.identity_map.values():
+        if isinstance(obj, DooitModel):
+            obj.bump_version()
+
+
+def _insert_tags(connection: Connection, target: Todo) -> None:
+    tags = unique_tags(target.description or "")
+    if tags:
+        rows = [{"todo_id": target.id, "tag": tag} for tag in tags]
+        connection.execute(insert(todo_tag), rows)
+
+
+def _delete_tags(connection: Connection, target: Todo) -> None:
+    connection.execute(delete(todo_tag).where(todo_tag.c.todo_id == target.id))
+
+
+@event.listens_for(Todo, "after_insert")
+def insert_tags(mapper, connection: Connection, target: Todo):
+    _insert_tags(connection, target)
+
+
+@event.listens_for(Todo, "after_update")
+def update_tags(mapper, connection: Connection, target: Todo):
+    if not get_history(target, "description").has_changes():
+        return
+
+    _delete_tags(connection, target)
+    _insert_tags(connection, target)
+
+
+@event.listens_for(Todo, "after_delete")
+def delete_tags(mapper, connection: Connection, target: Todo):
+    _delete_tags(connection, target)
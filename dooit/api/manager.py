@@ -1,8 +1,27 @@
-import os
-from typing import Optional
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Set
+from sqlalchemy import Connection, create_engine, inspect, text
 from sqlalchemy.orm import Session
-from ._vars import DATABASE_CONN_STRING
+from ._vars import DATABASE_CONN_STRING, create_root_folder
+
+DEFAULT_BATCH_SIZE = 500
+CHANGE_LOG_RETENTION = 10_000
+
+
+@dataclass
+class ChangeSet:
+    """
+    Rows written by other connections since the last poll
+    """
+
+    uuids: Set[str] = field(default_factory=set)
+
+    # rows were inserted, deleted or moved, so the tree structure changed
+    structural: bool = False
+
+    # the log was pruned past the last seen change, anything may have changed
+    full: bool = False
 
 
 class Manager:
@@ -10,34 +29,165 @@ class Manager:
     Class for managing sqlalchemy sessions
     """
 
+    batch_size: int = DEFAULT_BATCH_SIZE
+
+    def __init__(self) -> None:
+        self._batch_depth = 0
+        self._pending_commits = 0
+
     def connect(self, conn: Optional[str] = None):
         from dooit.api import BaseModel
+        from dooit.api.migrations import has_search_index, upgrade
+        from dooit.startup_profile import startup_profile
 
-        conn = conn or DATABASE_CONN_STRING
+        if not conn:
+            create_root_folder()
+            conn = DATABASE_CONN_STRING
 
-        self.engine = create_engine(conn)
-        self.session = Session(self.engine)
-        # self.session.autoflush = False
+        with startup_profile.phase("connect"):
+            self._close_connection()
+            self.engine = create_engine(conn)
 
-        BaseModel.metadata.create_all(bind=self.engine)
-        self._db_last_modified = self._get_db_last_modified()
+            # `PRAGMA data_version` only tells the commits of *other*
+            # connections apart, so the session always uses the same one
+            self._connection = self.engine.connect()
+            self.session = Session(self._connection)
+            # self.session.autoflush = False
 
-    def _get_db_last_modified(self) -> Optional[float]:
-        database = self.engine.url.database
-        assert database is not None
+        self._batch_depth = 0
+        self._pending_commits = 0
 
-        try:
-            return os.path.getmtime(database)
-        except OSError:
+        with startup_profile.phase("create_all"):
+            BaseModel.metadata.create_all(bind=self.engine)
+
+        with startup_profile.phase("migrations"):
+            upgrade(self.engine)
+
+            with self.engine.connect() as connection:
+                self.has_search_index = has_search_index(connection)
+
+        # read first: a commit made in between is then picked up by
+        # the first poll rather than skipped
+        self._data_version = self._get_data_version()
+        self._change_cursor = self._get_last_change()
+        self._prune_change_log(self.session.connection(), self._change_cursor)
+        self.session.commit()
+
+    def _close_connection(self) -> None:
+        connection = getattr(self, "_connection", None)
+        if connection is not None:
+            self.session.close()
+            connection.close()
+
+    def _prune_change_log(self, connection: Connection, last_change: int) -> None:
+        """
+        Only keep the last `CHANGE_LOG_RETENTION` changes, connections lagging
+        further behind reload everything
+        """
+
+        connection.execute(
+            text("DELETE FROM change_log WHERE seq <= :last - :keep"),
+            {"last": last_change, "keep": CHANGE_LOG_RETENTION},
+        )
+        self._pruned_at = last_change
+
+    def _get_last_change(self) -> int:
+        query = text("SELECT max(seq) FROM change_log")
+        return self.session.execute(query).scalar() or 0
+
+    def _get_data_version(self) -> int:
+        # only commits by *other* connections bump the data version
+        query = text("PRAGMA data_version")
+        return self.session.execute(query).scalar() or 0
+
+    def poll_changes(self) -> Optional[ChangeSet]:
+        """
+        Return the rows changed by other connections since the last poll
+
+        Returns `None` without touching the change log if nothing changed,
+        otherwise the changed rows are expired from the session so they are
+        reloaded on the next access
+        """
+
+        data_version = self._get_data_version()
+        if data_version == self._data_version:
+            return None
+
+        self._data_version = data_version
+
+        query = text(
+            "SELECT seq, model, row_id, op FROM change_log "
+            "WHERE seq > :cursor ORDER BY seq"
+        )
+        rows = self.session.execute(query, {"cursor": self._change_cursor}).all()
+        if not rows:
             return None
 
-    def has_changed(self) -> bool:
-        current_last_modified = self._get_db_last_modified()
-        if current_last_modified and self._db_last_modified != current_last_modified:
-            self._db_last_modified = current_last_modified
-            manager.session.expire_all()
-            return True
-        return False
+        changes = ChangeSet(full=rows[0].seq != self._change_cursor + 1)
+        self._change_cursor = rows[-1].seq
+
+        for row in rows:
+            uuid = f"{row.model}_{row.row_id}"
+            changes.uuids.add(uuid)
+            if row.op != "U":
+                changes.structural = True
+            if row.op == "F":
+                changes.full = True
+
+        self._expire_changes(changes)
+        return changes
+
+    def _expire_changes(self, changes: ChangeSet) -> None:
+        if changes.full:
+            for obj in self.session.identity_map.values():
+                obj.bump_version()
+
+            return self.session.expire_all()
+
+        for key, obj in list(self.session.identity_map.items()):
+            # built from the identity key, reading `uuid` could load the row
+            model, (row_id, *_), *_ = key
+            if f"{model.__name__}_{row_id}" in changes.uuids:
+                obj.bump_version()
+                self.session.expire(obj)
+            elif changes.structural:
+                collections = [
+                    relationship.key
+                    for relationship in inspect(obj).mapper.relationships
+                    if relationship.uselist
+                ]
+                self.session.expire(obj, collections)
+
+    @property
+    def is_batching(self) -> bool:
+        return self._batch_depth > 0
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group all the commits made inside the block into a single transaction
+
+        Changes are still flushed to the database as they happen (so queries
+        and ids stay consistent), but they are only committed when the
+        outermost batch exits or when `batch_size` commits have piled up.
+        If the block raises, only the writes since the last of these automatic
+        commits are rolled back, raise `batch_size` to keep a batch all or
+        nothing.
+        """
+
+        self._batch_depth += 1
+        try:
+            yield
+        except Exception:
+            self._batch_depth -= 1
+            if not self.is_batching:
+                self._pending_commits = 0
+                self.session.rollback()
+            raise
+        else:
+            self._batch_depth -= 1
+            if not self.is_batching and self._pending_commits:
+                self._commit()
 
     def delete(self, obj):
         self.session.delete(obj)
@@ -48,8 +198,32 @@ class Manager:
         self.commit()
 
     def commit(self):
+        if not self.is_batching:
+            return self._commit()
+
+        self.session.flush()
+        self._pending_commits += 1
+
+        if self._pending_commits >= self.batch_size:
+            self._commit()
+
+    def _commit(self):
+        self._pending_commits = 0
+        self.session.flush()
+
+        # The last change is read *before* checking the data version: if no
+        # other connection has committed by then, everything up to it was
+        # written by us, and any later external commit gets a higher seq.
+        # Both are read on the session's connection, which holds the write
+        # lock, and our own commit leaves its data version unchanged
+        last_change = self._get_last_change()
+        if self._get_data_version() == self._data_version:
+            self._change_cursor = last_change
+
+        if last_change - self._pruned_at >= CHANGE_LOG_RETENTION:
+            self._prune_change_log(self.session.connection(), last_change)
+
         self.session.commit()
-        self._db_last_modified = self._get_db_last_modified()
 
 
 manager = Manager()
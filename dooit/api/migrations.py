@@ -0,0 +1,307 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+from sqlalchemy import Connection, Engine, delete, insert, inspect, select, text
+from sqlalchemy.exc import OperationalError
+from .hooks.fix_hooks import rebuild_paths
+from .model import BaseModel
+from .todo import Todo, todo_tag, unique_tags
+
+Migration = Callable[[Connection], None]
+
+
+def _add_path_columns(connection: Connection) -> None:
+    """
+    Add the materialized `path` and `depth` columns to databases created before them
+    """
+
+    inspector = inspect(connection)
+    added = False
+
+    for table in ("workspace", "todo"):
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "path" in columns:
+            continue
+
+        connection.execute(
+            text(f"ALTER TABLE {table} ADD COLUMN path VARCHAR NOT NULL DEFAULT '/'")
+        )
+        connection.execute(
+            text(f"ALTER TABLE {table} ADD COLUMN depth INTEGER NOT NULL DEFAULT 0")
+        )
+        added = True
+
+    if added:
+        rebuild_paths(connection)
+
+
+def _create_indexes(connection: Connection) -> None:
+    """
+    Create the indexes declared on the models which are missing from the database
+    """
+
+    for table in BaseModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _change_log_triggers() -> Dict[str, str]:
+    """
+    Name -> statement of the triggers writing to `change_log`
+    """
+
+    tables = {
+        "workspace": ("Workspace", ["parent_workspace_id"]),
+        "todo": ("Todo", ["parent_workspace_id", "parent_todo_id"]),
+    }
+
+    triggers = {}
+    for table, (model, parents) in tables.items():
+        moved = " OR ".join(
+            f"OLD.{column} IS NOT NEW.{column}" for column in parents + ["order_index"]
+        )
+        events = {
+            "insert": ("INSERT", "NEW.id", "'I'"),
+            "delete": ("DELETE", "OLD.id", "'D'"),
+            "update": ("UPDATE", "NEW.id", f"CASE WHEN {moved} THEN 'M' ELSE 'U' END"),
+        }
+
+        for name, (event, row_id, op) in events.items():
+            triggers[f"{table}_log_{name}"] = f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_log_{name}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (model, row_id, op)
+                    VALUES ('{model}', {row_id}, {op});
+                END
+                """
+
+    return triggers
+
+
+def _create_change_log(connection: Connection) -> None:
+    """
+    Log every row written to the database, used to sync with other connections
+
+    `op` is one of `I`(nsert), `D`(elete), `M`(ove, i.e. parent or order
+    changed) and `U`(pdate) for every other change, or `F`(ull) when many
+    rows changed at once (see `bulk_change_log`)
+    """
+
+    connection.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                model VARCHAR NOT NULL,
+                row_id INTEGER NOT NULL,
+                op CHAR(1) NOT NULL
+            )
+            """
+        )
+    )
+
+    for trigger in _change_log_triggers().values():
+        connection.execute(text(trigger))
+
+
+@contextmanager
+def bulk_change_log(connection: Connection) -> Iterator[None]:
+    """
+    Log the rows written inside the block as a single `F` change, which
+    makes other connections reload everything, instead of one per row
+
+    Must be used in a transaction, like `bulk_search_index`
+    """
+
+    # pysqlite only begins the transaction on the first write
+    connection.execute(text("UPDATE change_log SET seq = seq WHERE 0"))
+
+    triggers = _change_log_triggers()
+    for name in triggers:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    try:
+        yield
+    finally:
+        for trigger in triggers.values():
+            connection.execute(text(trigger))
+
+    connection.execute(
+        text("INSERT INTO change_log (model, row_id, op) VALUES ('', 0, 'F')")
+    )
+
+
+# the full text index and its shadow tables are all prefixed with these
+SEARCH_INDEX_TABLES = ("workspace_fts", "todo_fts")
+
+
+def _search_index_triggers(table: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Name -> (event, statement) of the triggers keeping `{table}_fts` in sync
+    """
+
+    # external content tables are updated by issuing a 'delete' of the old values
+    delete = (
+        f"INSERT INTO {table}_fts ({table}_fts, rowid, description) "
+        "VALUES ('delete', OLD.id, OLD.description);"
+    )
+    insert = (
+        f"INSERT INTO {table}_fts (rowid, description) "
+        "VALUES (NEW.id, NEW.description);"
+    )
+    events = {
+        "insert": ("INSERT", insert),
+        "delete": ("DELETE", delete),
+        "update": ("UPDATE OF description", delete + insert),
+    }
+
+    return {f"{table}_fts_{name}": event for name, event in events.items()}
+
+
+def _create_search_index_trigger(connection: Connection, table: str, name: str):
+    event, body = _search_index_triggers(table)[name]
+    connection.execute(
+        text(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {name}
+            AFTER {event} ON {table}
+            BEGIN
+                {body}
+            END
+            """
+        )
+    )
+
+
+def _create_search_index(connection: Connection) -> None:
+    """
+    Mirror the descriptions in FTS5 tables (`todo_fts`, `workspace_fts`) kept
+    in sync by triggers, used by `DooitModel.search`
+
+    The trigram tokenizer matches any substring of 3 or more characters.
+    Builds of sqlite without FTS5 (or trigram) keep searching the base tables
+    """
+
+    for table in ("workspace", "todo"):
+        try:
+            connection.execute(
+                text(
+                    f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                        description,
+                        content='{table}',
+                        content_rowid='id',
+                        tokenize='trigram'
+                    )
+                    """
+                )
+            )
+        except OperationalError:
+            return
+
+        for name in _search_index_triggers(table):
+            _create_search_index_trigger(connection, table, name)
+
+        connection.execute(
+            text(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+        )
+
+
+def has_search_index(connection: Connection) -> bool:
+    query = text("SELECT 1 FROM sqlite_master WHERE name = :name").bindparams(
+        name=SEARCH_INDEX_TABLES[-1]
+    )
+    return connection.execute(query).first() is not None
+
+
+@contextmanager
+def bulk_search_index(
+    connection: Connection, table: str, after_id: int
+) -> Iterator[None]:
+    """
+    Index the rows inserted into `table` inside the block (the ones with an
+    id above `after_id`) all at once when it exits, instead of one by one
+    through the trigger, which is a lot slower with trigram tokens
+
+    Must be used in a transaction, updates and deletes still go through the
+    triggers, so the new rows should only be inserted inside the block
+    """
+
+    if not has_search_index(connection):
+        yield
+        return
+
+    # pysqlite only begins the transaction on the first write, the trigger
+    # has to be dropped inside of it so that a rollback brings it back
+    connection.execute(text(f"UPDATE {table} SET id = id WHERE 0"))
+
+    name = f"{table}_fts_insert"
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    try:
+        yield
+    finally:
+        _create_search_index_trigger(connection, table, name)
+
+    connection.execute(
+        text(
+            f"INSERT INTO {table}_fts (rowid, description) "
+            f"SELECT id, description FROM {table} WHERE id > :after_id"
+        ),
+        {"after_id": after_id},
+    )
+
+
+def _fill_tags(connection: Connection) -> None:
+    """
+    Extract the tags of the todos written before the `todo_tag` table existed
+    """
+
+    todo = Todo.__table__
+    rows = [
+        {"todo_id": _id, "tag": tag}
+        for _id, description in connection.execute(
+            select(todo.c.id, todo.c.description)
+        )
+        for tag in unique_tags(description)
+    ]
+
+    # the table itself is created along with the models
+    connection.execute(delete(todo_tag))
+    if rows:
+        connection.execute(insert(todo_tag), rows)
+
+
+# Each migration must be idempotent: fresh databases are created from the
+# models directly and still run through every step once
+# NOTE: Only ever append to this list, the position is the schema version
+MIGRATIONS: List[Migration] = [
+    _add_path_columns,
+    _create_indexes,
+    _create_change_log,
+    _create_search_index,
+    _fill_tags,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(connection: Connection) -> int:
+    return connection.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def upgrade(engine: Engine) -> None:
+    """
+    Bring an existing database up to date with the current models
+    """
+
+    with engine.begin() as connection:
+        version = get_schema_version(connection)
+        if version < SCHEMA_VERSION:
+            for migration in MIGRATIONS[version:]:
+                migration(connection)
+
+            connection.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+
+        # the search index is skipped when sqlite has no FTS5, which it may
+        # have gained since, so it is checked on every connect
+        elif not has_search_index(connection):
+            _create_search_index(connection)
@@ -1,14 +1,33 @@
-from typing import Any, List, Literal, TypeVar
+from typing import Any, Dict, Iterable, List, Literal, Optional, Set, TypeVar
 from typing_extensions import Self
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, InstrumentedAttribute, Mapped, mapped_column
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy import inspect
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    String,
+    and_,
+    cast,
+    column,
+    func,
+    or_,
+    inspect,
+    select,
+    table,
+    text,
+)
 from .manager import manager
 
 
 SortMethodType = Literal["description", "status", "due", "urgency", "effort"]
 T = TypeVar("T")
 
+# keeps `IN (...)` clauses under the bound parameter limit of older sqlite
+IN_CHUNK_SIZE = 500
+
+# the trigram tokenizer can only match terms of at least this many characters
+MIN_INDEXED_TERM = 3
+
 
 class BaseModel(DeclarativeBase):
     pass
@@ -30,9 +49,17 @@ class DooitModel(BaseModel, BaseModelMixin):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_index: Mapped[int] = mapped_column(default=-1)
 
+    # bumped whenever the row (or one of its children) changes, not stored
+    _version = 0
+
+    # materialized ancestry, maintained by `fix_hooks`
+    # `path` holds the ids of all the ancestors of the same kind, e.g. `/1/4/`
+    path: Mapped[str] = mapped_column(default="/", index=True)
+    depth: Mapped[int] = mapped_column(default=0)
+
     @classmethod
     def comparable_fields(cls):
-        to_ignore = ["id", "order_index", "is_root"]
+        to_ignore = ["id", "order_index", "is_root", "path", "depth"]
 
         comparable_fields = [
             column.name
@@ -50,38 +77,231 @@ class DooitModel(BaseModel, BaseModelMixin):
     def parent(self) -> Any:
         raise NotImplementedError  # pragma: no cover
 
+    def bump_version(self) -> None:
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def nest_level(self) -> int:
+        return self.depth or 0
+
     @property
-    def nest_level(self):
-        level = 0
-        parent = self.parent
+    def subtree_path(self) -> str:
+        """
+        The path shared by all the descendants of this node
+        """
+        return f"{self.path}{self.id}/"
+
+    @classmethod
+    def _in_subtree(cls, path: str) -> ColumnElement[bool]:
+        # paths are made of digits and `/` only, so a range comparison
+        # selects everything starting with `path` and can use the index
+        return and_(cls.path >= path, cls.path < path + "~")
+
+    def is_descendant_of(self, other: "DooitModel") -> bool:
+        if not isinstance(self, other.__class__) or self is other:
+            return False
+
+        if getattr(other, "is_root", False):
+            return True
+
+        return self.path.startswith(other.subtree_path)
+
+    @classmethod
+    def _parent_key(cls) -> InstrumentedAttribute:
+        """
+        The foreign key to the parent of the same kind
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    @classmethod
+    def tree_order(
+        cls,
+        *top_level: ColumnElement[bool],
+        expanded: Optional[Iterable[int]] = None,
+    ) -> List[int]:
+        """
+        Ids of the rows matching `top_level` followed by their descendants,
+        in the order they are displayed. Only the children of the `expanded`
+        ids are included, or all of them if `expanded` is None
+        """
+
+        table = cls.__table__
+        child = table.alias()
+
+        def sort_key(node):
+            return func.printf(
+                "%08d%010d/", node.c.order_index, node.c.id, type_=String
+            )
+
+        nodes = (
+            select(table.c.id, sort_key(table).label("sort_key"))
+            .where(*top_level)
+            .cte("nodes", recursive=True)
+        )
+
+        step = select(child.c.id, nodes.c.sort_key + sort_key(child)).where(
+            child.c[cls._parent_key().key] == nodes.c.id
+        )
+        if expanded is not None:
+            step = step.where(nodes.c.id.in_(list(expanded)))
 
-        while (
-            parent
-            and isinstance(self, parent.__class__)
-            and not getattr(parent, "is_root", False)
-        ):
-            level += 1
-            parent = parent.parent
+        nodes = nodes.union_all(step)
+        query = select(nodes.c.id).order_by(nodes.c.sort_key)
+        return list(manager.session.execute(query).scalars())
 
-        return level
+    @classmethod
+    def in_tree(cls, *top_level: ColumnElement[bool]) -> ColumnElement[bool]:
+        """
+        Criteria for the rows matching `top_level` and all their descendants,
+        i.e. the rows of `tree_order` when everything is expanded
+
+        The `top_level` rows must be siblings, like the top level of a tree
+        """
+
+        top = select(cls.id, cls.path).where(*top_level).correlate(None)
+        top_ids = select(top.subquery().c.id)
+
+        # siblings share their path, in the path of a descendant it is
+        # followed by the id of its top level ancestor
+        shared = select(func.length(cls.path)).where(*top_level).limit(1)
+        path = func.substr(cls.path, shared.correlate(None).scalar_subquery() + 1)
+        ancestor = func.substr(path, 1, func.instr(path, "/") - 1)
+
+        return or_(cls.id.in_(top_ids), cast(ancestor, Integer).in_(top_ids))
+
+    @classmethod
+    def search(cls, filter: str, *where: ColumnElement[bool]) -> Set[int]:
+        """
+        Ids of the rows whose description contains every (whitespace separated)
+        term of `filter`, ignoring case
+
+        Uses the full text index when available, terms too short to be
+        indexed are matched against the descriptions directly
+        """
+
+        return set(cls.search_descriptions(filter, *where))
+
+    @classmethod
+    def search_descriptions(
+        cls, filter: str, *where: ColumnElement[bool]
+    ) -> Dict[int, str]:
+        """
+        Same as `search`, with the description of every match
+        """
+
+        terms = filter.lower().split()
+        columns = cls.__table__.c
+        query = select(columns.id, columns.description).where(*where)
+
+        indexed = []
+        if manager.has_search_index:
+            indexed = [term for term in terms if len(term) >= MIN_INDEXED_TERM]
+
+        if indexed:
+            name = f"{cls.__tablename__}_fts"
+            index = table(name, column("rowid"))
+            match = " AND ".join('"{}"'.format(t.replace('"', '""')) for t in indexed)
+
+            query = query.where(
+                columns.id.in_(
+                    select(index.c.rowid)
+                    .select_from(index)
+                    .where(text(f"{name} MATCH :match").bindparams(match=match))
+                )
+            )
+
+        for term in terms:
+            if term not in indexed:
+                description = func.lower(columns.description)
+                query = query.where(func.instr(description, term) > 0)
+
+        return dict(manager.session.execute(query).tuples().all())
+
+    @classmethod
+    def description_matches(cls, description: str, terms: Iterable[str]) -> bool:
+        """
+        Whether `description` would be found by searching for the (lowercase)
+        `terms`, used to narrow down results without a query
+        """
+
+        return all(term in description.lower() for term in terms)
+
+    def descendants(self) -> List[Self]:
+        cls = self.__class__
+        query = (
+            select(cls)
+            .where(cls._in_subtree(self.subtree_path))
+            .order_by(cls.depth, cls.order_index)
+        )
+        return list(self.session.execute(query).scalars().all())
 
     @property
     def siblings(self) -> List[Any]:
         raise NotImplementedError  # pragma: no cover
 
+    @classmethod
+    def _key_from_id(cls, _id: str) -> int:
+        return int(_id.removeprefix(f"{cls.__name__}_"))
+
     @classmethod
     def from_id(cls, _id: str) -> Self:
-        raise NotImplementedError  # pragma: no cover
+        """
+        Get the model from its `uuid`, loaded models are returned without a query
+        """
+
+        res = manager.session.get(cls, cls._key_from_id(_id))
+
+        assert isinstance(res, cls)
+        return res
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[str]) -> List[Self]:
+        """
+        Load the models for all the `ids` (as given by `uuid`) at once,
+        the ones already loaded in the session are returned without a query
+        """
+
+        mapper = inspect(cls)
+        identity_map = manager.session.identity_map
+
+        models = []
+        keys = []
+        for _id in ids:
+            key = cls._key_from_id(_id)
+            res = identity_map.get(mapper.identity_key_from_primary_key([key]))
+            if isinstance(res, cls) and not inspect(res).expired:
+                models.append(res)
+            else:
+                keys.append(key)
+
+        for start in range(0, len(keys), IN_CHUNK_SIZE):
+            chunk = keys[start : start + IN_CHUNK_SIZE]
+            query = select(cls).where(cls.id.in_(chunk))
+            models.extend(manager.session.execute(query).scalars())
+
+        return models
 
     @property
     def session(self):
         return manager.session
 
+    def _ordered_siblings(self) -> List[Any]:
+        """
+        The siblings by `order_index`, the loaded collection keeps its old
+        order until the transaction is committed (e.g. inside `manager.batch`)
+        """
+
+        return sorted(self.siblings, key=lambda sibling: sibling.order_index)
+
     def is_last_sibling(self) -> bool:
-        return self.siblings[-1].id == self.id
+        return self._ordered_siblings()[-1].id == self.id
 
     def is_first_sibling(self) -> bool:
-        return self.siblings[0].id == self.id
+        return self._ordered_siblings()[0].id == self.id
 
     @property
     def has_same_parent_kind(self) -> bool:
@@ -91,7 +311,7 @@ class DooitModel(BaseModel, BaseModelMixin):
         raise NotImplementedError  # pragma: no cover
 
     def reverse_siblings(self):
-        for index, model in enumerate(reversed(self.siblings)):
+        for index, model in enumerate(reversed(self._ordered_siblings())):
             model.order_index = index
 
         manager.commit()
@@ -101,10 +321,10 @@ class DooitModel(BaseModel, BaseModelMixin):
         Shift the item one place up among its siblings
         """
 
-        if self.is_first_sibling():
+        siblings = self._ordered_siblings()
+        if siblings[0].id == self.id:
             return False
 
-        siblings = self.siblings
         index = siblings.index(self)
         siblings[index - 1].order_index += 1
         siblings[index].order_index -= 1
@@ -118,19 +338,28 @@ class DooitModel(BaseModel, BaseModelMixin):
     def _add_sibling(self) -> Self:
         raise NotImplementedError  # pragma: no cover
 
-    def add_sibling(self):
-        sibling = self._add_sibling()
-        index = self.order_index
-
-        cls = self.__class__
-        manager.session.query(cls).filter(cls.order_index > index).update(
-            {cls.order_index: cls.order_index + 1},
-            synchronize_session=False,
-        )
+    def _sibling_filter(self) -> List[ColumnElement[bool]]:
+        """
+        Criteria selecting the rows which share the parent of this item
+        """
+        raise NotImplementedError  # pragma: no cover
 
-        sibling.order_index = index + 1
-        manager.session.add(sibling)
-        manager.commit()
+    def add_sibling(self):
+        with manager.batch():
+            sibling = self._add_sibling()
+            index = self.order_index
+
+            cls = self.__class__
+            manager.session.query(cls).filter(
+                *self._sibling_filter(), cls.order_index > index
+            ).update(
+                {cls.order_index: cls.order_index + 1},
+                synchronize_session="evaluate",
+            )
+
+            sibling.order_index = index + 1
+            manager.session.add(sibling)
+            manager.commit()
 
         return sibling
 
@@ -139,10 +368,10 @@ class DooitModel(BaseModel, BaseModelMixin):
         Shift the item one place down among its siblings
         """
 
-        if self.is_last_sibling():
+        siblings = self._ordered_siblings()
+        if siblings[-1].id == self.id:
             return False
 
-        siblings = self.siblings
         index = siblings.index(self)
         siblings[index + 1].order_index -= 1
         siblings[index].order_index += 1
@@ -1,9 +1,25 @@
-from typing import TYPE_CHECKING, Optional, Union
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Union
 from datetime import datetime, timedelta
 from typing import List
-from sqlalchemy import ForeignKey, select, nulls_last
-from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
-from .model import DooitModel
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    ForeignKey,
+    Index,
+    String,
+    Table,
+    func,
+    select,
+    nulls_last,
+)
+from sqlalchemy.orm import (
+    InstrumentedAttribute,
+    Mapped,
+    mapped_column,
+    relationship,
+    validates,
+)
+from .model import BaseModel, DooitModel
 from .manager import manager
 
 
@@ -11,15 +27,44 @@ if TYPE_CHECKING:  # pragma: no cover
     from dooit.api.workspace import Workspace
 
 
+# tags of every todo, maintained by `update_hooks`
+# NOCASE makes lookups case insensitive while still using the index
+todo_tag = Table(
+    "todo_tag",
+    BaseModel.metadata,
+    Column("todo_id", ForeignKey("todo.id"), primary_key=True),
+    Column("tag", String(collation="NOCASE"), primary_key=True),
+    Index("ix_todo_tag_tag", "tag", "todo_id"),
+)
+
+
+def is_tag(word: str) -> bool:
+    return len(word) > 1 and word[0] == "@"
+
+
+def unique_tags(description: str) -> List[str]:
+    """
+    Tags in `description`, without the ones repeated in a different case
+    """
+
+    tags = {tag.lower(): tag for tag in reversed(description.split()) if is_tag(tag)}
+    return list(reversed(tags.values()))
+
+
 class Todo(DooitModel):
+    __table_args__ = (
+        Index("ix_todo_parent_workspace_order", "parent_workspace_id", "order_index"),
+        Index("ix_todo_parent_todo_order", "parent_todo_id", "order_index"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_index: Mapped[int] = mapped_column(default=-1)
     description: Mapped[str] = mapped_column(default="")
-    due: Mapped[Optional[datetime]] = mapped_column(default=None)
+    due: Mapped[Optional[datetime]] = mapped_column(default=None, index=True)
     effort: Mapped[int] = mapped_column(default=0)
     recurrence: Mapped[Optional[timedelta]] = mapped_column(default=None)
     urgency: Mapped[int] = mapped_column(default=1)
-    pending: Mapped[bool] = mapped_column(default=True)
+    pending: Mapped[bool] = mapped_column(default=True, index=True)
 
     # --------------------------------------------------------------
     # ------------------- Relationships ----------------------------
@@ -54,14 +99,6 @@ class Todo(DooitModel):
 
         return value
 
-    @classmethod
-    def from_id(cls, _id: str) -> "Todo":
-        _id = _id.lstrip("Todo_")
-        query = select(Todo).where(Todo.id == _id)
-        res = manager.session.execute(query).scalars().first()
-        assert res is not None
-        return res
-
     @property
     def parent(self) -> Union["Workspace", "Todo"]:
         assert self.parent_workspace or self.parent_todo
@@ -79,7 +116,7 @@ class Todo(DooitModel):
 
     @property
     def tags(self) -> List[str]:
-        return [i for i in self.description.split() if i[0] == "@"]
+        return unique_tags(self.description)
 
     @property
     def status(self) -> str:
@@ -140,6 +177,16 @@ class Todo(DooitModel):
         todo.save()
         return todo
 
+    @classmethod
+    def _parent_key(cls) -> InstrumentedAttribute:
+        return Todo.parent_todo_id
+
+    def _sibling_filter(self) -> List[ColumnElement[bool]]:
+        return [
+            Todo.parent_workspace_id == self.parent_workspace_id,
+            Todo.parent_todo_id == self.parent_todo_id,
+        ]
+
     # ----------- HELPER FUNCTIONS --------------
 
     def increase_urgency(self) -> None:
@@ -175,6 +222,71 @@ class Todo(DooitModel):
 
         return self.pending and self.due < datetime.now()
 
+    @classmethod
+    def tag_counts(cls) -> Dict[str, int]:
+        """
+        Number of todos for every tag, most used first
+        """
+
+        count = func.count(todo_tag.c.todo_id)
+        query = (
+            select(todo_tag.c.tag, count)
+            .group_by(todo_tag.c.tag)
+            .order_by(count.desc(), todo_tag.c.tag)
+        )
+        return dict(manager.session.execute(query).tuples().all())
+
+    @classmethod
+    def _has_tag(cls, tag: str) -> ColumnElement[bool]:
+        # a prefix (rather than an exact) match, so tags can be searched as typed
+        prefix = tag.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return Todo.id.in_(
+            select(todo_tag.c.todo_id).where(
+                todo_tag.c.tag.like(f"{prefix}%", escape="\\")
+            )
+        )
+
+    @classmethod
+    def with_tags(cls, *tags: str) -> List["Todo"]:
+        """
+        Todos having all the `tags`, matched case insensitively
+        """
+
+        query = (
+            select(Todo)
+            .join(todo_tag, todo_tag.c.todo_id == Todo.id)
+            .where(todo_tag.c.tag.in_(tags))
+            .group_by(Todo.id)
+            .having(func.count() == len({tag.lower() for tag in tags}))
+            .order_by(Todo.id)
+        )
+        return list(manager.session.execute(query).scalars().all())
+
+    @classmethod
+    def search_descriptions(
+        cls, filter: str, *where: ColumnElement[bool]
+    ) -> Dict[int, str]:
+        """
+        Same as `DooitModel.search_descriptions`, terms starting with `@`
+        only match the tags of a todo (by prefix)
+        """
+
+        terms = filter.split()
+        tags = [cls._has_tag(term) for term in terms if is_tag(term)]
+        rest = " ".join(term for term in terms if not is_tag(term))
+
+        return super().search_descriptions(rest, *where, *tags)
+
+    @classmethod
+    def description_matches(cls, description: str, terms: Iterable[str]) -> bool:
+        words = description.lower().split()
+        return all(
+            any(word.startswith(term) for word in words if is_tag(word))
+            if is_tag(term)
+            else term in description.lower()
+            for term in terms
+        )
+
     @classmethod
     def all(cls) -> List["Todo"]:
         query = select(Todo)
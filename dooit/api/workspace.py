@@ -1,6 +1,6 @@
 from typing import List, Optional, Union
-from sqlalchemy import ForeignKey, asc, select
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ColumnElement, ForeignKey, Index, asc, select
+from sqlalchemy.orm import InstrumentedAttribute, Mapped, mapped_column, relationship
 from ..api.todo import Todo
 from .model import DooitModel
 from .manager import manager
@@ -10,6 +10,14 @@ ModelTypeList = Union[List["Workspace"], List["Todo"]]
 
 
 class Workspace(DooitModel):
+    __table_args__ = (
+        Index(
+            "ix_workspace_parent_workspace_order",
+            "parent_workspace_id",
+            "order_index",
+        ),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_index: Mapped[int] = mapped_column(default=-1)
     description: Mapped[str] = mapped_column(default="")
@@ -51,14 +59,6 @@ class Workspace(DooitModel):
 
         return root
 
-    @classmethod
-    def from_id(cls, _id: str) -> "Workspace":
-        _id = _id.lstrip("Workspace_")
-        query = select(Workspace).where(Workspace.id == _id)
-        res = manager.session.execute(query).scalars().first()
-        assert res is not None
-        return res
-
     @property
     def parent(self) -> Optional["Workspace"]:
         return self.parent_workspace
@@ -96,6 +96,13 @@ class Workspace(DooitModel):
         workspace.save()
         return workspace
 
+    @classmethod
+    def _parent_key(cls) -> InstrumentedAttribute:
+        return Workspace.parent_workspace_id
+
+    def _sibling_filter(self) -> List[ColumnElement[bool]]:
+        return [Workspace.parent_workspace_id == self.parent_workspace_id]
+
     def add_todo(self) -> "Todo":
         todo = Todo(parent_workspace=self)
         todo.save()
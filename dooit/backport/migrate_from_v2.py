@@ -1,60 +1,234 @@
-import re
-from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
-from yaml import safe_load
+from datetime import datetime
+from itertools import count
+from typing import IO, Any, Dict, Iterator, Optional
 from pathlib import Path
 from platformdirs import user_data_dir
-from dooit.api import Todo, Workspace, manager
+from yaml import (
+    MappingEndEvent,
+    MappingNode,
+    MappingStartEvent,
+    Node,
+    ScalarEvent,
+    ScalarNode,
+    SequenceEndEvent,
+    SequenceNode,
+    SequenceStartEvent,
+    StreamStartEvent,
+    DocumentStartEvent,
+)
+from yaml.composer import ComposerError
+from dooit.api import manager
+from dooit.api.exceptions import DooitError
 from dooit.utils.cli_logger import logger
 from dooit.utils.database import delete_all_data
+from dooit.utils.transfer import Record, import_records
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
 
-manager.connect()
 BASE_PATH = Path(user_data_dir("dooit"))
-operations = []
+
+# records between two updates of the progress bar
+PROGRESS_STEP = 1000
+
+
+def parse_due(due: Any) -> Optional[datetime]:
+    if not due or due == "none":
+        return None
+
+    due_float = float(due)
+    return datetime.fromtimestamp(due_float)
 
 
-def parse_recurrence(recurrence: str) -> timedelta:
-    DURATION_LEGEND = {
-        "m": "minute",
-        "h": "hour",
-        "d": "day",
-        "w": "week",
+def _todo_record(
+    _id: int, workspace: Optional[int], parent: Optional[int], data: Any
+) -> Record:
+    if not isinstance(data, dict):
+        raise DooitError(f"Expected the data of a todo, got {data!r}")
+
+    recurrence = data.get("recurrence")
+
+    return {
+        "type": "todo",
+        "id": _id,
+        "parent_workspace_id": workspace,
+        "parent_todo_id": parent,
+        "description": data.get("description"),
+        "pending": data.get("status") != "COMPLETED",
+        "urgency": data.get("urgency"),
+        "due": parse_due(data.get("due")),
+        "effort": data.get("effort"),
+        "recurrence": None if recurrence == "none" else recurrence,
     }
 
-    def split_duration(duration: str) -> Tuple[str, str]:
-        if re.match(r"^(\d+)[mhdw]$", duration):
-            return duration[-1], duration[:-1]
-        else:
-            return tuple()
 
-    sign, frequency = split_duration(recurrence)
-    frequency = int(frequency)
-    return timedelta(**{f"{DURATION_LEGEND[sign]}s": frequency})
+class V2Reader:
+    """
+    Reads the v2 `todo.yaml` as records for `dooit.utils.transfer`, a todo
+    at a time: only the data of a single todo is ever loaded in memory
 
+    The file is a list of workspaces, each with its `workspaces` and `todos`.
+    Every todo is a list of its data and, optionally, the list of its children
+    """
 
-def parse_due(due: str) -> Optional[datetime]:
-    if due == "none":
-        return None
+    def __init__(self, stream: IO[bytes]) -> None:
+        self.loader = SafeLoader(stream)
+        self.workspace_ids = count(1)
+        self.todo_ids = count(1)
 
-    due_float = float(due)
-    return datetime.fromtimestamp(due_float)
+    def _expect(self, event: Any) -> Any:
+        if not self.loader.check_event(event):
+            found = self.loader.peek_event()
+            raise ComposerError(
+                None, None, f"unexpected {found.__class__.__name__}", found.start_mark
+            )
+
+        return self.loader.get_event()
+
+    def _compose(self) -> Node:
+        """
+        Same as `yaml.composer`, without anchors which v2 never wrote
+        """
+
+        loader = self.loader
+        event = loader.get_event()
+
+        if isinstance(event, ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = loader.resolve(ScalarNode, event.value, event.implicit)
+
+            return ScalarNode(
+                tag, event.value, event.start_mark, event.end_mark, style=event.style
+            )
+
+        if isinstance(event, (SequenceStartEvent, MappingStartEvent)):
+            sequence = isinstance(event, SequenceStartEvent)
+            end, node_class = (
+                (SequenceEndEvent, SequenceNode)
+                if sequence
+                else (MappingEndEvent, MappingNode)
+            )
+
+            items = []
+            while not loader.check_event(end):
+                item = self._compose()
+                items.append(item if sequence else (item, self._compose()))
+
+            end_event = loader.get_event()
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = loader.resolve(node_class, None, event.implicit)
+
+            return node_class(
+                tag,
+                items,
+                event.start_mark,
+                end_event.end_mark,
+                flow_style=event.flow_style,
+            )
+
+        raise ComposerError(
+            None, None, f"unexpected {event.__class__.__name__}", event.start_mark
+        )
+
+    def _value(self) -> Any:
+        return self.loader.construct_document(self._compose())
+
+    def _workspaces(self, parent: Optional[int]) -> Iterator[Record]:
+        self._expect(SequenceStartEvent)
+        while not self.loader.check_event(SequenceEndEvent):
+            yield from self._workspace(parent)
+
+        self.loader.get_event()
+
+    def _workspace(self, parent: Optional[int]) -> Iterator[Record]:
+        _id = next(self.workspace_ids)
+        description = ""
+
+        # children are read as they come, the workspace itself is
+        # only complete at the end of its mapping
+        self._expect(MappingStartEvent)
+        while not self.loader.check_event(MappingEndEvent):
+            key = self._value()
+            is_list = self.loader.check_event(SequenceStartEvent)
+
+            if key == "workspaces" and is_list:
+                yield from self._workspaces(_id)
+            elif key == "todos" and is_list:
+                yield from self._todos(_id, None)
+            elif key == "description":
+                description = self._value()
+            else:
+                self._value()
+
+        self.loader.get_event()
+        yield {
+            "type": "workspace",
+            "id": _id,
+            "parent_workspace_id": parent,
+            "description": description,
+        }
+
+    def _todos(self, workspace: Optional[int], parent: Optional[int]):
+        self._expect(SequenceStartEvent)
+        while not self.loader.check_event(SequenceEndEvent):
+            yield from self._todo(workspace, parent)
+
+        self.loader.get_event()
+
+    def _todo(self, workspace: Optional[int], parent: Optional[int]):
+        _id = next(self.todo_ids)
+
+        self._expect(SequenceStartEvent)
+        yield _todo_record(_id, workspace, parent, self._value())
+
+        while not self.loader.check_event(SequenceEndEvent):
+            if self.loader.check_event(SequenceStartEvent):
+                yield from self._todos(None, _id)
+            else:
+                self._value()
+
+        self.loader.get_event()
+
+    def records(self) -> Iterator[Record]:
+        try:
+            self._expect(StreamStartEvent)
+            if not self.loader.check_event(DocumentStartEvent):
+                return
+
+            self.loader.get_event()
+            if self.loader.check_event(SequenceStartEvent):
+                yield from self._workspaces(None)
+            elif self._value() is not None:
+                raise DooitError("Expected a list of workspaces")
+        finally:
+            self.loader.dispose()
 
 
 class Migrator2to3:
     old_location = BASE_PATH / "todo.yaml"
     new_location = BASE_PATH / "dooit.db"
 
-    @classmethod
-    def check_for_old_data(cls):
-        if not cls.old_location.exists():
+    def __init__(
+        self,
+        old_location: Optional[Path] = None,
+        new_location: Optional[Path] = None,
+    ) -> None:
+        if old_location is not None:
+            self.old_location = old_location
+
+        if new_location is not None:
+            self.new_location = new_location
+
+    def check_for_old_data(self):
+        if not self.old_location.exists():
             return False
 
         return True
 
-    def load_old(self):
-        with self.old_location.open() as f:
-            return safe_load(f)
-
     def backup_old_config(self):
         logger.info("Moving old config to a backup file ...")
 
@@ -63,82 +237,74 @@ class Migrator2to3:
 
         logger.success("Backup successful")
 
-    def migrate(self):
+    def convert(self, overwrite: bool = False) -> Dict[str, int]:
+        """
+        Import the old data in a single transaction, with a progress bar
+        """
+
+        size = self.old_location.stat().st_size
+
+        # binary, as `tell` on text files is slow
+        with self.old_location.open("rb") as f:
+            with logger.progress("Converting", size) as update:
+
+                def records() -> Iterator[Record]:
+                    for number, record in enumerate(V2Reader(f).records()):
+                        if number % PROGRESS_STEP == 0:
+                            update(f.tell())
+
+                        yield record
+
+                with manager.batch():
+                    if overwrite:
+                        delete_all_data(manager.session, commit=False)
+
+                    return import_records(records())
+
+    def migrate(self, dry_run: bool = False) -> bool:
+        """
+        Move the v2 data to the database, with `dry_run` the data is only
+        converted (in memory) to check that it can be migrated
+        """
+
         logger.info("Checking for old data ...")
 
         if not self.check_for_old_data():
             logger.error("No old data found")
-            return
-
-        logger.info("Found old data. Converting ...")
+            return False
 
-        try:
+        overwrite = False
+        if dry_run:
+            manager.connect("sqlite:///:memory:")
+        else:
             if self.new_location.exists():
                 confirm = logger.console.input(
                     "Database already exists. Do you want to overwrite it? (y/n): "
                 )
-                if confirm.lower() == "y":
-                    delete_all_data(manager.session)
-                else:
+                if confirm.lower() != "y":
                     logger.error("Migration aborted")
-                    return
+                    return False
 
-            data = self.load_old()
-            for workspace in data:
-                self.create_workspace(workspace)
+                overwrite = True
 
-            self.backup_old_config()
-            logger.success("Successfully moved to new version. Happy todoing!")
-        except Exception as e:
-            logger.error(f"Error converting data: {e}")
-
-    # ------------------------------------------------
-
-    def create_workspace(self, data, parent=None):
-        description = data.get("description")
-        child_workspaces = data.get("workspaces", [])
-        todos = data.get("todos", [])
+            manager.connect(f"sqlite:///{self.new_location}")
 
-        workspace = Workspace(description=description, parent_workspace=parent)
-        workspace.save()
-
-        for child in child_workspaces:
-            self.create_workspace(child, parent=workspace)
+        logger.info("Found old data. Converting ...")
 
-        for child in todos:
-            self.create_todo(child, parent_workspace=workspace)
+        try:
+            counts = self.convert(overwrite)
+        except Exception as e:
+            logger.error(f"Error converting data: {e}")
+            return False
 
-    def create_todo(self, data: List, parent_todo=None, parent_workspace=None):
-        self_data = data[0]
-        if len(data) == 1:
-            children_data = []
-        else:
-            children_data = data[1]
-
-        description = self_data.get("description")
-        pending = self_data.get("status") != "COMPLETED"
-        urgency = self_data.get("urgency")
-        due = self_data.get("due")
-        effort = self_data.get("effort")
-        recurrence = self_data.get("recurrence")
-
-        todo = Todo(
-            parent_todo=parent_todo,
-            parent_workspace=parent_workspace,
-            description=description,
-            pending=pending,
-            urgency=urgency,
-            due=parse_due(due),
-            effort=int(effort) if effort else None,
-            recurrence=parse_recurrence(recurrence) if recurrence else None,
-        )
-        todo.save()
+        found = f"{counts['workspaces']} workspaces and {counts['todos']} todos"
+        if dry_run:
+            logger.success(f"Found {found}, nothing was written")
+            return True
 
-        for data in children_data:
-            self.create_todo(
-                data,
-                parent_todo=todo,
-            )
+        self.backup_old_config()
+        logger.success(f"Moved {found} to the new version. Happy todoing!")
+        return True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator, List, Tuple
+
+
+class StartupProfile:
+    """
+    Time spent in each phase of startup, shown with `dooit --startup-profile`
+
+    Does nothing until enabled, so the phases can be marked unconditionally
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.phases: List[Tuple[str, float]] = []
+        self.total = 0.0
+        self._origin = 0.0
+        self._started: Dict[str, float] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.phases.clear()
+        self._started.clear()
+        self._origin = perf_counter()
+
+    def start(self, name: str) -> None:
+        if self.enabled:
+            self._started[name] = perf_counter()
+
+    def stop(self, name: str) -> None:
+        if not self.enabled or name not in self._started:
+            return
+
+        now = perf_counter()
+        self.phases.append((name, now - self._started.pop(name)))
+        self.total = now - self._origin
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def report(self) -> str:
+        lines = [
+            f"{name:<14} {elapsed * 1000:8.1f} ms" for name, elapsed in self.phases
+        ]
+        lines.append(f"{'total':<14} {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,19 @@
+"""
+File formats of `dooit export` and `dooit import`
+
+Kept apart from `dooit.utils.transfer` (and outside `dooit.utils`, whose
+`__init__` imports `dooit.api`) so the command line can list them cheaply
+"""
+
+from typing import List
+
+FORMATS: List[str] = ["jsonl", "csv", "todo.txt"]
+
+
+def guess_format(filename: str) -> str:
+    if filename.endswith(".csv"):
+        return "csv"
+    if filename.endswith(".txt"):
+        return "todo.txt"
+
+    return "jsonl"
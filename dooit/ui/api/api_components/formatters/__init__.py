@@ -1,9 +1,11 @@
 from .formatter import Formatter
-from .formatter_store import FormatterStore
-from ._decorators import extra_formatter
+from .formatter_store import FormatterStore, FormatterCacheInfo
+from ._decorators import extra_formatter, pure_formatter
 
 __all__ = [
     "Formatter",
     "FormatterStore",
+    "FormatterCacheInfo",
     "extra_formatter",
+    "pure_formatter",
 ]
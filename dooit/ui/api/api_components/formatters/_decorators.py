@@ -1,4 +1,5 @@
 MUTLIPLE_FORMATTER_ATTR = "__extra_formatter"
+PURE_FORMATTER_ATTR = "__pure_formatter"
 
 
 def extra_formatter(func):
@@ -8,3 +9,13 @@ def extra_formatter(func):
 
     setattr(func, MUTLIPLE_FORMATTER_ATTR, True)
     return func
+
+
+def pure_formatter(func):
+    """
+    Decorator to declare that a formatter only depends on the value, the model
+    and the theme, which allows its output to be cached.
+    """
+
+    setattr(func, PURE_FORMATTER_ATTR, True)
+    return func
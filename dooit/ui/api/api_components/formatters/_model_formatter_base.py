@@ -1,6 +1,6 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict
 
-from .formatter_store import FormatterStore
+from .formatter_store import FormatterCacheInfo, FormatterStore
 
 if TYPE_CHECKING:  # pragma: no cover
     from dooit.ui.api.dooit_api import DooitAPI
@@ -9,10 +9,26 @@ if TYPE_CHECKING:  # pragma: no cover
 class ModelFormatterBase:
     def __init__(self, api: "DooitAPI") -> None:
         self.api = api
+        self.generation = 0
         self.setup_formatters()
 
     def get_formatter_store(self) -> FormatterStore:
-        return FormatterStore(self.trigger, self.api)
+        return FormatterStore(self._formatters_changed, self.api)
+
+    def cache_info(self) -> Dict[str, FormatterCacheInfo]:
+        """
+        Cache statistics of the formatters of every column
+        """
+
+        return {
+            name: store.cache_info()
+            for name, store in vars(self).items()
+            if isinstance(store, FormatterStore)
+        }
+
+    def _formatters_changed(self) -> None:
+        self.generation += 1
+        self.trigger()
 
     def setup_formatters(self) -> None:  # pragma: no cover
         pass
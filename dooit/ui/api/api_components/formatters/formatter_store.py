@@ -1,10 +1,26 @@
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+from functools import partial
+from inspect import Parameter, signature
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from uuid import uuid4
 from dataclasses import dataclass
 
 from rich.text import Text
 from dooit.api.workspace import ModelType
-from dooit.ui.api.api_components.formatters._decorators import MUTLIPLE_FORMATTER_ATTR
+from dooit.ui.api.api_components.formatters._decorators import (
+    MUTLIPLE_FORMATTER_ATTR,
+    PURE_FORMATTER_ATTR,
+)
 
 if TYPE_CHECKING:  # pragma: no cover
     from dooit.ui.api.dooit_api import DooitAPI
@@ -12,6 +28,18 @@ if TYPE_CHECKING:  # pragma: no cover
 FormatterReturnType = Union[str, Tuple[str, bool]]
 
 
+class FormatterCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
 @dataclass
 class FormatterFunc:
     name: str
@@ -22,6 +50,7 @@ class FormatterFunc:
 def trigger_refresh(func: Callable) -> Callable:
     def wrapper(self: "FormatterStore", *args, **kwargs):
         res = func(self, *args, **kwargs)
+        self._compile()
         self.trigger()
         return res
 
@@ -29,11 +58,23 @@ def trigger_refresh(func: Callable) -> Callable:
 
 
 class FormatterStore:
+    # number of formatted values kept when all the formatters are pure
+    cache_size: int = 1024
+
     def __init__(self, trigger: Callable, api: "DooitAPI") -> None:
         self.formatters = dict()
         self.trigger = trigger
         self.api = api
 
+        # enabled formatters with their arguments bound, in the order they run
+        self._type1_chain: Tuple[Callable, ...] = ()
+        self._type2_chain: Tuple[Callable, ...] = ()
+
+        self._cache: OrderedDict[Tuple[Any, ...], Text] = OrderedDict()
+        self._cacheable = True
+        self._hits = 0
+        self._misses = 0
+
     @trigger_refresh
     def add(self, func: Callable, id: Optional[str] = None) -> str:
         id = id or uuid4().hex
@@ -65,13 +106,27 @@ class FormatterStore:
         formatter.disabled = False
         return True
 
+    @staticmethod
+    def _has_attr(func: Callable, attr: str) -> bool:
+        while True:
+            if hasattr(func, attr):
+                return True
+
+            if not isinstance(func, partial):
+                return False
+
+            func = func.func
+
+    @classmethod
+    def _is_extra_formatter(cls, func: Callable) -> bool:
+        return cls._has_attr(func, MUTLIPLE_FORMATTER_ATTR)
+
     @property
     def type1_formatter_functions(self) -> List[Callable]:
         return [
             formatter.func
             for formatter in self.formatters.values()
-            if not hasattr(formatter.func, MUTLIPLE_FORMATTER_ATTR)
-            and not formatter.disabled
+            if not self._is_extra_formatter(formatter.func) and not formatter.disabled
         ]
 
     @property
@@ -79,30 +134,89 @@ class FormatterStore:
         return [
             formatter.func
             for formatter in self.formatters.values()
-            if hasattr(formatter.func, MUTLIPLE_FORMATTER_ATTR)
-            and not formatter.disabled
+            if self._is_extra_formatter(formatter.func) and not formatter.disabled
         ]
 
     def _get_function_params(self, func: Callable) -> List[str]:
-        return list(func.__code__.co_varnames)
+        try:
+            parameters = signature(func).parameters.values()
+        except (TypeError, ValueError):  # pragma: no cover
+            return []
+
+        kinds = (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY)
+        return [param.name for param in parameters if param.kind in kinds]
+
+    def _bind(self, func: Callable) -> Callable:
+        """
+        Pass the extra arguments the formatter asks for (by name) in advance
+        """
 
-    def format_value(self, value: Any, model: ModelType) -> Text:
         params = dict(api=self.api)
+        extra_args: Dict[str, Any] = {
+            param: params[param]
+            for param in self._get_function_params(func)
+            if param in params
+        }
+
+        return partial(func, **extra_args) if extra_args else func
 
-        def get_extra_args(func: Callable) -> Dict[str, Any]:
-            func_params = self._get_function_params(func)
-            extra_args = {}
+    def _compile(self) -> None:
+        """
+        Rebuild the call chains, run every time the formatters change
+        """
 
-            for param in func_params:
-                if param in params:
-                    extra_args[param] = params[param]
+        self._type1_chain = tuple(
+            self._bind(func) for func in reversed(self.type1_formatter_functions)
+        )
+        self._type2_chain = tuple(
+            self._bind(func) for func in reversed(self.type2_formatter_functions)
+        )
 
-            return extra_args
+        functions = self.type1_formatter_functions + self.type2_formatter_functions
+        self._cacheable = all(
+            self._has_attr(func, PURE_FORMATTER_ATTR) for func in functions
+        )
+        self._cache.clear()
+
+    def cache_info(self) -> FormatterCacheInfo:
+        return FormatterCacheInfo(
+            self._hits, self._misses, self.cache_size, len(self._cache)
+        )
+
+    def format_value(self, value: Any, model: ModelType) -> Text:
+        if not self._cacheable:
+            return self._format_value(value, model)
+
+        key = (
+            value,
+            model.uuid,
+            model.version,
+            self.api.css.theme_generation,
+        )
 
+        try:
+            res = self._cache[key]
+        except KeyError:
+            pass
+        except TypeError:  # pragma: no cover (unhashable value)
+            return self._format_value(value, model)
+        else:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return res.copy()
+
+        self._misses += 1
+        res = self._cache[key] = self._format_value(value, model)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return res.copy()
+
+    def _format_value(self, value: Any, model: ModelType) -> Text:
         res = None
 
-        for func in reversed(self.type1_formatter_functions):
-            res = func(value, model, **get_extra_args(func))
+        for func in self._type1_chain:
+            res = func(value, model)
 
             if isinstance(res, Text):
                 res = res.markup
@@ -114,8 +228,8 @@ class FormatterStore:
             res = str(value)
 
         value = res
-        for func in reversed(self.type2_formatter_functions):
-            res = func(value, model, **get_extra_args(func))
+        for func in self._type2_chain:
+            res = func(value, model)
             if res is not None:
                 if isinstance(res, Text):  # pragma: no cover
                     res = res.markup
@@ -1,7 +1,7 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
-from typing import Callable, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 from ._base import ApiComponent
 from dooit.ui.api.events import ModeType
@@ -30,6 +30,7 @@ class KeyMatchType(Enum):
 class KeyMatch:
     match_type: KeyMatchType
     function: Optional[DooitFunction] = None
+    count: int = 1
 
     @staticmethod
     def no_match():
@@ -40,16 +41,50 @@ class KeyMatch:
         return KeyMatch(match_type=KeyMatchType.MultipleMatchFound)
 
     @staticmethod
-    def match_found(func: DooitFunction):
-        return KeyMatch(match_type=KeyMatchType.MatchFound, function=func)
+    def match_found(func: DooitFunction, count: int = 1):
+        return KeyMatch(match_type=KeyMatchType.MatchFound, function=func, count=count)
+
+
+@dataclass
+class KeyNode:
+    """
+    Node of the keybind trie, one edge per key of the keybind
+    """
+
+    children: Dict[str, "KeyNode"] = field(default_factory=dict)
+    function: Optional[DooitFunction] = None
+
+
+def format_key(key: str) -> str:
+    return f"<{key}>" if len(key) > 1 else key
+
+
+def split_keys(keys: str) -> Iterator[str]:
+    """
+    Split a keybind such as `gg` or `<ctrl+s>x` into the keys it is made of
+    """
+
+    i = 0
+    while i < len(keys):
+        end = keys.find(">", i + 2) if keys[i] == "<" else -1
+        if end == -1:
+            yield keys[i]
+            i += 1
+        else:
+            yield keys[i : end + 1]
+            i = end + 1
 
 
 class KeyManager(ApiComponent):
     def __init__(self, get_mode: Callable) -> None:
         self.keybinds: KeyBindType = defaultdict(lambda: defaultdict(lambda: None))
-        self._inputs: List[str] = []
         self.get_mode = get_mode
 
+        self._tries: defaultdict[str, KeyNode] = defaultdict(KeyNode)
+        self._inputs: List[str] = []
+        self._node: Optional[KeyNode] = None
+        self._count = ""
+
     @property
     def groups(self) -> List[str]:
         return list(
@@ -71,9 +106,13 @@ class KeyManager(ApiComponent):
         description: Optional[str],
         group: str,
     ) -> None:
-        self.keybinds[mode][key] = DooitFunction(
-            callback, description or callback.__doc__ or "", group
-        )
+        function = DooitFunction(callback, description or callback.__doc__ or "", group)
+        self.keybinds[mode][key] = function
+
+        node = self._tries[mode]
+        for k in split_keys(key):
+            node = node.children.setdefault(k, KeyNode())
+        node.function = function
 
     def set(
         self,
@@ -90,38 +129,54 @@ class KeyManager(ApiComponent):
 
     @property
     def input(self) -> str:
-        formatted = ""
-        for i in self._inputs:
-            if len(i) > 1:
-                formatted += f"<{i}>"
-            else:
-                formatted += i
-
-        return formatted
+        return self._count + "".join(self._inputs)
 
     def clear_input(self):
         self._inputs.clear()
+        self._node = None
+        self._count = ""
+
+    def _is_count(self, key: str) -> bool:
+        """
+        Digits typed before a keybind repeat it, like `5j` in vim
+        """
 
-    def _find_matched_functions(self) -> List[DooitFunction]:
-        keybinds = self.keybinds[self.get_mode()].items()
-        return [func for key, func in keybinds if key.startswith(self.input) and func]
+        if self.get_mode() != "NORMAL" or self._node is not None:
+            return False
 
-    def search_for_key(self) -> KeyMatch:
-        matched = self._find_matched_functions()
-        if not matched:
+        if len(key) > 1 or not key.isdigit():
+            return False
+
+        if key == "0" and not self._count:
+            return False
+
+        return key not in self._tries[self.get_mode()].children
+
+    def search_for_key(self, key: str) -> KeyMatch:
+        node = self._node or self._tries[self.get_mode()]
+        node = node.children.get(key)
+        if node is None:
             self.clear_input()
             return KeyMatch.no_match()
 
-        if len(matched) > 1 or self.input not in self.keybinds[self.get_mode()]:
+        if node.children:
+            self._node = node
             return KeyMatch.multiple_match()
 
+        assert node.function is not None
+        count = int(self._count or 1)
         self.clear_input()
-        return KeyMatch.match_found(matched[0])
+        return KeyMatch.match_found(node.function, count)
 
     def register_key(self, key: str) -> KeyMatch:
         if key == "escape":
             self.clear_input()
             return KeyMatch.no_match()
 
+        if self._is_count(key):
+            self._count += key
+            return KeyMatch.multiple_match()
+
+        key = format_key(key)
         self._inputs.append(key)
-        return self.search_for_key()
+        return self.search_for_key(key)
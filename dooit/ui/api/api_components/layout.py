@@ -9,6 +9,7 @@ class LayoutManager(ApiComponent):
         self.app = app
         self._todo_layout: TodoLayout = []
         self._workspace_layout: WorkspaceLayout = []
+        self.generation = 0
 
     @property
     def todo_layout(self) -> TodoLayout:
@@ -17,6 +18,7 @@ class LayoutManager(ApiComponent):
     @todo_layout.setter
     def todo_layout(self, layout: TodoLayout):
         self._todo_layout = layout
+        self.generation += 1
         for tree in self.app.query(TodosTree):
             tree.refresh_options()
 
@@ -27,5 +29,6 @@ class LayoutManager(ApiComponent):
     @workspace_layout.setter
     def workspace_layout(self, layout: WorkspaceLayout):
         self._workspace_layout = layout
+        self.generation += 1
         for tree in self.app.query(WorkspacesTree):
             tree.refresh_options()
@@ -1,10 +1,12 @@
-from typing import TYPE_CHECKING
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Callable
 from dooit.ui.api.events import BarNotification, NotificationType
 from dooit.ui.api.plug import PluginManager
 from .events import DooitEvent, SwitchTab, _QuitApp
 from dooit.ui.widgets import ModelTree
 from dooit.ui.widgets.trees import TodosTree
 from dooit.utils import CssManager
+from dooit.api import manager
 
 from .api_components import (
     KeyManager,
@@ -57,12 +59,28 @@ class DooitAPI:
 
         assert keymatch.function is not None
         try:
-            keymatch.function.callback()
+            if keymatch.count == 1:
+                keymatch.function.callback()
+            else:
+                self._repeat(keymatch.function.callback, keymatch.count)
         except Exception as e:
             self.app.bar_switcher.switch_to_notification(
                 BarNotification(str(e), "error")
             )
 
+    def _repeat(self, callback: Callable, count: int) -> None:
+        """
+        Run a keybind `count` times, committed, synced and painted once
+        """
+
+        tree = self.app.focused
+        sync = tree.batch_sync() if isinstance(tree, ModelTree) else nullcontext()
+
+        # the tree syncs after the commit, or the rollback if a call fails
+        with self.app.batch_update(), sync, manager.batch():
+            for _ in range(count):
+                callback()
+
     def trigger_event(self, event: DooitEvent):
         self.plugin_manager.on_event(event)
 
@@ -153,7 +171,7 @@ class DooitAPI:
         self.focused.remove_node()
 
     def start_search(self):
-        """Start a search within the list"""
+        """Start a search within the list, words starting with `@` filter todos by tag"""
         self.focused.start_search()
 
     def start_sort(self):
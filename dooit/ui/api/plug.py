@@ -1,11 +1,13 @@
 import os
 import sys
 from functools import partial
-from collections import defaultdict
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import TYPE_CHECKING, Callable, List, Type
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Type
 from platformdirs import user_config_dir
 from textual.css.query import NoMatches
+from textual.timer import Timer
 
 from dooit.ui.api.event_handlers import DOOIT_EVENT_ATTR, DOOIT_TIMER_ATTR
 from dooit.ui.api.events import DooitEvent
@@ -24,11 +26,29 @@ MAIN_FOLDER = "dooit"
 CONFIG_FOLDER = Path(user_config_dir(MAIN_FOLDER))
 DEFAULT_CONFIG = BASE_PATH / "utils" / "default_config.py"
 
+_MISSING: Any = object()
+
 
 def is_running_under_pytest() -> bool:
     return "PYTEST_CURRENT_TEST" in os.environ
 
 
+class TimerStats(NamedTuple):
+    """
+    Cost of a `@timer` function since it was registered
+    """
+
+    name: str
+    interval: float
+    calls: int
+    skipped: int
+    total_time: float
+
+    @property
+    def average(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
 class PluginManager:
     def __init__(self, api: "DooitAPI") -> None:
         self.events: defaultdict[Type[DooitEvent], List[Callable]] = defaultdict(list)
@@ -36,16 +56,39 @@ class PluginManager:
         self.api = api
         self.app = api.app
 
+        # handlers for every concrete event class dispatched so far
+        self._dispatch: Dict[Type[DooitEvent], List[Callable]] = {}
+        self._bar_refresh_pending = False
+
+        # one textual timer per period, shared by all the `@timer` functions
+        self._intervals: Dict[float, Timer] = {}
+        self._timers_paused = False
+        self._timer_calls: Counter = Counter()
+        self._timer_skips: Counter = Counter()
+        self._timer_time: defaultdict[Callable, float] = defaultdict(float)
+
     def scan(self):
-        load_file(self, DEFAULT_CONFIG)
-        if is_running_under_pytest():
+        with self.api.css.batch():
+            load_file(self, DEFAULT_CONFIG)
+            if is_running_under_pytest():
+                return
+
+            load_file(self, CONFIG_FOLDER / "config.py")
+
+    def refresh_bar(self) -> None:
+        """
+        Refresh the status bar once the next frame is drawn, no matter how
+        many times this is called (and messages are handled) until then
+        """
+
+        if self._bar_refresh_pending:
             return
 
-        load_file(self, CONFIG_FOLDER / "config.py")
+        self._bar_refresh_pending = True
+        self.app.call_after_refresh(self._refresh_bar)
 
-    def _update_dooit_value(self, obj, *params):
-        res = obj(self.api, *params)
-        setattr(obj, "__dooit_value", res)
+    def _refresh_bar(self) -> None:
+        self._bar_refresh_pending = False
 
         try:
             if bar := getattr(self.app, "bar", None):
@@ -53,24 +96,109 @@ class PluginManager:
         except NoMatches:
             pass
 
-    def on_event(self, event: DooitEvent):
-        matched_events = [
-            e for e in self.events.keys() if issubclass(event.__class__, e)
+    def _update_dooit_value(self, obj, *params) -> bool:
+        res = obj(self.api, *params)
+        if getattr(obj, "__dooit_value", _MISSING) == res:
+            return False
+
+        setattr(obj, "__dooit_value", res)
+        self.refresh_bar()
+        return True
+
+    def _get_handlers(self, event_class: Type[DooitEvent]) -> List[Callable]:
+        handlers = self._dispatch.get(event_class)
+        if handlers is not None:
+            return handlers
+
+        # in the order the event types were registered
+        handlers = [
+            obj
+            for registered, objs in self.events.items()
+            if issubclass(event_class, registered)
+            for obj in objs
         ]
+        self._dispatch[event_class] = handlers
+        return handlers
 
-        for e in matched_events:
-            for obj in self.events[e]:
+    def on_event(self, event: DooitEvent):
+        # e.g. every stylesheet injected on `Startup` is written at once
+        with self.api.css.batch():
+            for obj in self._get_handlers(event.__class__):
                 self._update_dooit_value(obj, event)
 
     def _register_events(self, events: List[Type[DooitEvent]], obj: Callable):
         for event in events:
             self.events[event].append(obj)
 
+        self._dispatch.clear()
+
+    def _run_timer(self, obj: Callable) -> None:
+        start = perf_counter()
+        changed = self._update_dooit_value(obj)
+        self._timer_time[obj] += perf_counter() - start
+        self._timer_calls[obj] += 1
+        if not changed:
+            self._timer_skips[obj] += 1
+
+    def _tick(self, interval: float) -> None:
+        for obj in self.timers[interval]:
+            self._run_timer(obj)
+
     def _register_timer(self, obj: Callable):
         if interval := getattr(obj, DOOIT_TIMER_ATTR, None):
-            func = partial(self._update_dooit_value, obj)
-            func()
-            self.api.app.set_interval(interval, func)
+            # status bar widgets register functions which the config already did
+            if obj in self.timers[interval]:
+                return
+
+            self.timers[interval].append(obj)
+            self._run_timer(obj)
+
+            if interval not in self._intervals:
+                self._intervals[interval] = self.app.set_interval(
+                    interval,
+                    partial(self._tick, interval),
+                    name=f"dooit-timer-{interval}",
+                    pause=self._timers_paused,
+                )
+
+    def pause_timers(self) -> None:
+        """
+        Stop running `@timer` functions, e.g. while the main screen is hidden
+        """
+
+        self._timers_paused = True
+        for timer in self._intervals.values():
+            timer.pause()
+
+    def resume_timers(self) -> None:
+        """
+        Run the `@timer` functions again, updating their values right away
+        """
+
+        if not self._timers_paused:
+            return
+
+        self._timers_paused = False
+        for interval, timer in self._intervals.items():
+            self._tick(interval)
+            timer.resume()
+
+    def timer_stats(self) -> List[TimerStats]:
+        """
+        Active `@timer` functions with how often they ran and how long it took
+        """
+
+        return [
+            TimerStats(
+                getattr(obj, "__qualname__", repr(obj)),
+                interval,
+                self._timer_calls[obj],
+                self._timer_skips[obj],
+                self._timer_time[obj],
+            )
+            for interval, objs in self.timers.items()
+            for obj in objs
+        ]
 
     def register(self, obj):
         if event := getattr(obj, DOOIT_EVENT_ATTR, None):
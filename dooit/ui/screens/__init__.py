@@ -1,4 +1,17 @@
-from .help import HelpScreen
+from typing import TYPE_CHECKING, Any
 from .index import MainScreen
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .help import HelpScreen
+
 __all__ = ["HelpScreen", "MainScreen"]
+
+
+def __getattr__(name: str) -> Any:
+    # the help screen is only imported once it is opened
+    if name == "HelpScreen":
+        from .help import HelpScreen
+
+        return HelpScreen
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
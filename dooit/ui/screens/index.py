@@ -81,6 +81,12 @@ class MainScreen(BaseScreen):
         await self.api.handle_key(key)
         return True
 
+    def on_screen_suspend(self, _: events.ScreenSuspend) -> None:
+        self.api.plugin_manager.pause_timers()
+
+    def on_screen_resume(self, _: events.ScreenResume) -> None:
+        self.api.plugin_manager.resume_timers()
+
     @on(BarNotification)
     def show_notification(self, event: BarNotification):
         self.app.bar_switcher.switch_to_notification(event)
@@ -150,3 +156,5 @@ class MainScreen(BaseScreen):
 
         for table, field, event in listeners:
             self._track_field(table, field, event)
+
+        self.call_after_refresh(self.app.first_paint)
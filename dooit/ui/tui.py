@@ -2,14 +2,16 @@ from typing import Optional
 from textual import on
 from textual.app import App
 from textual.binding import Binding
+from textual.screen import Screen
 from dooit.ui.api.events import ModeChanged, DooitEvent, ModeType, Startup, _QuitApp
 from dooit.ui.api.events.events import ShutDown
 from dooit.ui.widgets import BarSwitcher
 from dooit.ui.widgets.bars import StatusBar
 from dooit.ui.widgets.trees import WorkspacesTree
-from dooit.ui.screens import MainScreen, HelpScreen
+from dooit.ui.screens import MainScreen
 from dooit.ui.widgets.trees.model_tree import ModelTree
 from dooit.utils import CssManager
+from dooit.startup_profile import startup_profile
 from .api import DooitAPI
 from ..api import manager
 
@@ -20,11 +22,17 @@ PRINTABLE = (
 )
 
 
+def help_screen() -> Screen:
+    from dooit.ui.screens.help import HelpScreen
+
+    return HelpScreen()
+
+
 class Dooit(App):
     CSS_PATH = CssManager().css_file
 
     SCREENS = {
-        "help": HelpScreen,
+        "help": help_screen,
         "main": MainScreen,
     }
 
@@ -38,12 +46,23 @@ class Dooit(App):
         manager.connect(connection_string)
 
     async def base_setup(self):
-        self.api = DooitAPI(self)
-        self.api.plugin_manager.scan()
+        with startup_profile.phase("api setup"):
+            self.api = DooitAPI(self)
+
+        with startup_profile.phase("plugin scan"):
+            self.api.plugin_manager.scan()
+
         self.post_message(Startup())
         self.post_message(ModeChanged("NORMAL"))
+
+        startup_profile.start("first paint")
         self.push_screen("main")
 
+    def first_paint(self) -> None:
+        startup_profile.stop("first paint")
+        if startup_profile.enabled:
+            self.exit()
+
     async def setup_poller(self):
         self.set_interval(1, self.poll_dooit_db)
 
@@ -71,19 +90,18 @@ class Dooit(App):
         return self.dooit_mode
 
     async def poll_dooit_db(self):  # pragma: no cover
-        def refresh_all_trees():
-            trees = self.query(ModelTree)
-            for tree in trees:
-                tree.force_refresh()
+        changes = manager.poll_changes()
+        if changes is None:
+            return
 
-        if manager.has_changed():
-            refresh_all_trees()
+        for tree in self.query(ModelTree):
+            tree.apply_changes(changes)
 
     @on(DooitEvent)
     def global_message(self, event: DooitEvent):
         if isinstance(self.screen, MainScreen):
             self.api.trigger_event(event)
-            self.bar.refresh()
+            self.api.plugin_manager.refresh_bar()
 
     @on(ShutDown)
     def shutdown(self, _: ShutDown):
@@ -1,8 +1,11 @@
+from typing import TYPE_CHECKING, Any
 from .bar_switcher import BarSwitcher
 from .status_bar import StatusBar, StatusBarWidget
 from .search_bar import SearchBar
-from .confirm_bar import ConfirmBar
-from .sort_bar import SortBar
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .confirm_bar import ConfirmBar
+    from .sort_bar import SortBar
 
 __all__ = [
     "BarSwitcher",
@@ -12,3 +15,18 @@ __all__ = [
     "ConfirmBar",
     "SortBar",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # only imported once a sort or a confirmation is started
+    if name == "ConfirmBar":
+        from .confirm_bar import ConfirmBar
+
+        return ConfirmBar
+
+    if name == "SortBar":
+        from .sort_bar import SortBar
+
+        return SortBar
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
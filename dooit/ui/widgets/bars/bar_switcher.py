@@ -7,9 +7,7 @@ from dooit.ui.api.events.events import BarNotification
 from dooit.ui.widgets.bars._base import BarBase
 from .status_bar import StatusBar
 from .search_bar import SearchBar
-from .confirm_bar import ConfirmBar
 from .notification_bar import NotificationBar
-from .sort_bar import SortBar
 
 
 class BarSwitcher(ContentSwitcher):
@@ -62,6 +60,8 @@ class BarSwitcher(ContentSwitcher):
         )
 
     def switch_to_confirm(self, callback: Callable):
+        from .confirm_bar import ConfirmBar
+
         confirm_bar = ConfirmBar(callback)
         self.add_content(
             widget=confirm_bar,
@@ -70,6 +70,8 @@ class BarSwitcher(ContentSwitcher):
         )
 
     def switch_to_sort(self, model: DooitModel, callback: Callable):
+        from .sort_bar import SortBar
+
         sort_bar = SortBar(model, callback)
         self.add_content(
             widget=sort_bar,
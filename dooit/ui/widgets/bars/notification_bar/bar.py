@@ -31,7 +31,7 @@ class NotificationBar(BarBase):
 
     def on_mount(self):
         if self.auto_exit:
-            self.app.set_interval(1, self.remove)
+            self.set_timer(1, self.remove)
 
     async def handle_keypress(self, key: str) -> None:
         self.remove()
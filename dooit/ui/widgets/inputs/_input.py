@@ -1,4 +1,3 @@
-import pyperclip
 from typing import Optional
 
 
@@ -56,6 +55,8 @@ class Input:
         # should work just fine on windows and mac
 
         if text is None:
+            import pyperclip
+
             text = str(pyperclip.paste())
 
         self._value = (
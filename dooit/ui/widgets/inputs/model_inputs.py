@@ -1,10 +1,9 @@
-import re
 from datetime import datetime, timedelta
-from typing import Any, Optional, Tuple
+from typing import Any, Optional
 
 from .simple_input import SimpleInput
 from dooit.api import Todo, Workspace
-from dooit.utils import parse
+from dooit.utils import format_recurrence, parse, parse_recurrence
 
 
 class TodoDescription(SimpleInput[Todo, str]):
@@ -87,24 +86,8 @@ class Status(SimpleInput[Todo, str]):
 
 
 class Recurrence(SimpleInput[Todo, timedelta]):
-    @staticmethod
-    def parse_recurrence(recurrence: str) -> timedelta:
-        DURATION_LEGEND = {
-            "m": "minute",
-            "h": "hour",
-            "d": "day",
-            "w": "week",
-        }
-
-        def split_duration(duration: str) -> Tuple[str, str]:
-            if re.match(r"^(\d+)[mhdw]$", duration):
-                return duration[-1], duration[:-1]
-            else:
-                raise ValueError("Invalid recurrence format")
-
-        sign, frequency = split_duration(recurrence)
-        frequency = int(frequency)
-        return timedelta(**{f"{DURATION_LEGEND[sign]}s": frequency})
+    parse_recurrence = staticmethod(parse_recurrence)
+    timedelta_to_simple_string = staticmethod(format_recurrence)
 
     def _typecast_value(self, value: str) -> Optional[timedelta]:
         if not value:
@@ -112,22 +95,6 @@ class Recurrence(SimpleInput[Todo, timedelta]):
 
         return self.parse_recurrence(value)
 
-    @staticmethod
-    def timedelta_to_simple_string(td: timedelta):
-        if td.days >= 7 and td.days % 7 == 0:
-            weeks = td.days // 7
-            return f"{weeks}w"
-        elif td.days > 0:
-            return f"{td.days}d"
-        elif td.seconds >= 3600:
-            hours = td.seconds // 3600
-            return f"{hours}h"
-        elif td.seconds >= 60:
-            minutes = td.seconds // 60
-            return f"{minutes}m"
-
-        return "?"
-
     def _get_default_value(self) -> str:
         value = self.model_value
 
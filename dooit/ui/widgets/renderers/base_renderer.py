@@ -1,6 +1,18 @@
-from typing import TYPE_CHECKING, Generic, List, TypeVar, Union
+from time import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from rich.console import RenderableType
 from rich.table import Table
+from rich.text import Text
 from dooit.api import Todo, Workspace
 from ..inputs.simple_input import SimpleInput
 
@@ -16,14 +28,12 @@ class BaseRenderer(Generic[ModelType]):
     def __init__(self, model: ModelType, tree: "ModelTree"):
         self._model = model
         self.tree = tree
+        self._cached_prompt: Optional[Tuple[Tuple[Any, ...], RenderableType]] = None
         self.post_init()
 
     def post_init(self):  # pragma: no cover
         pass
 
-    def matches_filter(self, filter: str) -> bool:
-        return filter in self.model.description
-
     def _get_component(self, component: str) -> SimpleInput:
         return getattr(self, component)
 
@@ -37,21 +47,66 @@ class BaseRenderer(Generic[ModelType]):
 
     @property
     def prompt(self) -> RenderableType:
-        return self.make_renderable()
+        """
+        The rendered row, rebuilt only when something it depends on changed
+        """
+
+        if self.editing:
+            return self.make_renderable()
+
+        key = self._get_prompt_key()
+        if self._cached_prompt is None or self._cached_prompt[0] != key:
+            self._cached_prompt = (key, self.make_renderable())
+
+        return self._cached_prompt[1]
+
+    def _get_prompt_key(self) -> Tuple[Any, ...]:
+        api = self.tree.api
+        return (
+            self.model.version,
+            self.model.nest_level,
+            api.layouts.generation,
+            self.tree.formatter.generation,
+            api.css.theme,
+            tuple(self.tree.get_column_widths()),
+            int(time() // 60) if self._depends_on_time() else None,
+        )
+
+    def _depends_on_time(self) -> bool:
+        """
+        Whether the row can render differently as time passes, it is then
+        rendered again every minute
+        """
+
+        return False
 
     @property
     def model(self) -> ModelType:
         raise NotImplementedError  # pragma: no cover
 
-    def _get_attr_width(self, attr: str) -> int:
+    def _format(self, attr: str) -> Text:
         component = self._get_component(attr)
         formatter = self.tree.formatter
-        rendered: str = getattr(formatter, attr).format_value(
+        return getattr(formatter, attr).format_value(
             component.model_value, component.model
         )
 
+    def _get_attr_width(self, attr: str, rendered: Optional[Text] = None) -> int:
+        component = self._get_component(attr)
+        if rendered is None:
+            rendered = self._format(attr)
+
         return max(len(component.value) + 1, len(rendered))
 
+    def get_widths(self) -> Dict[str, int]:
+        """
+        Width needed by every column of the row
+        """
+
+        return {
+            item.value: self._get_attr_width(item.value) for item in self.table_layout
+        }
+
     def _get_max_width(self, attr: str) -> int:
         return self.tree.get_column_width(attr)
 
@@ -65,20 +120,25 @@ class BaseRenderer(Generic[ModelType]):
             table.add_column("padding", width=2 * nest)
             row.append("")
 
+        cells = {}
+        widths = {}
         for item in layout:
             attr = item.value
             component = self._get_component(attr)
 
-            if len(component.render()) > self._get_max_width(attr):
-                self.tree.get_column_width.cache_clear()
-
             if component.is_editing:
-                rendered = component.render()
+                cells[attr] = component.render()
+                widths[attr] = max(self._get_attr_width(attr), len(cells[attr]))
             else:
-                formatter = self.tree.formatter
-                rendered = getattr(formatter, attr).format_value(
-                    component.model_value, component.model
-                )
+                cells[attr] = self._format(attr)
+                widths[attr] = self._get_attr_width(attr, cells[attr])
+
+        # the row may have grown (or shrunk) since it was last rendered
+        self.tree.update_widths(self, widths)
+
+        for item in layout:
+            attr = item.value
+            rendered = cells[attr]
 
             if attr == "description":
                 table.add_column(attr, ratio=1)
@@ -99,8 +159,12 @@ class BaseRenderer(Generic[ModelType]):
         return True
 
     def stop_edit(self):
-        getattr(self, self.editing).stop_edit()
-        self.tree.get_column_width.cache_clear()
+        try:
+            getattr(self, self.editing).stop_edit()
+        finally:
+            # the model may have been changed without being saved
+            self.model.bump_version()
+
         self.editing = ""
 
     def handle_keypress(self, key: str) -> bool:
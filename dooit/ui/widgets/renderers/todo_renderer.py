@@ -14,6 +14,10 @@ class TodoRender(BaseRenderer[Todo]):
     def model(self) -> Todo:
         return self._model
 
+    def _depends_on_time(self) -> bool:
+        # relative dates and the overdue status
+        return self.model.due is not None
+
     def post_init(self):
         self.description = TodoDescription(self.model)
         self.due = Due(self.model)
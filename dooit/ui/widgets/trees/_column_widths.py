@@ -0,0 +1,70 @@
+from collections import Counter, defaultdict
+from heapq import heapify, heappop, heappush
+from typing import Dict, List
+
+
+class ColumnWidths:
+    """
+    Widest cell of every column, kept up to date one row at a time
+
+    Each column keeps a multiset of the widths of its cells and a max-heap
+    of the distinct widths. Widths which are no longer used are only dropped
+    from the heap once they reach the top
+    """
+
+    def __init__(self) -> None:
+        self._rows: Dict[str, Dict[str, int]] = {}
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+        self._heaps: Dict[str, List[int]] = defaultdict(list)
+
+    def __contains__(self, row: str) -> bool:
+        return row in self._rows
+
+    def set(self, row: str, widths: Dict[str, int]) -> None:
+        """
+        Set the widths of the cells of `row`, replacing the previous ones
+        """
+
+        if self._rows.get(row) == widths:
+            return
+
+        self.discard(row)
+        self._rows[row] = dict(widths)
+
+        for column, width in widths.items():
+            counts = self._counts[column]
+            if not counts[width]:
+                heappush(self._heaps[column], -width)
+            counts[width] += 1
+
+    def discard(self, row: str) -> None:
+        widths = self._rows.pop(row, None)
+        if widths is None:
+            return
+
+        for column, width in widths.items():
+            counts = self._counts[column]
+            counts[width] -= 1
+            if not counts[width]:
+                del counts[width]
+
+    def get(self, column: str) -> int:
+        heap = self._heaps.get(column)
+        if not heap:
+            return 0
+
+        counts = self._counts[column]
+        while heap and -heap[0] not in counts:
+            heappop(heap)
+
+        # widths which were removed and added back leave duplicates behind
+        if len(heap) > 2 * len(counts) + 16:
+            heap[:] = [-width for width in counts]
+            heapify(heap)
+
+        return -heap[0] if heap else 0
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._counts.clear()
+        self._heaps.clear()
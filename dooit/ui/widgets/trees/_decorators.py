@@ -31,7 +31,7 @@ def fix_highlight(func: Callable) -> Callable:
 def refresh_tree(func: Callable) -> Callable:
     def wrapper(self: "ModelTree", *args, **kwargs) -> Any:
         res = func(self, *args, **kwargs)
-        self.force_refresh()
+        self.request_sync()
         return res
 
     return wrapper
@@ -1,5 +1,5 @@
-from typing import TYPE_CHECKING, Dict, Generic, TypeVar
-from dooit.api import Workspace, Todo
+from typing import TYPE_CHECKING, Dict, Generic, Iterable, Type, TypeVar
+from dooit.api import DooitModel, Workspace, Todo
 from dooit.ui.widgets.renderers import (
     BaseRenderer,
     TodoRender,
@@ -17,13 +17,30 @@ class RenderDict(Dict, Generic[T]):
     Default Dict implementation for Todo/Workspace Renderers
     """
 
+    model_class: Type[DooitModel]
+
     def __init__(self, tree: "ModelTree"):
         super().__init__()
         self.tree = tree
 
-    def from_id(self, _id: str) -> T:
+    def from_model(self, model) -> T:
         raise NotImplementedError  # pragma: no cover
 
+    def from_id(self, _id: str) -> T:
+        return self.from_model(self.model_class.from_id(_id))
+
+    def prefetch(self, ids: Iterable[str]) -> None:
+        """
+        Build the renderers for all the missing `ids` with a single query
+        """
+
+        missing = [_id for _id in ids if _id not in self]
+        if not missing:
+            return
+
+        for model in self.model_class.from_ids(missing):
+            self[model.uuid] = self.from_model(model)
+
     def __getitem__(self, __key: str) -> T:
         return super().__getitem__(__key)
 
@@ -31,15 +48,34 @@ class RenderDict(Dict, Generic[T]):
         self[key] = self.from_id(key)
         return self[key]
 
+    # the column widths of the tree only account for the renderers in here
+
+    def __setitem__(self, key: str, value: T) -> None:
+        super().__setitem__(key, value)
+        self.tree.column_widths.set(key, value.get_widths())
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self.tree.column_widths.discard(key)
+
+    def pop(self, key: str, *default):
+        self.tree.column_widths.discard(key)
+        return super().pop(key, *default)
+
+    def clear(self) -> None:
+        super().clear()
+        self.tree.column_widths.clear()
+
 
 class WorkspaceRenderDict(RenderDict[WorkspaceRender]):
     """
     Default Dict implementation for Workspace Renderers
     """
 
-    def from_id(self, _id: str) -> WorkspaceRender:
-        w = Workspace.from_id(_id)
-        return WorkspaceRender(w, self.tree)
+    model_class = Workspace
+
+    def from_model(self, model: Workspace) -> WorkspaceRender:
+        return WorkspaceRender(model, self.tree)
 
 
 class TodoRenderDict(RenderDict[TodoRender]):
@@ -47,6 +83,7 @@ class TodoRenderDict(RenderDict[TodoRender]):
     Default Dict implementation for Todo Renderers
     """
 
-    def from_id(self, _id: str) -> TodoRender:
-        t = Todo.from_id(_id)
-        return TodoRender(t, self.tree)
+    model_class = Todo
+
+    def from_model(self, model: Todo) -> TodoRender:
+        return TodoRender(model, self.tree)
@@ -1,9 +1,31 @@
-from collections import defaultdict
-from functools import cache
-from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar, Union
+import asyncio
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+from sqlalchemy import ColumnElement
 from textual.app import ComposeResult
+from textual.geometry import Size
+from textual.strip import Strip
 from textual.widgets import Label
 from textual.widgets.option_list import Option
+
+# private parts of textual, which is pinned for them (see `test_todo_tree`)
+from textual._widget_navigation import find_next_enabled
+from textual.widgets._option_list import OptionLineSpan, OptionListContent
 from dooit.api import Todo, Workspace
 from dooit.ui.api.events import (
     ModeChanged,
@@ -14,6 +36,7 @@ from dooit.ui.api.events import (
 from dooit.ui.widgets.renderers import BaseRenderer
 from .base_tree import BaseTree
 from ._render_dict import RenderDict
+from ._column_widths import ColumnWidths
 from ._decorators import (
     fix_highlight,
     refresh_tree,
@@ -22,6 +45,7 @@ from ._decorators import (
 )
 
 if TYPE_CHECKING:  # pragma: no cover
+    from dooit.api.manager import ChangeSet
     from dooit.ui.api.api_components.formatters._model_formatter_base import (
         ModelFormatterBase,
     )
@@ -31,6 +55,14 @@ RenderDictType = TypeVar("RenderDictType", bound=RenderDict)
 
 
 class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
+    # trees with more rows than this only render the rows around the viewport
+    virtual_threshold: int = 1000
+    virtual_overscan: int = 20
+    virtual_cache_size: int = 2000
+
+    # keys typed within this many seconds of each other are searched once
+    search_debounce: float = 0.1
+
     DEFAULT_CSS = """
     ModelTree {
         height: 1fr;
@@ -48,12 +80,46 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         super().__init__(id=f"{tree}_{model.uuid}")
         self._model = model
         self.expaned = defaultdict(bool)
+        self.column_widths = ColumnWidths()
         self._renderers: RenderDictType = render_dict
         self._filter_refresh = False
 
-    @cache
+        # ids of the options whose prompt is rendered, least recently used
+        # first, with the version of the model they were rendered at
+        self._materialized: OrderedDict[str, int] = OrderedDict()
+        self._row_heights: Dict[str, int] = {}
+
+        # terms of the last search and the (lowercase) descriptions it matched
+        self._search_results: Optional[Tuple[List[str], Dict[str, str]]] = None
+
+        # changes inside `batch_sync` only sync the options once at its end
+        self._sync_depth = 0
+        self._sync_pending = False
+
     def get_column_width(self, attr: str) -> int:
-        return max(i._get_attr_width(attr) for i in self._renderers.values())
+        return self.column_widths.get(attr)
+
+    def update_widths(self, renderer: BaseRenderer, widths: Dict[str, int]) -> None:
+        # renderers which were dropped from the tree don't count anymore
+        if self._renderers.get(renderer.id) is renderer:
+            self.column_widths.set(renderer.id, widths)
+
+    def _measure_all(self) -> None:
+        """
+        Measure every row again, needed when formatters or the layout change
+        """
+
+        self.column_widths.clear()
+        for _id, renderer in self._renderers.items():
+            self.column_widths.set(_id, renderer.get_widths())
+
+    @property
+    def child_model(self) -> Type[ModelType]:
+        raise NotImplementedError  # pragma: no cover
+
+    @property
+    def is_virtual(self) -> bool:
+        return len(self._options) > self.virtual_threshold
 
     @property
     def formatter(self) -> "ModelFormatterBase":
@@ -73,10 +139,14 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         self._filter_refresh = value
 
         if refresh:
-            self.force_refresh()
+            self.sync_options()
 
     @property
     def current(self) -> BaseRenderer:
+        # the highlighted row may have been removed by a deferred change
+        if self._sync_pending and self.node.id not in self._renderers:
+            self.flush_sync()
+
         _id = self.node.id
         assert _id is not None
 
@@ -93,23 +163,95 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         self.update_prompt_by_id(option.id)
 
     def update_prompt_by_id(self, _id: str):
-        renderer = self._renderers[_id]
-        self.replace_option_prompt(_id, renderer.prompt)
+        # rows outside of the window are rendered once they are scrolled to
+        if self.is_virtual and _id not in self._materialized:
+            return
+
+        widths = self.get_column_widths()
+        if self._materialize(self.get_option(_id)):
+            if self.get_column_widths() != widths:
+                return self.refresh_options()
+
+            self._refresh_lines()
 
     def update_current_prompt(self):
         if self.highlighted is not None:
             self.update_prompt_at_index(self.highlighted)
 
+    def search(self, filter: str) -> None:
+        """
+        Filter the tree once the user stops typing, a search still
+        waiting is cancelled by the next one
+        """
+
+        if not filter:
+            self.workers.cancel_group(self, "search")
+            return self.set_filter("")
+
+        self.run_worker(partial(self._search, filter), group="search", exclusive=True)
+
+    async def _search(self, filter: str) -> None:
+        await asyncio.sleep(self.search_debounce)
+        self.set_filter(filter)
+
     def set_filter(self, filter: str) -> None:
         self.filter_refresh = bool(filter)
+        self._set_disabled(self._get_matches(filter))
+
+    def _get_matches(self, filter: str) -> Optional[Collection[str]]:
+        """
+        Ids of the rows matching `filter`, or None if there is nothing to match
+        """
 
+        terms = filter.lower().split()
+        if not terms:
+            self._search_results = None
+            return None
+
+        # every row matching a narrower query also matched the previous one
+        previous = self._search_results
+        if previous and all(any(old in new for new in terms) for old in previous[0]):
+            results = {
+                _id: description
+                for _id, description in previous[1].items()
+                if self.child_model.description_matches(description, terms)
+            }
+        else:
+            # matched in the database, which also covers rows not rendered yet
+            model = self.child_model
+            prefix = f"{model.__name__}_"
+            in_tree = model.in_tree(self._top_level_filter())
+            results = {
+                f"{prefix}{_id}": description.lower()
+                for _id, description in model.search_descriptions(
+                    filter, in_tree
+                ).items()
+            }
+
+        self._search_results = (terms, results)
+        return results.keys()
+
+    def _set_disabled(self, matches: Optional[Collection[str]]) -> None:
+        """
+        Disable the options not in `matches` with a single refresh
+        """
+
+        changed = False
         for option in self._options:
-            assert option.id
-            matches = self._renderers[option.id].matches_filter(filter)
-            if matches:
-                self.enable_option(option.id)
-            else:
-                self.disable_option(option.id)
+            disabled = matches is not None and option.id not in matches
+            if option.disabled != disabled:
+                option.disabled = disabled
+                changed = True
+
+        if not changed:
+            return
+
+        if self.highlighted is not None and self._options[self.highlighted].disabled:
+            self.highlighted = find_next_enabled(
+                self._options, anchor=self.highlighted, direction=1
+            )
+
+        self.refresh()
 
     @property
     def is_editing(self) -> bool:
@@ -125,32 +267,284 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
 
     @fix_highlight
     def force_refresh(self) -> None:
+        self._search_results = None
+        self._measure_all()
         self._force_refresh()
-        self.get_column_width.cache_clear()
 
-    def _force_refresh(self) -> None:
-        highlighted = self.highlighted
-        self.clear_options()
+    @fix_highlight
+    def sync_options(self) -> None:
+        """
+        Reconcile the options with the model instead of rebuilding them,
+        only the rows which were added get rendered
+        """
+
+        # the next search can't narrow down results which miss the new rows
+        self._search_results = None
+
+        ids = self._get_visible_ids()
+        widths = self.get_column_widths()
+
+        self._reconcile_options(ids)
+
+        # kept rows whose model changed, e.g. a parent once a child is removed
+        stale = [
+            _id
+            for _id, version in self._materialized.items()
+            if self._renderers[_id].model.version != version
+        ]
+
+        # rows which were skipped while the tree was virtual
+        skipped = []
+        if not self.is_virtual:
+            skipped = [o for o in self._options if o.id not in self._materialized]
+
+        self._renderers.prefetch([*stale, *(o.id for o in skipped)])
+        for option in skipped:
+            self._materialize(option)
+
+        if skipped:
+            self._refresh_lines()
+
+        for _id in stale:
+            option = self.get_option(_id)
+            if self._materialize(option):
+                index = self._option_ids[_id]
+                self._splice_options(index, index + 1, [option])
+
+        self.empty_message.display = not ids
+
+        if self.get_column_widths() != widths:
+            self.refresh_options()
+
+    @contextmanager
+    def batch_sync(self) -> Iterator[None]:
+        """
+        Sync the options once at the end of the block instead of after
+        every change, e.g. for a keybind repeated with a count
+        """
+
+        self._sync_depth += 1
+        try:
+            yield
+        finally:
+            self._sync_depth -= 1
+            if not self._sync_depth:
+                self.flush_sync()
+
+    def request_sync(self) -> None:
+        """
+        Sync the options now, or at the end of the current `batch_sync`
+        """
+
+        if self._sync_depth:
+            self._sync_pending = True
+        else:
+            self.sync_options()
+
+    def flush_sync(self) -> None:
+        """
+        Run the sync deferred by `batch_sync`, if any
+        """
+
+        if self._sync_pending:
+            self._sync_pending = False
+            self.sync_options()
+
+    def apply_changes(self, changes: "ChangeSet") -> None:
+        """
+        Update the tree after other connections wrote to the database,
+        only the affected rows are re-rendered
+        """
+
+        widths = self.get_column_widths()
+
+        # renderers cache the values of their inputs, so rebuild them
+        # unless the user is in the middle of editing one
+        editing = {_id for _id, renderer in self._renderers.items() if renderer.editing}
+        stale = self._renderers.keys() if changes.full else changes.uuids
+        removed = [
+            _id
+            for _id in list(stale - editing)
+            if self._renderers.pop(_id, None) is not None
+        ]
+
+        # the next search can't narrow down results which may be outdated
+        self._search_results = None
+
+        if changes.full:
+            return self.force_refresh()
+
+        if changes.structural:
+            self.sync_options()
+
+        # measure the changed rows again
+        self._renderers.prefetch(_id for _id in removed if _id in self._option_ids)
+
+        if self.get_column_widths() != widths:
+            return self.refresh_options()
 
-        options = []
+        for _id in changes.uuids & self._option_ids.keys():
+            self.update_prompt_by_id(_id)
 
-        def add_children_recurse(model: ModelType):
-            for child in getattr(
-                model,
-                self.__class__.__name__.replace("Tree", "").lower(),
-            ):
-                render = self._renderers[child.uuid]
-                options.append(Option("", id=render.id))
+    def get_column_widths(self) -> List[int]:
+        # the description takes whatever space is left, its width doesn't matter
+        return [
+            self.get_column_width(i.value)
+            for i in self.render_layout
+            if i.value != "description"
+        ]
 
-                if self.expanded_nodes[child.uuid] or self.filter_refresh:
-                    add_children_recurse(child)
+    def _top_level_filter(self) -> ColumnElement[bool]:
+        """
+        Criteria for the top level rows of the tree
+        """
+        raise NotImplementedError  # pragma: no cover
 
-        add_children_recurse(self.model)
-        self.add_options(options)
+    def _get_visible_ids(self) -> List[str]:
+        # the root workspace is only saved with its first child
+        if self.model.id is None:
+            return []
+
+        # only the ids are fetched, models are loaded once they are rendered
+        prefix = f"{self.child_model.__name__}_"
+        expanded = None
+        if not self.filter_refresh:
+            expanded = [
+                int(_id.removeprefix(prefix))
+                for _id, is_expanded in self.expanded_nodes.items()
+                if is_expanded and _id.startswith(prefix)
+            ]
+
+        ids = self.child_model.tree_order(self._top_level_filter(), expanded=expanded)
+        return [f"{prefix}{_id}" for _id in ids]
+
+    def _reconcile_options(self, ids: List[str]) -> None:
+        """
+        Patch the options in place to match `ids`
+
+        Only the window between the common prefix and suffix is replaced,
+        existing options (and their prompts) are reused when they move and
+        new ones are rendered right away unless the tree is virtual
+        """
+
+        options = self._options
+        start, old_end, new_end = 0, len(options), len(ids)
+
+        while start < min(old_end, new_end) and options[start].id == ids[start]:
+            start += 1
+
+        while (
+            old_end > start
+            and new_end > start
+            and options[old_end - 1].id == ids[new_end - 1]
+        ):
+            old_end -= 1
+            new_end -= 1
+
+        if start == old_end == new_end:
+            return
+
+        existing = {option.id: option for option in options[start:old_end]}
+        added = []
+        window = []
+
+        for _id in ids[start:new_end]:
+            option = existing.pop(_id, None)
+            if option is None:
+                option = Option("", id=_id)
+                added.append(option)
+
+            window.append(option)
+
+        for _id in existing:
+            assert _id is not None
+            self._materialized.pop(_id, None)
+
+        if not self.is_virtual and len(ids) <= self.virtual_threshold:
+            self._renderers.prefetch(option.id for option in added if option.id)
+            for option in added:
+                self._materialize(option)
+
+        self._splice_options(start, old_end, window)
+
+    def _splice_options(self, start: int, end: int, window: List[Option]) -> None:
+        """
+        Replace the options from `start` to `end` with `window`
+
+        Only the lines of `window` are laid out, the ones after it are
+        shifted (the list is laid out again if it becomes virtual, or stops)
+        """
+
+        was_virtual = self.is_virtual
+        options = self._options
+        removed = options[start:end]
+        delta = len(window) - len(removed)
+
+        # trees never have separators, so contents and options are the same list
+        options[start:end] = window
+        self._contents[start:end] = window
+
+        for option in removed:
+            assert option.id is not None
+            self._option_ids.pop(option.id, None)
+
+        reindex_end = start + len(window) if delta == 0 else len(options)
+        for index in range(start, reindex_end):
+            option_id = options[index].id
+            assert option_id is not None
+            self._option_ids[option_id] = index
+
+        lines, spans = self._lines, self._spans
+        if lines is None or spans is None or self.is_virtual != was_virtual:
+            self._refresh_lines()
+        else:
+            first = spans[start].first if start < len(spans) else len(lines)
+            last = first
+            if removed:
+                last = spans[end - 1].first + spans[end - 1].line_count
+
+            # lay out the window on its own, then move its lines in place
+            self._lines, self._spans = [], []
+            self._add_lines(list(window), self._option_width, option_index=start)
+            new_lines, new_spans = self._lines, self._spans
+            self._lines, self._spans = lines, spans
+
+            line_delta = len(new_lines) - (last - first)
+            lines[first:last] = new_lines
+            spans[start:end] = [
+                OptionLineSpan(first + span.first, span.line_count)
+                for span in new_spans
+            ]
+
+            if delta:
+                for line in range(first + len(new_lines), len(lines)):
+                    index, y = lines[line]
+                    lines[line] = (index + delta, y)
+
+            if line_delta:
+                for index in range(start + len(window), len(spans)):
+                    span = spans[index]
+                    spans[index] = OptionLineSpan(
+                        span.first + line_delta, span.line_count
+                    )
+
+            self.virtual_size = Size(self._option_width, len(lines))
+            self._content_render_cache.clear()
+            self.refresh()
+
+        self._mouse_hovering_over = None
+        self.highlighted = self.highlighted
+
+    def _force_refresh(self) -> None:
+        highlighted = self.highlighted
+        self.clear_options()
+        self._materialized.clear()
+
+        ids = self._get_visible_ids()
+        self.add_options([Option("", id=_id) for _id in ids])
         self.highlighted = highlighted
 
-        has_options = bool(options)
-        self.empty_message.display = not has_options
+        self.empty_message.display = not ids
         self.refresh_options()
 
     def on_mount(self):
@@ -165,7 +559,7 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
 
     @require_highlighted_node
     def start_search(self):
-        self.post_message(StartSearch(self.set_filter))
+        self.post_message(StartSearch(self.search))
 
     def start_edit(self, property: str) -> bool:
         columns = [i.value for i in self.render_layout]
@@ -183,14 +577,19 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         return res
 
     def stop_edit(self):
+        widths = self.get_column_widths()
+
         try:
             self.current.stop_edit()
         except Exception as e:  # pragma: no cover
             self.post_message(BarNotification(str(e), "error"))
 
         self.app.post_message(ModeChanged("NORMAL"))
-        self.get_column_width.cache_clear()
         self.update_current_prompt()
+        self._search_results = None
+
+        if self.get_column_widths() != widths:
+            self.refresh_options()
 
     def reset_state(self):
         """
@@ -217,13 +616,152 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         return True
 
     def refresh_options(self) -> None:
-        for i in self._options:
-            assert i.id is not None
-            new_prompt = self._renderers[i.id].prompt
-            if i.prompt != new_prompt:
-                i.set_prompt(self._renderers[i.id].prompt)
+        if self.is_virtual:
+            options = [self.get_option(_id) for _id in self._materialized]
+        else:
+            options = self._options
+
+        self._renderers.prefetch(option.id for option in options if option.id)
+
+        changed = False
+        for option in options:
+            changed = self._materialize(option) or changed
+
+        if changed:
+            self._refresh_lines()
+
+    def _materialize(self, option: Option) -> bool:
+        """
+        Render the prompt of the option, returns True if it changed
+        """
+
+        _id = option.id
+        assert _id is not None
+
+        renderer = self._renderers[_id]
+        prompt = renderer.prompt
+        self._materialized[_id] = renderer.model.version
+        self._materialized.move_to_end(_id)
+
+        if option.prompt is prompt:
+            return False
+
+        option.set_prompt(prompt)
+        if self.is_virtual:
+            # rendered lines are cached by index, drop the ones of the old prompt
+            index = self._option_ids[_id]
+            cache = self._content_render_cache
+            for key in [key for key in cache.keys() if key[0] == index]:
+                cache.discard(key)
+
+        return True
+
+    @property
+    def _option_width(self) -> int:
+        return self.scrollable_content_region.width - self._left_gutter_width()
+
+    def _materialize_window(self, line: int) -> None:
+        """
+        Render the rows around `line` if they were not rendered yet
+        """
+
+        assert self._lines is not None
+        if line >= len(self._lines):
+            return
+
+        index, _ = self._lines[line]
+        option = self._options[index]
+        if option.id in self._materialized:
+            self._materialized.move_to_end(option.id)
+            return
+
+        start = max(index - self.virtual_overscan, 0)
+        window = self._options[start : index + self.virtual_overscan + 1]
+        window = [option for option in window if option.id not in self._materialized]
+        widths = self.get_column_widths()
+
+        self._renderers.prefetch(option.id for option in window if option.id)
+        for option in window:
+            self._materialize(option)
+
+        self._evict()
+
+        if self.get_column_widths() != widths:
+            self.refresh_options()
+
+    def _measure_row(self, line: int) -> None:
+        """
+        Record the height of the row at `line` once it is rendered
+        """
+
+        assert self._lines is not None
+        if line >= len(self._lines):
+            return
+
+        index, _ = self._lines[line]
+        option = self._options[index]
+        assert option.id is not None
+
+        height = len(self._render_option_content(index, option, "", self._option_width))
+        if self._row_heights.get(option.id, 1) != height:
+            self._row_heights[option.id] = height
+            self._refresh_lines()
+
+    def _evict(self) -> None:
+        """
+        Forget the prompts (and renderers) of the least recently shown rows
+        """
+
+        keep = {_id for _id, renderer in self._renderers.items() if renderer.editing}
+        if self.highlighted is not None:
+            keep.add(self.node.id)
+
+        while len(self._materialized) > self.virtual_cache_size:
+            _id, version = self._materialized.popitem(last=False)
+            if _id in keep:
+                self._materialized[_id] = version
+                keep.remove(_id)
+                continue
+
+            self.get_option(_id).set_prompt("")
+            self._renderers.pop(_id, None)
+
+    def _add_lines(
+        self, new_content: List[OptionListContent], width: int, option_index=0
+    ) -> None:
+        if not self.is_virtual:
+            return super()._add_lines(new_content, width, option_index)
+
+        # rows are not rendered to measure them, the height they had when
+        # they were last displayed is used instead (a single line otherwise)
+        lines, spans = self._lines, self._spans
+        assert lines is not None and spans is not None
+
+        heights = self._row_heights
+        for option_index, option in enumerate(new_content, option_index):
+            assert isinstance(option, Option)
+            height = heights.get(option.id or "", 1)
+            spans.append(OptionLineSpan(len(lines), height))
+
+            if height == 1:
+                lines.append((option_index, 0))
+            else:
+                lines.extend((option_index, y) for y in range(height))
+
+        self.virtual_size = Size(width, len(self._lines))
+
+    def render_line(self, y: int) -> Strip:
+        if not self.is_virtual:
+            return super().render_line(y)
+
+        line = self.scroll_offset.y + y
+
+        self._populate()
+        self._materialize_window(line)
+        strip = super().render_line(y)
+        self._measure_row(line)
 
-        self._refresh_lines()
+        return strip
 
     def _get_parent(self, id: str) -> Optional[ModelType]:
         raise NotImplementedError  # pragma: no cover
@@ -281,6 +819,7 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         return self.current_model.add_sibling()
 
     def highlight_id(self, _id: str):
+        self.flush_sync()
         self.highlighted = self.get_option_index(_id)
 
     @refresh_tree
@@ -315,7 +854,7 @@ class ModelTree(BaseTree, Generic[ModelType, RenderDictType]):
         model = self.current_model
 
         self._renderers.pop(model.uuid)
-        self.expanded_nodes.pop(model.uuid)
+        self.expanded_nodes.pop(model.uuid, None)
         model.drop()
 
     @require_highlighted_node
@@ -1,4 +1,5 @@
-from typing import TYPE_CHECKING, Optional, Union
+from typing import TYPE_CHECKING, Optional, Type, Union
+from sqlalchemy import ColumnElement
 from textual import on
 from textual.widgets.option_list import Option
 
@@ -26,6 +27,16 @@ class TodosTree(ModelTree[Model, TodoRenderDict]):
     def _get_parent(self, id: str) -> Optional[Todo]:
         return Todo.from_id(id).parent_todo
 
+    @property
+    def child_model(self) -> Type[Todo]:
+        return Todo
+
+    def _top_level_filter(self) -> ColumnElement[bool]:
+        if isinstance(self.model, Workspace):
+            return Todo.parent_workspace_id == self.model.id
+
+        return Todo.parent_todo_id == self.model.id
+
     @property
     def formatter(self) -> "TodoFormatter":
         return self.api.formatter.todos
@@ -75,4 +86,7 @@ class TodosTree(ModelTree[Model, TodoRenderDict]):
         assert event.option_id
 
         event.stop()
-        self.post_message(TodoSelected(Todo.from_id(event.option_id)))
+
+        # the row is gone if a repeated removal got past it in the meantime
+        if todos := Todo.from_ids([event.option_id]):
+            self.post_message(TodoSelected(todos[0]))
@@ -1,4 +1,5 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Type
+from sqlalchemy import ColumnElement
 from textual import on
 from textual.widgets.option_list import Option
 
@@ -27,6 +28,13 @@ class WorkspacesTree(ModelTree[Workspace, WorkspaceRenderDict]):
     def _get_parent(self, id: str) -> Optional[Workspace]:
         return Workspace.from_id(id).parent_workspace
 
+    @property
+    def child_model(self) -> Type[Workspace]:
+        return Workspace
+
+    def _top_level_filter(self) -> ColumnElement[bool]:
+        return Workspace.parent_workspace_id == self.model.id
+
     @property
     def formatter(self) -> "WorkspaceFormatter":
         return self.api.formatter.workspaces
@@ -56,4 +64,7 @@ class WorkspacesTree(ModelTree[Workspace, WorkspaceRenderDict]):
         assert event.option_id
 
         event.stop()
-        self.post_message(WorkspaceSelected(Workspace.from_id(event.option_id)))
+
+        # the row is gone if a repeated removal got past it in the meantime
+        if workspaces := Workspace.from_ids([event.option_id]):
+            self.post_message(WorkspaceSelected(workspaces[0]))
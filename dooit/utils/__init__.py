@@ -1,4 +1,4 @@
-from .date_parser import parse
+from .date_parser import parse, parse_recurrence, format_recurrence
 from .css_manager import CssManager
 
-__all__ = ["parse", "CssManager"]
+__all__ = ["parse", "parse_recurrence", "format_recurrence", "CssManager"]
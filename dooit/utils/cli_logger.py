@@ -1,4 +1,7 @@
+from contextlib import contextmanager
 from enum import Enum
+from typing import Callable, Iterator
+from rich.progress import Progress
 from rich.style import Style
 from rich.text import Text
 from rich.console import Console
@@ -51,5 +54,18 @@ class CliLogger:
     def success(self, *messages: str) -> None:
         self._log(LogLevel.SUCCESS, *messages)
 
+    @contextmanager
+    def progress(
+        self, description: str, total: float
+    ) -> Iterator[Callable[[float], None]]:
+        """
+        Show a progress bar while the block runs, the yielded function sets
+        how much of `total` is done
+        """
+
+        with Progress(console=self.console, transient=True) as progress:
+            task = progress.add_task(description, total=total)
+            yield lambda completed: progress.update(task, completed=completed)
+
 
 logger = CliLogger()
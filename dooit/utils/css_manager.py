@@ -1,6 +1,8 @@
 import sys
+from contextlib import contextmanager
+from hashlib import sha1
 from pathlib import Path
-from typing import Optional, Type, Union
+from typing import Dict, Iterator, Optional, Type, Union
 from platformdirs import user_cache_dir
 from dooit.api.theme import DooitThemeBase
 from uuid import uuid4
@@ -17,46 +19,95 @@ def generate_random_id():
     return uuid4().hex
 
 
+def css_hash(css: str) -> str:
+    return sha1(css.encode()).hexdigest()
+
+
 class CssManager:
+    """
+    Builds `dooit.tcss` from the theme, the base styles and the injected css
+
+    The stylesheet is put together in memory and only written when its
+    content changes, since textual reparses all the css on every write
+    """
+
     base_css: Path = BASE_PATH / "ui" / "styles.tcss"
     themes = dict()
+    _base_css_text: Optional[str] = None
 
     def __init__(
         self,
         theme: DooitThemeBase = DooitThemeBase(),
         cache_path: Path = dooit_cache_path,
     ):
+        self.theme_generation = 0
         self.theme: DooitThemeBase = theme
         self.cache_path = cache_path
         self.stylesheets: Path = cache_path / "stylesheets"
         self.css_file: Path = cache_path / "dooit.tcss"
+        self.injected: Dict[str, str] = {}
+
+        self._css_hash: Optional[str] = None
+        self._batch_depth = 0
+        self._refresh_pending = False
 
         cache_path.mkdir(parents=True, exist_ok=True)
         if not self.css_file.exists():
             self.write("")
 
-        self.stylesheets.mkdir(
-            parents=True,
-            exist_ok=True,
-        )
+    @property
+    def theme(self) -> DooitThemeBase:
+        return self._theme
+
+    @theme.setter
+    def theme(self, theme: DooitThemeBase) -> None:
+        # lets anything derived from the theme know it has to be rebuilt
+        self._theme = theme
+        self.theme_generation += 1
 
     def read_css(self) -> str:
         return self.css_file.read_text()
 
-    def refresh_css(self):
-        css = self.theme.to_css()
+    @classmethod
+    def _read_base_css(cls) -> str:
+        if cls._base_css_text is None:
+            cls._base_css_text = cls.base_css.read_text()
 
-        # setup base variables
-        with open(self.base_css, "r") as f:
-            css = css + "\n" + f.read()
+        return cls._base_css_text
 
-        # inject extra stylesheets
-        self.stylesheets.mkdir(parents=True, exist_ok=True)
-        for sheet in self.stylesheets.iterdir():
-            with open(sheet, "r") as f:
-                css = css + "\n" + f.read()
+    def compose_css(self) -> str:
+        return "\n".join(
+            [self.theme.to_css(), self._read_base_css(), *self.injected.values()]
+        )
 
-        self.write(css)
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Write the stylesheet once at the end of the block, no matter how many
+        themes or stylesheets were changed inside it
+        """
+
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._refresh_pending:
+                self.refresh_css()
+
+    def refresh_css(self):
+        if self._batch_depth:
+            self._refresh_pending = True
+            return
+
+        self._refresh_pending = False
+        css = self.compose_css()
+        if self._css_hash is None:
+            # left over from the last run, textual has already loaded it
+            self._css_hash = css_hash(self.read_css())
+
+        if css_hash(css) != self._css_hash:
+            self.write(css)
 
     def add_theme(self, theme: Type[DooitThemeBase]):
         self.themes[theme._name] = theme()
@@ -72,34 +123,35 @@ class CssManager:
 
     def inject_css(self, css: str, _id: Optional[str] = None) -> str:
         uuid = _id or generate_random_id()
-        css_file = self.stylesheets / f"{uuid}.tcss"
-
-        with open(css_file, "w") as f:
-            f.write(css)
+        self.injected[uuid] = css
 
         self.refresh_css()
         return uuid
 
     def unject_css(self, _id: str) -> bool:
-        css_file = self.stylesheets / f"{_id}.tcss"
-
-        if not css_file.exists():
+        if self.injected.pop(_id, None) is None:
             return False
 
-        css_file.unlink()
         self.refresh_css()
         return True
 
     def is_active(self, _id: str) -> bool:
-        return (self.stylesheets / f"{_id}.tcss").exists()
+        return _id in self.injected
 
     def write(self, css: str):
         with open(self.css_file, "w") as f:
             f.write(css)
 
+        self._css_hash = css_hash(css)
+
     def cleanup(self):
-        for sheet in self.stylesheets.iterdir():
-            sheet.unlink()
+        self.injected.clear()
+
+        # injected css used to be kept in files
+        if self.stylesheets.exists():
+            for sheet in self.stylesheets.iterdir():
+                sheet.unlink()
+
+            self.stylesheets.rmdir()
 
-        self.stylesheets.rmdir()
         self.refresh_css()
@@ -1,10 +1,17 @@
 from sqlalchemy import MetaData
 from sqlalchemy.orm import Session
+from dooit.api.migrations import SEARCH_INDEX_TABLES
 
 
-def delete_all_data(session: Session):
+def delete_all_data(session: Session, commit: bool = True):
     meta = MetaData()
     meta.reflect(bind=session.get_bind())
     for table in reversed(meta.sorted_tables):
+        # maintained by triggers, writing to them directly corrupts the index
+        if table.name.startswith(SEARCH_INDEX_TABLES):
+            continue
+
         session.execute(table.delete())
-    session.commit()
+
+    if commit:
+        session.commit()
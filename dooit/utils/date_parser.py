@@ -1,10 +1,46 @@
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from typing import Optional, Tuple
 from dateutil import parser
 
+DURATION_LEGEND = {
+    "m": "minute",
+    "h": "hour",
+    "d": "day",
+    "w": "week",
+}
+
 
 def parse(value: str) -> Tuple[Optional[datetime], bool]:
     try:
         return parser.parse(value), True
     except parser.ParserError:
         return None, False
+
+
+def parse_recurrence(recurrence: str) -> timedelta:
+    """
+    Parse a recurrence such as `2d` or `1w`
+    """
+
+    if not re.match(r"^(\d+)[mhdw]$", recurrence):
+        raise ValueError("Invalid recurrence format")
+
+    unit, frequency = recurrence[-1], int(recurrence[:-1])
+    return timedelta(**{f"{DURATION_LEGEND[unit]}s": frequency})
+
+
+def format_recurrence(td: timedelta) -> str:
+    if td.days >= 7 and td.days % 7 == 0:
+        weeks = td.days // 7
+        return f"{weeks}w"
+    elif td.days > 0:
+        return f"{td.days}d"
+    elif td.seconds >= 3600:
+        hours = td.seconds // 3600
+        return f"{hours}h"
+    elif td.seconds >= 60:
+        minutes = td.seconds // 60
+        return f"{minutes}m"
+
+    return "?"
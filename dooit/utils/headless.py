@@ -0,0 +1,314 @@
+"""
+Todo operations for the command line, without starting the tui
+
+Everything here only uses `dooit.api`, so textual is never imported
+"""
+
+import json
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from sqlalchemy import func, select
+from dooit.api import Todo, Workspace, manager
+from dooit.api.exceptions import DooitError, ModelNotFoundError, NoParentError
+from dooit.api.model import IN_CHUNK_SIZE
+from dooit.api.todo import unique_tags
+from .date_parser import format_recurrence, parse, parse_recurrence
+
+Operation = Callable[..., Dict[str, Any]]
+
+
+def todo_to_dict(todo: Todo) -> Dict[str, Any]:
+    if todo.parent_todo_id is not None:
+        parent = f"Todo_{todo.parent_todo_id}"
+    else:
+        parent = f"Workspace_{todo.parent_workspace_id}"
+
+    return {
+        "id": todo.uuid,
+        "parent": parent,
+        "description": todo.description,
+        "status": todo.status,
+        "due": todo.due.isoformat() if todo.due else None,
+        "recurrence": format_recurrence(todo.recurrence) if todo.recurrence else None,
+        "urgency": todo.urgency,
+        "effort": todo.effort,
+        "tags": unique_tags(todo.description),
+    }
+
+
+def _get(cls: Any, _id: Union[str, int]) -> Any:
+    """
+    Get a model from its `uuid` (e.g. `Todo_1`) or its plain id
+    """
+
+    _id = str(_id)
+    key = _id.removeprefix(f"{cls.__name__}_")
+    res = manager.session.get(cls, int(key)) if key.isdigit() else None
+
+    if res is None or getattr(res, "is_root", False):
+        raise ModelNotFoundError(f"No {cls.__name__.lower()} with id {_id!r}")
+
+    return res
+
+
+def get_todo(_id: Union[str, int]) -> Todo:
+    return _get(Todo, _id)
+
+
+def get_workspace(workspace: str, create: bool = True) -> Workspace:
+    """
+    Get a workspace from its `uuid` or its description, workspaces which
+    don't exist yet are added at the top level unless `create` is False
+    """
+
+    if workspace.startswith("Workspace_"):
+        return _get(Workspace, workspace)
+
+    query = (
+        select(Workspace)
+        .where(Workspace.description == workspace, Workspace.is_root == False)
+        .order_by(Workspace.depth, Workspace.order_index)
+    )
+    res = manager.session.execute(query).scalars().first()
+    if res is not None:
+        return res
+
+    if not create:
+        raise ModelNotFoundError(f"No workspace named {workspace!r}")
+
+    res = Workspace(description=workspace)
+    res.save()
+    return res
+
+
+def _set_fields(
+    todo: Todo,
+    description: Optional[str] = None,
+    due: Optional[str] = None,
+    recurrence: Optional[str] = None,
+    urgency: Optional[int] = None,
+    effort: Optional[int] = None,
+) -> None:
+    """
+    Set the fields which are given, empty strings clear `due` and `recurrence`
+    """
+
+    if description is not None:
+        todo.description = description
+
+    if due is not None:
+        todo.due, ok = parse(due) if due else (None, True)
+        if not ok:
+            raise ValueError(f"Invalid due date {due!r}")
+
+    if recurrence is not None:
+        todo.recurrence = parse_recurrence(recurrence) if recurrence else None
+
+    if urgency is not None:
+        todo.urgency = int(urgency)
+
+    if effort is not None:
+        todo.effort = int(effort)
+
+
+class _Adder:
+    """
+    Creates todos without flushing them, so that a batch is inserted at once:
+    parents are only looked up once and the next `order_index` under each
+    of them is tracked here, instead of the hooks loading all the siblings
+    """
+
+    def __init__(self) -> None:
+        self._parents: Dict[Tuple[str, str], Union[Todo, Workspace]] = {}
+        self._next_index: Dict[str, int] = {}
+
+    def _get_parent(self, workspace: str, parent: str) -> Union[Todo, Workspace]:
+        key = (workspace, parent)
+        if key not in self._parents:
+            if parent:
+                self._parents[key] = get_todo(parent)
+            elif workspace:
+                self._parents[key] = get_workspace(workspace)
+            else:
+                raise NoParentError("A workspace or a parent todo is required")
+
+        return self._parents[key]
+
+    def _get_index(self, model: Union[Todo, Workspace]) -> int:
+        if model.uuid not in self._next_index:
+            if isinstance(model, Todo):
+                column = Todo.parent_todo_id
+            else:
+                column = Todo.parent_workspace_id
+
+            query = select(func.max(Todo.order_index)).where(column == model.id)
+            last = manager.session.execute(query).scalar()
+            self._next_index[model.uuid] = 0 if last is None else last + 1
+
+        index = self._next_index[model.uuid]
+        self._next_index[model.uuid] += 1
+        return index
+
+    def __call__(
+        self,
+        description: str,
+        workspace: Optional[str] = None,
+        parent: Optional[str] = None,
+        **fields: Any,
+    ) -> Todo:
+        model = self._get_parent(workspace or "", parent or "")
+
+        todo = Todo(order_index=self._get_index(model))
+        if isinstance(model, Todo):
+            todo.parent_todo = model
+        else:
+            todo.parent_workspace = model
+
+        _set_fields(todo, description, **fields)
+        manager.session.add(todo)
+        return todo
+
+
+def add(
+    description: str,
+    workspace: Optional[str] = None,
+    parent: Optional[str] = None,
+    **fields: Any,
+) -> Dict[str, Any]:
+    """
+    Add a todo to `workspace` (see `get_workspace`) or under the `parent` todo
+    """
+
+    todo = _Adder()(description, workspace, parent, **fields)
+    todo.save()
+    return todo_to_dict(todo)
+
+
+def edit(id: str, **fields: Any) -> Dict[str, Any]:
+    todo = get_todo(id)
+    _set_fields(todo, **fields)
+    todo.save()
+    return todo_to_dict(todo)
+
+
+def done(id: str) -> Dict[str, Any]:
+    todo = get_todo(id)
+    todo.pending = False
+    todo.save()
+    return todo_to_dict(todo)
+
+
+def remove(id: str) -> Dict[str, Any]:
+    todo = get_todo(id)
+    res = todo_to_dict(todo)
+    todo.drop()
+    return res
+
+
+def list_todos(
+    workspace: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Todos in the order they are displayed, all the workspaces are listed
+    unless one is given. `search` works like searching in the tui
+    """
+
+    if workspace:
+        workspaces = [get_workspace(workspace, create=False).id]
+    else:
+        root = Workspace._get_or_create_root()
+        workspaces = Workspace.tree_order(Workspace.parent_workspace_id == root.id)
+
+    matches = Todo.search(search) if search else None
+    for workspace_id in workspaces:
+        ids = Todo.tree_order(Todo.parent_workspace_id == workspace_id)
+        if matches is not None:
+            ids = [_id for _id in ids if _id in matches]
+
+        for start in range(0, len(ids), IN_CHUNK_SIZE):
+            chunk = ids[start : start + IN_CHUNK_SIZE]
+            uuids = [f"Todo_{_id}" for _id in chunk]
+            todos = {todo.id: todo for todo in Todo.from_ids(uuids)}
+
+            for _id in chunk:
+                todo = todos[_id]
+                if status is None or todo.status == status:
+                    yield todo_to_dict(todo)
+
+
+def parse_line(line: str, key: str) -> Dict[str, Any]:
+    """
+    Arguments of an operation read from stdin: either a json object
+    or plain text, which is used as the value of `key`
+    """
+
+    line = line.strip()
+    if line.startswith("{"):
+        return json.loads(line)
+
+    return {key: line}
+
+
+def run_batch(
+    operation: Operation,
+    lines: Iterable[str],
+    key: str,
+    **defaults: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Run `operation` for every (non empty) line, all in a single transaction:
+    if any of them fails, nothing is saved
+    """
+
+    results = []
+    batch_size = manager.batch_size
+
+    # todos are only added to the session, then inserted together
+    adder = _Adder() if operation is add else None
+    todos = []
+
+    # never commit halfway through
+    manager.batch_size = sys.maxsize
+    try:
+        with manager.batch():
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+
+                try:
+                    arguments = {**defaults, **parse_line(line, key)}
+                    if adder is not None:
+                        todos.append(adder(**arguments))
+                    else:
+                        results.append(operation(**arguments))
+                except (DooitError, ValueError, TypeError) as e:
+                    raise DooitError(f"line {number}: {e}") from e
+
+            if todos:
+                manager.commit()
+                results = [todo_to_dict(todo) for todo in todos]
+    finally:
+        manager.batch_size = batch_size
+
+    return results
+
+
+def dump(rows: Iterable[Dict[str, Any]], write: Callable[[str], Any]) -> None:
+    """
+    Write every row as a line of json
+    """
+
+    for row in rows:
+        write(json.dumps(row, ensure_ascii=False) + "\n")
@@ -0,0 +1,661 @@
+"""
+Streaming export and import of workspaces and todos, as json lines, csv or todo.txt
+
+Exports read the database in chunks (`yield_per`), so memory use does not
+depend on its size. Imports insert rows in batches with plain `executemany`,
+bypassing the ORM hooks, then fix up what the hooks would have maintained
+(paths and order, and the pending status on request) with a few set based
+queries
+"""
+
+import csv
+import json
+import re
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import Connection, func, insert, select, text
+from sqlalchemy.exc import IntegrityError
+from dooit.api import Todo, Workspace, manager
+from dooit.api.exceptions import DooitError, MultipleParentError, NoParentError
+from dooit.api.migrations import bulk_change_log, bulk_search_index
+from dooit.api.todo import todo_tag, unique_tags
+from dooit.transfer_formats import FORMATS
+from .date_parser import format_recurrence, parse_recurrence
+
+CHUNK_SIZE = 5000
+
+# Every record has a `type` ("workspace" or "todo") and refers to its parents
+# by their `id` in the same file (exports list parents first, but imports
+# accept them in any order). Top level workspaces have no parent
+Record = Dict[str, Any]
+
+WORKSPACE_FIELDS = ["id", "parent_workspace_id", "order_index", "description"]
+TODO_FIELDS = [
+    "id",
+    "parent_workspace_id",
+    "parent_todo_id",
+    "order_index",
+    "description",
+    "due",
+    "recurrence",
+    "urgency",
+    "effort",
+    "pending",
+]
+CSV_FIELDS = ["type", *TODO_FIELDS]
+
+# imported rows keep this depth until their path is set
+UNSET_DEPTH = -1
+
+
+# ----------------- EXPORT -----------------
+
+
+def _root_id(connection: Connection) -> Optional[int]:
+    workspace = Workspace.__table__
+    query = select(workspace.c.id).where(workspace.c.is_root == True)  # noqa: E712
+    return connection.execute(query).scalar()
+
+
+def iter_records(connection: Connection) -> Iterator[Record]:
+    """
+    All the workspaces and then all the todos, parents first
+    """
+
+    workspace, todo = Workspace.__table__, Todo.__table__
+    root_id = _root_id(connection)
+
+    query = (
+        select(*(workspace.c[name] for name in WORKSPACE_FIELDS))
+        .where(workspace.c.is_root == False)  # noqa: E712
+        .order_by(
+            workspace.c.depth,
+            workspace.c.parent_workspace_id,
+            workspace.c.order_index,
+        )
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+    for row in connection.execute(query).mappings():
+        record = {"type": "workspace", **row}
+        if record["parent_workspace_id"] == root_id:
+            record["parent_workspace_id"] = None
+
+        yield record
+
+    query = (
+        select(*(todo.c[name] for name in TODO_FIELDS))
+        .order_by(
+            todo.c.depth,
+            todo.c.parent_workspace_id,
+            todo.c.parent_todo_id,
+            todo.c.order_index,
+        )
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+    for row in connection.execute(query).mappings():
+        record = {"type": "todo", **row}
+        record["due"] = row["due"].isoformat() if row["due"] else None
+        if row["recurrence"]:
+            record["recurrence"] = format_recurrence(row["recurrence"])
+
+        yield record
+
+
+def write_jsonl(connection: Connection, file: IO[str]) -> int:
+    count = 0
+    for count, record in enumerate(iter_records(connection), 1):
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    return count
+
+
+def write_csv(connection: Connection, file: IO[str]) -> int:
+    writer = csv.DictWriter(file, CSV_FIELDS)
+    writer.writeheader()
+
+    count = 0
+    for count, record in enumerate(iter_records(connection), 1):
+        writer.writerow(record)
+
+    return count
+
+
+# ----------------- TODO.TXT -----------------
+# Todo.txt has no nesting: todos are listed under the `+project` of their
+# (top level) workspace, nested workspaces are joined with a `/`
+
+PRIORITIES = {4: "A", 3: "B", 2: "C"}
+URGENCIES = {priority: urgency for urgency, priority in PRIORITIES.items()}
+TODOTXT_DATE = r"\d{4}-\d{2}-\d{2}"
+TODOTXT_LINE = re.compile(
+    rf"^(?P<done>x )?(?:\((?P<priority>[A-Z])\) )?(?:{TODOTXT_DATE} ){{0,2}}(?P<text>.*)$"
+)
+
+
+def write_todotxt(connection: Connection, file: IO[str]) -> int:
+    workspace, todo = Workspace.__table__, Todo.__table__
+
+    projects: Dict[int, str] = {}
+    query = (
+        select(workspace.c.id, workspace.c.parent_workspace_id, workspace.c.description)
+        .where(workspace.c.is_root == False)  # noqa: E712
+        .order_by(workspace.c.depth)
+    )
+    for _id, parent_id, description in connection.execute(query):
+        name = "_".join(description.split()) or str(_id)
+        if parent_id in projects:
+            name = f"{projects[parent_id]}/{name}"
+
+        projects[_id] = name
+
+    # nested todos are listed under the workspace of their top level
+    # ancestor, which is the first id in their path
+    top = todo.alias("top")
+    top_id = func.substr(
+        todo.c.path, 2, func.instr(func.substr(todo.c.path, 2), "/") - 1
+    )
+    workspace_id = func.coalesce(todo.c.parent_workspace_id, top.c.parent_workspace_id)
+
+    query = (
+        select(
+            workspace_id,
+            todo.c.description,
+            todo.c.due,
+            todo.c.recurrence,
+            todo.c.urgency,
+            todo.c.pending,
+        )
+        .outerjoin(top, top.c.id == top_id)
+        .order_by(workspace_id, todo.c.depth, todo.c.order_index)
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+
+    count = 0
+    for count, row in enumerate(connection.execute(query), 1):
+        _id, description, due, recurrence, urgency, pending = row
+
+        words = [] if pending else ["x"]
+        if urgency in PRIORITIES:
+            words.append(f"({PRIORITIES[urgency]})")
+
+        words.append(description)
+        if _id in projects:
+            words.append(f"+{projects[_id]}")
+        if due:
+            words.append(f"due:{due.date().isoformat()}")
+        if recurrence:
+            words.append(f"rec:{format_recurrence(recurrence)}")
+
+        file.write(" ".join(words) + "\n")
+
+    return count
+
+
+def read_todotxt(file: IO[str], workspace: str = "todo.txt") -> Iterator[Record]:
+    """
+    Todos of a todo.txt file, in a workspace for each `+project`
+    (`workspace` for the ones without a project)
+    """
+
+    workspaces: Dict[str, int] = {}
+    todos = 0
+
+    def get_workspace(name: str) -> Iterator[Record]:
+        if name in workspaces:
+            return
+
+        parent, _, description = name.rpartition("/")
+        if parent:
+            yield from get_workspace(parent)
+
+        workspaces[name] = len(workspaces) + 1
+        yield {
+            "type": "workspace",
+            "id": workspaces[name],
+            "parent_workspace_id": workspaces.get(parent),
+            "description": description.replace("_", " "),
+        }
+
+    for line in file:
+        match = TODOTXT_LINE.match(line.strip())
+        if match is None or not match["text"]:
+            continue
+
+        project = None
+        todo: Record = {"type": "todo", "pending": not match["done"]}
+        todo["urgency"] = URGENCIES.get(match["priority"], 1)
+
+        words = []
+        for word in match["text"].split():
+            key, _, value = word.partition(":")
+            if word.startswith("+") and len(word) > 1 and project is None:
+                project = word[1:]
+            elif key == "due" and re.fullmatch(TODOTXT_DATE, value):
+                todo["due"] = value
+            elif key == "rec" and value:
+                todo["recurrence"] = value.lstrip("+")
+            elif key == "pri" and value in URGENCIES:
+                todo["urgency"] = URGENCIES[value]
+            else:
+                words.append(word)
+
+        name = project or workspace
+        yield from get_workspace(name)
+
+        todos += 1
+        todo["id"] = todos
+        todo["parent_workspace_id"] = workspaces[name]
+        todo["description"] = " ".join(words)
+        yield todo
+
+
+# ----------------- IMPORT -----------------
+
+
+def read_jsonl(file: IO[str]) -> Iterator[Record]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(file: IO[str]) -> Iterator[Record]:
+    for row in csv.DictReader(file):
+        yield {key: value for key, value in row.items() if value != ""}
+
+
+def _to_int(value: Any, default: Optional[int] = None) -> Optional[int]:
+    if value is None:
+        return default
+
+    if isinstance(value, bool) or not str(value).lstrip("-").isdigit():
+        raise ValueError(f"Expected a number, got {value!r}")
+
+    return int(value)
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+
+    return bool(value)
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+
+    return datetime.fromisoformat(value)
+
+
+class _Importer:
+    """
+    Inserts records a chunk at a time, without going through the ORM
+
+    Ids from the file are shifted past the ones in the database, so parents
+    can be referred to without keeping a mapping of the ids in memory
+    """
+
+    def __init__(self, connection: Connection, root_id: int) -> None:
+        self.connection = connection
+        self.root_id = root_id
+        self.workspace_offset = self._max_id(Workspace)
+        self.todo_offset = self._max_id(Todo)
+
+        self.workspaces: List[Record] = []
+        self.todos: List[Record] = []
+        self.tags: List[Record] = []
+        self.counts = {"workspaces": 0, "todos": 0}
+
+    def _max_id(self, model: Any) -> int:
+        return self.connection.execute(select(func.max(model.id))).scalar() or 0
+
+    def _parent(self, record: Record, column: str, offset: int) -> Optional[int]:
+        _id = _to_int(record.get(column))
+        return None if _id is None else _id + offset
+
+    def _id(self, record: Record, offset: int) -> int:
+        _id = _to_int(record.get("id"))
+        if _id is None or _id < 1:
+            raise ValueError("Every record needs a positive `id`")
+
+        return _id + offset
+
+    def add(self, record: Record) -> None:
+        # without an order, rows keep the order of the file
+        position = sum(self.counts.values())
+
+        kind = record.get("type")
+        if kind == "workspace":
+            parent_id = self._parent(
+                record, "parent_workspace_id", self.workspace_offset
+            )
+            self.workspaces.append(
+                {
+                    "id": self._id(record, self.workspace_offset),
+                    "parent_workspace_id": parent_id or self.root_id,
+                    "order_index": _to_int(record.get("order_index"), position),
+                    "description": str(record.get("description") or ""),
+                    "is_root": False,
+                    "path": "/",
+                    "depth": UNSET_DEPTH,
+                }
+            )
+            self.counts["workspaces"] += 1
+
+        elif kind == "todo":
+            row = {
+                "id": self._id(record, self.todo_offset),
+                "parent_workspace_id": self._parent(
+                    record, "parent_workspace_id", self.workspace_offset
+                ),
+                "parent_todo_id": self._parent(
+                    record, "parent_todo_id", self.todo_offset
+                ),
+                "order_index": _to_int(record.get("order_index"), position),
+                "description": str(record.get("description") or ""),
+                "due": _to_datetime(record.get("due")),
+                "recurrence": None,
+                "urgency": max(1, min(4, _to_int(record.get("urgency"), 1))),
+                "effort": _to_int(record.get("effort"), 0),
+                "pending": _to_bool(record.get("pending", True)),
+                "path": "/",
+                "depth": UNSET_DEPTH,
+            }
+
+            if row["parent_workspace_id"] is None and row["parent_todo_id"] is None:
+                raise NoParentError("Todo must have a parent workspace or todo")
+            if (
+                row["parent_workspace_id"] is not None
+                and row["parent_todo_id"] is not None
+            ):
+                raise MultipleParentError(
+                    "Todo cannot have both a parent workspace and todo"
+                )
+
+            recurrence = record.get("recurrence")
+            if recurrence:
+                try:
+                    row["recurrence"] = parse_recurrence(str(recurrence))
+                except ValueError as e:
+                    raise DooitError(f"Invalid recurrence {recurrence!r}") from e
+
+            self.todos.append(row)
+            self.tags.extend(
+                {"todo_id": row["id"], "tag": tag}
+                for tag in unique_tags(row["description"])
+            )
+            self.counts["todos"] += 1
+
+        else:
+            raise ValueError(f"Unknown record type {kind!r}")
+
+        if len(self.workspaces) + len(self.todos) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        chunks = [
+            (Workspace.__table__, self.workspaces),
+            (Todo.__table__, self.todos),
+            (todo_tag, self.tags),
+        ]
+
+        for table, rows in chunks:
+            if not rows:
+                continue
+
+            try:
+                self.connection.execute(insert(table), rows)
+            except IntegrityError as e:
+                raise DooitError(f"Duplicate {table.name} ids in the file") from e
+
+            rows.clear()
+
+    def _execute(self, query: str, **params: Any) -> int:
+        return self.connection.execute(text(query), params).rowcount
+
+    def _fix_paths(self, table: str, parent: str, top_level: str, offset: int) -> None:
+        """
+        Set `path` and `depth` a level at a time, starting from the top
+        """
+
+        self._execute(
+            f"""
+            UPDATE {table} SET path = '/', depth = 0
+            WHERE id > :offset AND {top_level}
+            """,
+            offset=offset,
+        )
+
+        parent_row = f"FROM {table} AS parent WHERE parent.id = {table}.{parent}"
+        while self._execute(
+            f"""
+            UPDATE {table} SET
+                path = (SELECT parent.path || parent.id || '/' {parent_row}),
+                depth = (SELECT parent.depth + 1 {parent_row})
+            WHERE id > :offset AND depth = {UNSET_DEPTH} AND {parent} IN (
+                SELECT id FROM {table} WHERE id > :offset AND depth >= 0
+            )
+            """,
+            offset=offset,
+        ):
+            pass
+
+        # parents which are not in the file, or loops
+        orphan = self.connection.execute(
+            text(
+                f"SELECT id - :offset FROM {table} "
+                f"WHERE id > :offset AND depth = {UNSET_DEPTH} LIMIT 1"
+            ),
+            {"offset": offset},
+        ).scalar()
+        if orphan is not None:
+            raise DooitError(f"The parent of {table} {orphan} is missing")
+
+    def _fix_order(self, table: str, parents: str, offset: int, start: int) -> None:
+        """
+        Number siblings from 0 in the order they were given, top level
+        workspaces go after the ones already in the database (from `start`)
+        """
+
+        # only workspaces can be under the root, so this works for both tables
+        self._execute(
+            "CREATE TEMP TABLE import_order (id INTEGER PRIMARY KEY, new INTEGER)"
+        )
+        self._execute(
+            f"""
+            INSERT INTO import_order
+            SELECT id, new FROM (
+                SELECT id, order_index, ROW_NUMBER() OVER (
+                    PARTITION BY {parents} ORDER BY order_index, id
+                ) - 1 + CASE WHEN parent_workspace_id = :root THEN :start ELSE 0 END
+                AS new
+                FROM {table} WHERE id > :offset
+            ) WHERE new != order_index
+            """,
+            root=self.root_id,
+            start=start,
+            offset=offset,
+        )
+        self._execute(
+            f"""
+            UPDATE {table}
+            SET order_index = (SELECT new FROM import_order WHERE id = {table}.id)
+            WHERE id IN (SELECT id FROM import_order)
+            """
+        )
+        self._execute("DROP TABLE import_order")
+
+    def _fix_pending(self) -> None:
+        """
+        Make the status consistent, like completing the todos in dooit: the
+        descendants of completed todos are completed, and so are the todos
+        whose children are all completed
+        """
+
+        self._execute(
+            """
+            WITH RECURSIVE completed(id) AS (
+                SELECT id FROM todo WHERE id > :offset AND pending = 0
+                UNION
+                SELECT todo.id FROM todo JOIN completed
+                ON todo.parent_todo_id = completed.id
+            )
+            UPDATE todo SET pending = 0
+            WHERE pending = 1 AND id IN (SELECT id FROM completed)
+            """,
+            offset=self.todo_offset,
+        )
+
+        # bottom up, so completing a todo can complete its parent in turn
+        depth = self.connection.execute(
+            text("SELECT max(depth) FROM todo WHERE id > :offset"),
+            {"offset": self.todo_offset},
+        ).scalar()
+
+        for level in reversed(range(depth or 0)):
+            self._execute(
+                """
+                UPDATE todo SET pending = 0
+                WHERE id > :offset AND depth = :level AND pending = 1
+                AND EXISTS (SELECT 1 FROM todo AS child
+                    WHERE child.parent_todo_id = todo.id)
+                AND NOT EXISTS (SELECT 1 FROM todo AS child
+                    WHERE child.parent_todo_id = todo.id AND child.pending = 1)
+                """,
+                offset=self.todo_offset,
+                level=level,
+            )
+
+    def finish(self, fix_pending: bool = False) -> None:
+        self.flush()
+
+        start = self.connection.execute(
+            text(
+                "SELECT coalesce(max(order_index) + 1, 0) FROM workspace "
+                "WHERE parent_workspace_id = :root AND id <= :offset"
+            ),
+            {"root": self.root_id, "offset": self.workspace_offset},
+        ).scalar()
+
+        missing = self.connection.execute(
+            text(
+                "SELECT id - :todo_offset FROM todo "
+                "WHERE id > :todo_offset AND parent_workspace_id IS NOT NULL "
+                "AND parent_workspace_id NOT IN (SELECT id FROM workspace) LIMIT 1"
+            ),
+            {"todo_offset": self.todo_offset},
+        ).scalar()
+        if missing is not None:
+            raise DooitError(f"The workspace of todo {missing} is missing")
+
+        self._fix_paths(
+            "workspace",
+            "parent_workspace_id",
+            f"parent_workspace_id = {self.root_id}",
+            self.workspace_offset,
+        )
+        self._fix_paths(
+            "todo", "parent_todo_id", "parent_todo_id IS NULL", self.todo_offset
+        )
+
+        self._fix_order(
+            "workspace", "parent_workspace_id", self.workspace_offset, start
+        )
+        self._fix_order(
+            "todo", "parent_workspace_id, parent_todo_id", self.todo_offset, 0
+        )
+        if fix_pending:
+            self._fix_pending()
+
+
+def import_records(
+    records: Iterable[Record], fix_pending: bool = False
+) -> Dict[str, int]:
+    """
+    Add the workspaces and todos of `records` in a single transaction,
+    nothing is imported if any of them is invalid
+
+    The status of every todo is kept as is, unless `fix_pending` makes it
+    consistent like completing todos in dooit would
+
+    Returns the number of workspaces and todos imported
+    """
+
+    with manager.batch():
+        root = Workspace._get_or_create_root()
+        if root.id is None:
+            root.save()
+
+        connection = manager.session.connection()
+        importer = _Importer(connection, root.id)
+
+        workspaces = bulk_search_index(
+            connection, "workspace", importer.workspace_offset
+        )
+        todos = bulk_search_index(connection, "todo", importer.todo_offset)
+
+        with workspaces, todos, bulk_change_log(connection):
+            number = 1
+            try:
+                for record in records:
+                    importer.add(record)
+                    number += 1
+            except (DooitError, KeyError, TypeError, ValueError) as e:
+                raise DooitError(f"record {number}: {e}") from e
+
+            importer.finish(fix_pending)
+
+        manager.commit()
+
+    # the rows were written behind the back of the session
+    manager.session.expire_all()
+    return importer.counts
+
+
+# ----------------- FORMATS -----------------
+
+Writer = Callable[[Connection, IO[str]], int]
+Reader = Callable[[IO[str]], Iterator[Record]]
+
+WRITERS: Dict[str, Writer] = {
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+    "todo.txt": write_todotxt,
+}
+READERS: Dict[str, Reader] = {
+    "jsonl": read_jsonl,
+    "csv": read_csv,
+    "todo.txt": read_todotxt,
+}
+
+
+def _check_format(format: str) -> None:
+    if format not in FORMATS:
+        raise DooitError(f"Unknown format {format!r}, expected one of {FORMATS}")
+
+
+def export(file: IO[str], format: str = "jsonl") -> int:
+    """
+    Write the whole database to `file`, returns the number of rows written
+    """
+
+    _check_format(format)
+    return WRITERS[format](manager.session.connection(), file)
+
+
+def import_file(
+    file: IO[str],
+    format: str = "jsonl",
+    workspace: Optional[str] = None,
+    fix_pending: bool = False,
+) -> Dict[str, int]:
+    """
+    Import a file written by `export` (or any todo.txt file, with the tasks
+    without a project in `workspace`), see `import_records`
+    """
+
+    _check_format(format)
+    if format == "todo.txt" and workspace:
+        return import_records(read_todotxt(file, workspace), fix_pending)
+
+    return import_records(READERS[format](file), fix_pending)
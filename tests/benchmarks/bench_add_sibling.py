@@ -0,0 +1,59 @@
+"""
+Latency of `add_sibling` as the database grows
+
+    python -m tests.benchmarks.bench_add_sibling [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import os
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from sqlalchemy import select, text
+from dooit.api import Todo, manager
+from tests.benchmarks.bench_siblings import populate
+
+INSERTS = 200
+
+
+def total_changes() -> int:
+    return manager.session.execute(text("SELECT total_changes()")).scalar() or 0
+
+
+def measure(size: int) -> None:
+    with TemporaryDirectory() as tempdir:
+        manager.connect(f"sqlite:///{os.path.join(tempdir, 'bench.db')}")
+        populate(size)
+
+        todo = manager.session.execute(
+            select(Todo).where(Todo.parent_workspace_id.is_not(None)).limit(1)
+        ).scalar_one()
+
+        timings = []
+        changes = total_changes()
+        for _ in range(INSERTS):
+            start = perf_counter()
+            todo.add_sibling()
+            timings.append(perf_counter() - start)
+
+        rows = (total_changes() - changes) / INSERTS
+        print(
+            f"{size:>8} todos  median {median(timings) * 1e3:7.3f} ms"
+            f"  {rows:8.1f} rows written per insert"
+        )
+
+        manager.session.close()
+        manager.engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        measure(size)
+
+
+if __name__ == "__main__":
+    main()
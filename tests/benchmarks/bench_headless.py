@@ -0,0 +1,59 @@
+"""
+Time taken by the headless commands, run like they would be from a shell
+
+    python -m tests.benchmarks.bench_headless [--todos 10000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Optional
+
+
+def dooit(database: str, *args: str, stdin: Optional[str] = None) -> float:
+    command: List[str] = [sys.executable, "-m", "dooit", "--database", database]
+
+    start = perf_counter()
+    subprocess.run(
+        [*command, *args],
+        input=stdin,
+        stdout=subprocess.DEVNULL,
+        check=True,
+        text=True,
+    )
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--todos", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tempdir:
+        database = os.path.join(tempdir, "bench.db")
+        lines = "".join(f"todo {i} @tag{i % 10}\n" for i in range(args.todos))
+
+        timings = {
+            "add (single)": dooit(database, "add", "todo", "-w", "bench"),
+            f"add --batch ({args.todos})": dooit(
+                database, "add", "--batch", "-w", "bench", stdin=lines
+            ),
+            "list": dooit(database, "list"),
+            "list --search @tag1": dooit(database, "list", "-s", "@tag1"),
+            f"done --batch ({args.todos // 10})": dooit(
+                database,
+                "done",
+                "--batch",
+                stdin="".join(f"{i}\n" for i in range(2, args.todos // 10 + 2)),
+            ),
+        }
+
+    for name, elapsed in timings.items():
+        print(f"{name:<24} {elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Migration of a large v2 `todo.yaml` with `Migrator2to3`
+
+    python -m tests.benchmarks.bench_migrate [--todos 100000]
+
+The dry run only reads and checks the file (the data goes to an in-memory
+database), the migration also writes it to a new database file
+"""
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import IO
+from dooit.backport.migrate_from_v2 import Migrator2to3
+
+WORKSPACES = 100
+
+
+def write_todo(f: IO[str], prefix: str, i: int) -> None:
+    """
+    The data of todo `i`, the first line starting with `prefix`
+    """
+
+    indent = " " * len(prefix)
+    f.write(f"{prefix}description: todo {i} @tag{i % 10}\n")
+    f.write(f"{indent}status: {'COMPLETED' if i % 3 == 0 else 'PENDING'}\n")
+    f.write(f"{indent}urgency: {i % 4 + 1}\n")
+    f.write(f"{indent}due: '{'none' if i % 2 else 1704191400 + i}'\n")
+    f.write(f"{indent}effort: '{i % 5}'\n")
+    f.write(f"{indent}recurrence: {'2d' if i % 7 == 0 else 'none'}\n")
+
+
+def generate(path: Path, todos: int) -> None:
+    """
+    Todos spread over a few workspaces, every fifth one has two children
+    """
+
+    i = 0
+    with path.open("w") as f:
+        for w in range(WORKSPACES):
+            f.write(f"- description: w{w}\n  todos:\n")
+
+            while i < todos * (w + 1) // WORKSPACES:
+                i += 1
+                write_todo(f, "  - - ", i)
+
+                if i % 5 == 0 and i + 2 <= todos:
+                    write_todo(f, "    - - - ", i + 1)
+                    write_todo(f, "      - - ", i + 2)
+                    i += 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--todos", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tempdir:
+        old = Path(tempdir) / "todo.yaml"
+        new = Path(tempdir) / "dooit.db"
+        generate(old, args.todos)
+
+        timings = {}
+        for name, dry_run in (("dry run", True), ("migrate", False)):
+            start = perf_counter()
+            if not Migrator2to3(old, new).migrate(dry_run):
+                raise SystemExit(f"{name} failed")
+
+            timings[f"{name} ({args.todos})"] = perf_counter() - start
+
+    for name, elapsed in timings.items():
+        print(f"{name:<24} {elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
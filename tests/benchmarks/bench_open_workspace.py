@@ -0,0 +1,71 @@
+"""
+Time and SQL statements spent opening a workspace with many todos
+
+    python -m tests.benchmarks.bench_open_workspace [--sizes 100 1000 10000]
+"""
+
+import argparse
+import asyncio
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from sqlalchemy import event, insert
+from dooit.api import Todo, manager
+from dooit.ui.tui import Dooit
+
+
+async def measure(size: int) -> None:
+    with TemporaryDirectory() as tempdir:
+        app = Dooit(connection_string=f"sqlite:///{os.path.join(tempdir, 'bench.db')}")
+
+        async with app.run_test() as pilot:
+            workspace = app.workspace_tree.model.add_workspace()
+            rows = [
+                {
+                    "order_index": i,
+                    "description": f"todo {i}",
+                    "parent_workspace_id": workspace.id,
+                }
+                for i in range(size)
+            ]
+            manager.session.execute(insert(Todo), rows)
+            manager.commit()
+            manager.session.expire_all()
+
+            app.workspace_tree.force_refresh()
+            await pilot.pause()
+
+            statements = []
+
+            def count(*_):
+                statements.append(None)
+
+            event.listen(manager.engine, "before_cursor_execute", count)
+            start = perf_counter()
+            app.workspace_tree.highlighted = 0
+            await pilot.pause()
+            app.api.switch_focus()
+            await pilot.pause()
+            elapsed = perf_counter() - start
+            event.remove(manager.engine, "before_cursor_execute", count)
+
+            print(
+                f"{size:>8} todos  open {elapsed * 1e3:8.1f} ms"
+                f"  {len(statements):6} statements"
+            )
+
+        manager.session.close()
+        manager.engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        asyncio.run(measure(size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Search latency on a large database, with and without the full text index
+
+    python -m tests.benchmarks.bench_search [--todos 100000]
+"""
+
+import argparse
+import os
+from random import randrange
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from dooit.api import Todo, manager
+from tests.benchmarks.bench_siblings import populate
+
+QUERIES = 50
+
+
+def measure(label: str, todos: int) -> None:
+    filters = {
+        "selective": lambda: f"todo {randrange(todos // 2)}",
+        "broad": lambda: f"chi {randrange(10)}",
+        "short term": lambda: f"{randrange(10)}",
+    }
+
+    print(f"\n{label}")
+    for name, make_filter in filters.items():
+        timings = []
+        for _ in range(QUERIES):
+            filter = make_filter()
+            start = perf_counter()
+            Todo.search(filter)
+            timings.append(perf_counter() - start)
+
+        print(f"  {name:<12} median {median(timings) * 1e3:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--todos", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tempdir:
+        manager.connect(f"sqlite:///{os.path.join(tempdir, 'bench.db')}")
+        populate(args.todos)
+
+        measure("with search index", args.todos)
+        manager.has_search_index = False
+        measure("without search index", args.todos)
+
+        manager.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
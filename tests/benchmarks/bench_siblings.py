@@ -0,0 +1,117 @@
+"""
+Sibling query latency on a large database, with and without the indexes
+
+    python -m tests.benchmarks.bench_siblings [--todos 100000]
+"""
+
+import argparse
+import os
+from random import randrange
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from sqlalchemy import func, insert, select, text, update
+from dooit.api import Todo, Workspace, manager
+
+WORKSPACES = 100
+QUERIES = 500
+
+
+def populate(todos: int) -> None:
+    root = Workspace(is_root=True)
+    root.save()
+
+    workspaces = [
+        {"order_index": i, "description": f"w{i}", "parent_workspace_id": root.id}
+        for i in range(WORKSPACES)
+    ]
+    manager.session.execute(insert(Workspace), workspaces)
+    ids = list(manager.session.execute(select(Workspace.id)).scalars())[1:]
+
+    # half of the todos are top level, the rest are nested one level deep
+    top_level = todos // 2
+    rows = [
+        {
+            "order_index": i // len(ids),
+            "description": f"todo {i}",
+            "parent_workspace_id": ids[i % len(ids)],
+        }
+        for i in range(top_level)
+    ]
+    manager.session.execute(insert(Todo), rows)
+
+    rows = [
+        {
+            "order_index": i // top_level,
+            "description": f"child {i}",
+            "parent_todo_id": 1 + i % top_level,
+            "path": f"/{1 + i % top_level}/",
+            "depth": 1,
+        }
+        for i in range(todos - top_level)
+    ]
+    manager.session.execute(insert(Todo), rows)
+    manager.commit()
+
+
+def measure(label: str, todos: int) -> None:
+    workspace_ids = list(manager.session.execute(select(Workspace.id)).scalars())
+    max_todo = manager.session.execute(select(func.max(Todo.id))).scalar() or 1
+    queries = {
+        "workspace todos": lambda: select(Todo)
+        .where(Todo.parent_workspace_id == workspace_ids[randrange(1, WORKSPACES)])
+        .order_by(Todo.order_index),
+        "todo children": lambda: select(Todo)
+        .where(Todo.parent_todo_id == randrange(1, todos // 2))
+        .order_by(Todo.order_index),
+        "subtree": lambda: select(Todo).where(
+            Todo._in_subtree(f"/{randrange(1, max_todo)}/")
+        ),
+        # the bulk shift done by `add_sibling`
+        "shift siblings": lambda: update(Todo)
+        .where(Todo.parent_todo_id == randrange(1, todos // 2))
+        .where(Todo.order_index > 0)
+        .values(order_index=Todo.order_index + 1),
+    }
+
+    print(f"\n{label}")
+    for name, make_query in queries.items():
+        timings = []
+        for _ in range(QUERIES):
+            query = make_query()
+            start = perf_counter()
+            result = manager.session.execute(query)
+            if query.is_select:
+                result.all()
+            timings.append(perf_counter() - start)
+
+        print(f"  {name:<16} median {median(timings) * 1e3:8.3f} ms")
+
+    manager.session.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--todos", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tempdir:
+        manager.connect(f"sqlite:///{os.path.join(tempdir, 'bench.db')}")
+        populate(args.todos)
+        measure("with indexes", args.todos)
+
+        indexes = manager.session.execute(
+            text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"
+            )
+        ).scalars()
+        for name in list(indexes):
+            manager.session.execute(text(f"DROP INDEX {name}"))
+        manager.commit()
+
+        measure("without indexes", args.todos)
+        manager.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
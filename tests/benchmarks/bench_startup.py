@@ -0,0 +1,67 @@
+"""
+Cold start time up to the first frame, each run in a fresh interpreter
+
+    python -m tests.benchmarks.bench_startup [--runs 5] [--target 1500]
+
+Exits with an error when the median total is above `--target` milliseconds
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from statistics import median
+from tempfile import TemporaryDirectory
+from typing import Dict, List
+
+SCRIPT = """
+import sys
+from dooit.__main__ import run_dooit
+
+run_dooit(profile=True, connection_string=sys.argv[1])
+"""
+
+
+def run(connection_string: str) -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT, connection_string],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+
+    timings = {}
+    for line in output.splitlines():
+        name, elapsed, _ = line.rsplit(maxsplit=2)
+        timings[name] = float(elapsed)
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=1500)
+    args = parser.parse_args()
+
+    phases: Dict[str, List[float]] = defaultdict(list)
+    with TemporaryDirectory() as tempdir:
+        connection_string = f"sqlite:///{os.path.join(tempdir, 'bench.db')}"
+
+        # the first run creates the database, like the first start of dooit
+        run(connection_string)
+        for _ in range(args.runs):
+            for name, elapsed in run(connection_string).items():
+                phases[name].append(elapsed)
+
+    for name, timings in phases.items():
+        print(f"{name:<14} {median(timings):8.1f} ms")
+
+    total = median(phases["total"])
+    if total > args.target:
+        sys.exit(f"first paint took {total:.1f} ms, target is {args.target:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Round trip of a large database through `dooit import` and `dooit export`
+
+    python -m tests.benchmarks.bench_transfer [--todos 1000000] [--format jsonl]
+
+Every step runs in a fresh interpreter, the peak memory shows whether it
+stays flat as the number of todos grows
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Tuple
+
+WORKSPACES = 100
+
+
+def generate(path: str, todos: int) -> None:
+    """
+    Todos spread over a few workspaces, every fifth one nested under the previous
+    """
+
+    with open(path, "w") as f:
+        for i in range(1, WORKSPACES + 1):
+            f.write(json.dumps({"type": "workspace", "id": i, "description": f"w{i}"}))
+            f.write("\n")
+
+        for i in range(1, todos + 1):
+            record = {
+                "type": "todo",
+                "id": i,
+                "description": f"todo {i} @tag{i % 10}",
+                "pending": i % 3 != 0,
+            }
+            if i % 5 == 0:
+                record["parent_todo_id"] = i - 1
+            else:
+                record["parent_workspace_id"] = i % WORKSPACES + 1
+
+            f.write(json.dumps(record) + "\n")
+
+
+def dooit(database: str, *args: str) -> Tuple[float, float]:
+    """
+    Time taken and peak memory (in MB) of a dooit command
+    """
+
+    command: List[str] = [sys.executable, "-m", "dooit", "--database", database]
+
+    start = perf_counter()
+    process = subprocess.Popen([*command, *args], stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = perf_counter() - start
+
+    if status:
+        sys.exit(f"{' '.join(args)} failed")
+
+    # kilobytes on linux, bytes on macos
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return elapsed, usage.ru_maxrss / scale
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--todos", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tempdir:
+        source = os.path.join(tempdir, "source.jsonl")
+        exported = os.path.join(tempdir, f"export.{args.format}")
+        first = os.path.join(tempdir, "first.db")
+        second = os.path.join(tempdir, "second.db")
+
+        generate(source, args.todos)
+
+        timings = {
+            f"import ({args.todos})": dooit(first, "import", source),
+            "export": dooit(first, "export", exported, "-f", args.format),
+            "import exported": dooit(second, "import", exported, "-f", args.format),
+        }
+
+    for name, (elapsed, memory) in timings.items():
+        print(f"{name:<24} {elapsed * 1000:10.1f} ms {memory:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -52,3 +52,47 @@ def test_css_injections():
 
     incorrect_id = "incorrect_id"
     assert not manager.unject_css(incorrect_id)
+
+
+def test_css_writes():
+    cache_path = Path(TemporaryDirectory().name)
+    manager = CssManager(cache_path=cache_path)
+    writes = []
+
+    def write(css: str):
+        writes.append(css)
+        CssManager.write(manager, css)
+
+    manager.write = write
+
+    manager.refresh_css()
+    manager.refresh_css()
+    assert len(writes) == 1
+
+    with manager.batch():
+        ids = [manager.inject_css(f"#css_{i} {{ color: red; }}") for i in range(10)]
+
+        with manager.batch():
+            manager.set_theme(TestTheme)
+
+        assert len(writes) == 1
+
+    assert len(writes) == 2
+    assert all(f"#css_{i}" in manager.read_css() for i in range(10))
+
+    # the same css is not written again
+    manager.unject_css(ids[0])
+    manager.inject_css("#css_0 { color: red; }", ids[0])
+    assert len(writes) == 4
+    manager.set_theme(TestTheme)
+    assert len(writes) == 4
+
+    # and neither is the stylesheet left by the last run
+    injected = dict(manager.injected)
+    manager = CssManager(cache_path=cache_path, theme=TestTheme())
+    manager.write = write
+    with manager.batch():
+        for _id, css in injected.items():
+            manager.inject_css(css, _id)
+
+    assert len(writes) == 4
@@ -0,0 +1,142 @@
+import json
+import os
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from click.testing import CliRunner
+from sqlalchemy import text
+from dooit.__main__ import main
+from dooit.api import Todo, Workspace, manager
+from dooit.api.exceptions import DooitError, ModelNotFoundError
+from dooit.utils import headless
+from tests.test_core.core_base import CoreTestBase, TEMP_CONN
+
+
+class TestHeadless(CoreTestBase):
+    def test_add(self):
+        first = headless.add("first @work", workspace="inbox", urgency=3)
+        second = headless.add("second", workspace="inbox", recurrence="2d")
+        child = headless.add("child", parent=first["id"])
+
+        self.assertEqual(first["parent"], second["parent"])
+        self.assertEqual(first["tags"], ["@work"])
+        self.assertEqual(first["urgency"], 3)
+        self.assertEqual(second["recurrence"], "2d")
+        self.assertEqual(child["parent"], first["id"])
+
+        workspaces = Workspace.from_ids([first["parent"]])
+        self.assertEqual([w.description for w in workspaces], ["inbox"])
+        self.assertEqual(
+            [t.description for t in workspaces[0].todos], ["first @work", "second"]
+        )
+        self.assertEqual(Todo.from_ids([second["id"]])[0].recurrence, timedelta(2))
+
+        with self.assertRaises(ModelNotFoundError):
+            headless.add("orphan", parent="Todo_100")
+
+        with self.assertRaises(ValueError):
+            headless.add("bad", workspace="inbox", due="?????")
+
+    def test_edit_done_remove(self):
+        todo = headless.add("todo", workspace="inbox", due="2020-01-01")
+        self.assertEqual(todo["status"], "overdue")
+
+        todo = headless.edit(todo["id"], description="edited", due="")
+        self.assertEqual((todo["description"], todo["due"]), ("edited", None))
+
+        self.assertEqual(headless.done(todo["id"])["status"], "completed")
+
+        headless.add("child", parent=todo["id"])
+        self.assertEqual(headless.remove(todo["id"])["description"], "edited")
+        self.assertEqual(list(headless.list_todos()), [])
+
+    def test_list(self):
+        parent = headless.add("parent @a", workspace="one")
+        child = headless.add("child @b", parent=parent["id"])
+        headless.add("other child", parent=parent["id"])
+        headless.add("other @a", workspace="two")
+        headless.done(child["id"])
+
+        def descriptions(**kwargs):
+            return [row["description"] for row in headless.list_todos(**kwargs)]
+
+        self.assertEqual(
+            descriptions(),
+            ["parent @a", "child @b", "other child", "other @a"],
+        )
+        self.assertEqual(descriptions(workspace="two"), ["other @a"])
+        self.assertEqual(descriptions(search="@a"), ["parent @a", "other @a"])
+        self.assertEqual(
+            descriptions(status="pending"), ["parent @a", "other child", "other @a"]
+        )
+
+        with self.assertRaises(ModelNotFoundError):
+            list(headless.list_todos(workspace="three"))
+
+    def test_batch(self):
+        lines = ["first\n", "\n", '{"description": "second", "urgency": 2}\n']
+        rows = headless.run_batch(headless.add, lines, "description", workspace="a")
+
+        self.assertEqual([row["description"] for row in rows], ["first", "second"])
+        self.assertEqual([row["urgency"] for row in rows], [1, 2])
+
+        todos = Workspace.from_ids([rows[0]["parent"]])[0].todos
+        self.assertEqual([t.order_index for t in todos], [0, 1])
+
+        # a failing line rolls back the whole batch
+        lines = [f"{rows[0]['id']}\n", "Todo_100\n"]
+        with self.assertRaisesRegex(DooitError, "line 2"):
+            headless.run_batch(headless.done, lines, "id")
+
+        self.assertTrue(Todo.from_ids([rows[0]["id"]])[0].pending)
+
+    def test_large_batch(self):
+        with TemporaryDirectory() as tempdir:
+            manager.connect(f"sqlite:///{os.path.join(tempdir, 'dooit.db')}")
+
+            # the transaction outgrows the page cache and is spilled to the
+            # database file before it commits
+            manager.session.execute(text("PRAGMA cache_size = 1"))
+            lines = [f"todo {i} @tag{i % 10}\n" for i in range(2000)]
+            rows = headless.run_batch(headless.add, lines, "description", workspace="a")
+
+            self.assertEqual(len(rows), 2000)
+            self.assertEqual(len(list(headless.list_todos(search="@tag3"))), 200)
+            self.assertIsNone(manager.poll_changes())
+
+            manager.session.close()
+            manager.engine.dispose()
+
+        manager.connect(TEMP_CONN)
+
+    def test_cli(self):
+        runner = CliRunner()
+
+        with TemporaryDirectory() as tempdir:
+            database = os.path.join(tempdir, "dooit.db")
+
+            def dooit(*args, input=None):
+                result = runner.invoke(main, ["--database", database, *args], input)
+                if result.exit_code:
+                    return result.exit_code, result.output
+
+                rows = [json.loads(line) for line in result.output.splitlines()]
+                return result.exit_code, rows
+
+            code, rows = dooit("add", "todo", "-w", "inbox", "--effort", "2")
+            self.assertEqual(code, 0)
+            self.assertEqual(rows[0]["effort"], 2)
+
+            code, rows = dooit("add", "--batch", "-w", "inbox", input="a\nb\n")
+            self.assertEqual([row["description"] for row in rows], ["a", "b"])
+
+            code, rows = dooit("done", rows[0]["id"])
+            self.assertEqual(rows[0]["status"], "completed")
+
+            code, rows = dooit("list", "--status", "pending")
+            self.assertEqual([row["description"] for row in rows], ["todo", "b"])
+
+            code, output = dooit("rm", "Todo_100")
+            self.assertEqual(code, 1)
+            self.assertIn("No todo with id 'Todo_100'", output)
+
+            manager.session.close()
@@ -17,3 +17,54 @@ class TestTodo(CoreTestBase):
             child_todo.toggle_complete()
 
         self.assertFalse(parent_todo.is_pending)
+
+    def test_todo_status_update_nested(self):
+        root = self.default_workspace.add_todo()
+        todo, leaves = root, []
+        for _ in range(4):
+            leaves.append(todo.add_todo())
+            todo = todo.add_todo()
+
+        root.toggle_complete()
+        self.assertTrue(all(t.is_completed for t in leaves + [todo]))
+
+        todo.toggle_complete()
+        self.assertTrue(todo.is_pending)
+        self.assertTrue(root.is_pending)
+        self.assertTrue(all(t.is_completed for t in leaves))
+
+    def test_todo_status_partial_completion(self):
+        root = self.default_workspace.add_todo()
+        parent = root.add_todo()
+        other = root.add_todo()
+        child = parent.add_todo()
+
+        child.toggle_complete()
+        self.assertTrue(parent.is_completed)
+        self.assertTrue(root.is_pending)
+
+        other.toggle_complete()
+        self.assertTrue(root.is_completed)
+
+    def test_todo_status_skipped_for_other_edits(self):
+        from sqlalchemy import event
+
+        parent = self.default_workspace.add_todo()
+        child = parent.add_todo()
+        child.add_todo()
+
+        statements = []
+
+        def track(_conn, _cursor, statement, *_):
+            statements.append(statement)
+
+        engine = self.session.get_bind()
+        event.listen(engine, "before_cursor_execute", track)
+        try:
+            child.description = "no status change"
+            child.save()
+        finally:
+            event.remove(engine, "before_cursor_execute", track)
+
+        self.assertTrue(statements)
+        self.assertFalse([i for i in statements if "RECURSIVE" in i])
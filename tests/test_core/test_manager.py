@@ -0,0 +1,144 @@
+from sqlalchemy import event
+from dooit.api import Todo, Workspace, manager
+from tests.test_core.core_base import CoreTestBase
+
+
+class TestManager(CoreTestBase):
+    def setUp(self):
+        super().setUp()
+        self.commits = 0
+
+        @event.listens_for(self.session, "after_commit")
+        def count_commits(_):
+            self.commits += 1
+
+    def test_commit_without_batch(self):
+        for _ in range(3):
+            Workspace().save()
+
+        self.assertEqual(self.commits, 3)
+
+    def test_batch_single_commit(self):
+        with manager.batch():
+            workspaces = [Workspace() for _ in range(5)]
+            for w in workspaces:
+                w.save()
+
+            # changes are flushed, so ids and queries are already usable
+            self.assertTrue(all(w.id for w in workspaces))
+            self.assertEqual(len(Workspace.all()), 5)
+            self.assertEqual(self.commits, 0)
+
+        self.assertEqual(self.commits, 1)
+
+    def test_nested_batch(self):
+        with manager.batch():
+            Workspace().save()
+
+            with manager.batch():
+                Workspace().save()
+
+            self.assertEqual(self.commits, 0)
+
+        self.assertEqual(self.commits, 1)
+
+    def test_batch_size_limit(self):
+        manager.batch_size = 2
+        try:
+            with manager.batch():
+                for _ in range(5):
+                    Workspace().save()
+
+                self.assertEqual(self.commits, 2)
+        finally:
+            manager.batch_size = type(manager).batch_size
+
+        self.assertEqual(self.commits, 3)
+
+    def test_batch_rollback(self):
+        Workspace().save()
+
+        with self.assertRaises(ValueError):
+            with manager.batch():
+                Workspace().save()
+                raise ValueError
+
+        self.assertEqual(len(Workspace.all()), 1)
+
+    def test_batch_rollback_after_commit(self):
+        manager.batch_size = 2
+        try:
+            with self.assertRaises(ValueError):
+                with manager.batch():
+                    for _ in range(3):
+                        Workspace().save()
+                    raise ValueError
+        finally:
+            manager.batch_size = type(manager).batch_size
+
+        # the first two were committed automatically
+        self.assertEqual(len(Workspace.all()), 2)
+
+    def test_add_sibling_single_commit(self):
+        w = Workspace()
+        w.save()
+        self.commits = 0
+
+        w.add_sibling()
+        self.assertEqual(self.commits, 1)
+
+    def test_shift_in_batch(self):
+        workspace = Workspace()
+        workspace.save()
+        todos = [workspace.add_todo() for _ in range(4)]
+        self.commits = 0
+
+        with manager.batch():
+            for _ in range(3):
+                todos[0].shift_down()
+
+            self.assertTrue(todos[0].is_last_sibling())
+            self.assertFalse(todos[0].shift_down())
+
+        self.assertEqual(self.commits, 1)
+        self.assertEqual(workspace.todos, todos[1:] + todos[:1])
+
+    def test_from_id_without_query(self):
+        workspace = Workspace()
+        workspace.save()
+        todo = workspace.add_todo()
+
+        # loaded again after the commit expired them
+        todo.description, workspace.description
+
+        statements = []
+
+        def count(*_):
+            statements.append(None)
+
+        event.listen(manager.engine, "before_cursor_execute", count)
+        try:
+            self.assertIs(Todo.from_id(todo.uuid), todo)
+            self.assertIs(Workspace.from_id(workspace.uuid), workspace)
+            self.assertEqual(Todo.from_ids([todo.uuid]), [todo])
+        finally:
+            event.remove(manager.engine, "before_cursor_execute", count)
+
+        self.assertEqual(statements, [])
+
+        uuid = todo.uuid
+        todo.drop()
+        self.assertEqual(Todo.from_ids([uuid]), [])
+
+    def test_from_ids_rollback(self):
+        workspace = Workspace()
+        workspace.save()
+
+        with self.assertRaises(ValueError):
+            with manager.batch():
+                todo = workspace.add_todo()
+                uuid = todo.uuid
+                self.assertEqual(Todo.from_ids([uuid]), [todo])
+                raise ValueError
+
+        self.assertEqual(Todo.from_ids([uuid]), [])
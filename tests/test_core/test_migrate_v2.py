@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from dooit.api import Todo, Workspace, manager
+from dooit.backport.migrate_from_v2 import Migrator2to3
+from tests.test_core.core_base import CoreTestBase, TEMP_CONN
+
+OLD_DATA = """
+- description: work
+  workspaces:
+  - description: nested
+    todos:
+    - - description: nested todo
+        status: PENDING
+  todos:
+  - - description: parent
+      status: PENDING
+      urgency: 3
+      due: '1704191400.0'
+      effort: '2'
+      recurrence: 2d
+    - - - description: done child
+          status: COMPLETED
+          due: none
+          recurrence: none
+      - - description: pending child
+          status: PENDING
+- description: home
+"""
+
+
+class TestMigrateV2(CoreTestBase):
+    def setUp(self):
+        super().setUp()
+        self.tempdir = TemporaryDirectory()
+        self.old = Path(self.tempdir.name) / "todo.yaml"
+        self.new = Path(self.tempdir.name) / "dooit.db"
+        self.old.write_text(OLD_DATA)
+
+    def tearDown(self):
+        manager.session.close()
+        manager.connect(TEMP_CONN)
+        self.tempdir.cleanup()
+        super().tearDown()
+
+    def test_dry_run(self):
+        migrator = Migrator2to3(self.old, self.new)
+
+        self.assertTrue(migrator.migrate(dry_run=True))
+        self.assertFalse(self.new.exists())
+        self.assertTrue(self.old.exists())
+
+    def test_migrate(self):
+        self.assertTrue(Migrator2to3(self.old, self.new).migrate())
+        self.assertFalse(self.old.exists())
+        self.assertTrue(self.old.with_suffix(".bak").exists())
+
+        work, home = [w for w in Workspace.all() if w.nest_level == 0]
+        self.assertEqual((work.description, home.description), ("work", "home"))
+        self.assertEqual([w.description for w in work.workspaces], ["nested"])
+        self.assertEqual(work.workspaces[0].todos[0].description, "nested todo")
+
+        parent = work.todos[0]
+        self.assertEqual(parent.urgency, 3)
+        self.assertEqual(parent.effort, 2)
+        self.assertEqual(parent.due, datetime.fromtimestamp(1704191400))
+        self.assertEqual(parent.recurrence, timedelta(days=2))
+        self.assertEqual(
+            [(t.description, t.pending, t.due) for t in parent.todos],
+            [("done child", False, None), ("pending child", True, None)],
+        )
+
+    def test_status_kept(self):
+        self.old.write_text(
+            "- description: work\n"
+            "  todos:\n"
+            "  - - description: done parent\n"
+            "      status: COMPLETED\n"
+            "    - - - description: recurring child\n"
+            "          status: PENDING\n"
+            "          recurrence: 1d\n"
+        )
+        self.assertTrue(Migrator2to3(self.old, self.new).migrate())
+
+        parent = manager.session.query(Todo).filter_by(description="done parent").one()
+        self.assertFalse(parent.pending)
+        self.assertEqual([t.pending for t in parent.todos], [True])
+        self.assertEqual(parent.todos[0].recurrence, timedelta(days=1))
+
+    def test_invalid(self):
+        self.old.write_text(OLD_DATA + "- description: bad\n  todos: [[oops]]\n")
+
+        self.assertFalse(Migrator2to3(self.old, self.new).migrate())
+        self.assertTrue(self.old.exists())
+        self.assertEqual(manager.session.query(Todo).count(), 0)
+        self.assertEqual(manager.session.query(Workspace).count(), 0)
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+from tempfile import TemporaryDirectory
+from sqlalchemy import inspect
+from dooit.api import Todo, Workspace, manager
+from dooit.api.migrations import SCHEMA_VERSION, get_schema_version
+from tests.test_core.core_base import CoreTestBase, TEMP_CONN
+
+OLD_SCHEMA = """
+CREATE TABLE workspace (
+    id INTEGER PRIMARY KEY,
+    order_index INTEGER NOT NULL,
+    description VARCHAR NOT NULL,
+    is_root BOOLEAN NOT NULL,
+    parent_workspace_id INTEGER REFERENCES workspace (id)
+);
+CREATE TABLE todo (
+    id INTEGER PRIMARY KEY,
+    order_index INTEGER NOT NULL,
+    description VARCHAR NOT NULL,
+    due DATETIME,
+    effort INTEGER NOT NULL,
+    recurrence DATETIME,
+    urgency INTEGER NOT NULL,
+    pending BOOLEAN NOT NULL,
+    parent_workspace_id INTEGER REFERENCES workspace (id),
+    parent_todo_id INTEGER REFERENCES todo (id)
+);
+INSERT INTO workspace VALUES (1, 0, '', 1, NULL), (2, 0, 'a', 0, 1), (3, 0, 'b', 0, 2);
+INSERT INTO todo VALUES
+    (1, 0, 'parent @tag', NULL, 0, NULL, 1, 1, 3, NULL),
+    (2, 0, 'child', NULL, 0, NULL, 1, 1, NULL, 1);
+"""
+
+
+class TestMigrations(CoreTestBase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.database = os.path.join(self.tempdir.name, "dooit.db")
+
+        with sqlite3.connect(self.database) as connection:
+            connection.executescript(OLD_SCHEMA)
+
+        manager.connect(f"sqlite:///{self.database}")
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        manager.engine.dispose()
+        self.tempdir.cleanup()
+        manager.connect(TEMP_CONN)
+
+    def test_upgrade_old_database(self):
+        with manager.engine.connect() as connection:
+            self.assertEqual(get_schema_version(connection), SCHEMA_VERSION)
+            indexes = {i["name"] for i in inspect(connection).get_indexes("todo")}
+
+        self.assertIn("ix_todo_parent_todo_order", indexes)
+        self.assertIn("ix_todo_path", indexes)
+
+        workspace = Workspace.from_id("3")
+        todo = Todo.from_id("2")
+
+        self.assertEqual(workspace.nest_level, 1)
+        self.assertEqual(todo.nest_level, 1)
+        self.assertEqual(todo.parent_todo.descendants(), [todo])
+
+        # existing rows are added to the search index
+        self.assertTrue(manager.has_search_index)
+        self.assertEqual(Todo.search("chil"), {2})
+        self.assertEqual(Todo.with_tags("@tag"), [todo.parent_todo])
+
+    def test_upgrade_is_idempotent(self):
+        manager.session.close()
+        manager.connect(f"sqlite:///{self.database}")
+
+        with manager.engine.connect() as connection:
+            self.assertEqual(get_schema_version(connection), SCHEMA_VERSION)
+
+        self.assertEqual(len(Workspace.all()), 2)
+
+    def test_search_index_created_later(self):
+        manager.session.close()
+        manager.engine.dispose()
+
+        # as left by a build of sqlite without FTS5
+        with sqlite3.connect(self.database) as connection:
+            for table in ("workspace", "todo"):
+                for name in ("insert", "delete", "update"):
+                    connection.execute(f"DROP TRIGGER {table}_fts_{name}")
+                connection.execute(f"DROP TABLE {table}_fts")
+
+        manager.connect(f"sqlite:///{self.database}")
+
+        self.assertTrue(manager.has_search_index)
+        self.assertEqual(Todo.search("chil"), {2})
@@ -1,3 +1,4 @@
+from sqlalchemy import select
 from dooit.api.workspace import Workspace
 from tests.test_core.core_base import CoreTestBase
 
@@ -67,3 +68,101 @@ class TestModel(CoreTestBase):
         self.assertEqual([i.description for i in w.siblings], names[::-1])
         w.reverse_siblings()
         self.assertEqual([i.description for i in w.siblings], names)
+
+    def test_materialized_path(self):
+        w = Workspace()
+        child = w.add_workspace()
+        grandchild = child.add_workspace()
+
+        self.assertEqual(w.nest_level, 0)
+        self.assertEqual(grandchild.nest_level, 2)
+        self.assertEqual(grandchild.path, f"/{w.id}/{child.id}/")
+        self.assertTrue(grandchild.is_descendant_of(w))
+        self.assertFalse(w.is_descendant_of(grandchild))
+        self.assertEqual(w.descendants(), [child, grandchild])
+
+    def test_materialized_path_reparent(self):
+        a, b = Workspace(), Workspace()
+        a.save()
+        b.save()
+        child = a.add_workspace()
+        grandchild = child.add_workspace()
+
+        child.parent_workspace = b
+        child.save()
+
+        self.assertEqual(grandchild.path, f"/{b.id}/{child.id}/")
+        self.assertEqual(a.descendants(), [])
+        self.assertEqual(b.descendants(), [child, grandchild])
+
+        child.parent_workspace = grandchild.parent_workspace = None
+        child.save()
+        grandchild.save()
+        self.assertEqual(child.nest_level, 0)
+        self.assertEqual(grandchild.nest_level, 0)
+
+    def test_materialized_path_by_id(self):
+        a, b = Workspace(), Workspace()
+        a.save()
+        b.save()
+        child = a.add_workspace()
+        grandchild = child.add_workspace()
+        self.session.expire_all()
+
+        # the parent is not loaded for edits which keep it
+        grandchild.description = "edited"
+        self.session.flush()
+        self.assertNotIn("parent_workspace", grandchild.__dict__)
+
+        child.parent_workspace_id = b.id
+        child.save()
+        self.assertEqual(child.path, f"/{b.id}/")
+        self.assertEqual(grandchild.path, f"/{b.id}/{child.id}/")
+
+    def test_rebuild_paths(self):
+        from sqlalchemy import update
+        from dooit.api.hooks.fix_hooks import rebuild_paths
+
+        w = Workspace()
+        grandchild = w.add_workspace().add_workspace()
+
+        self.session.execute(update(Workspace).values(path="/", depth=0))
+        rebuild_paths(self.session.connection())
+        self.session.expire_all()
+
+        self.assertEqual(grandchild.nest_level, 2)
+        self.assertEqual(w.descendants()[-1], grandchild)
+
+    def test_tree_order(self):
+        root = Workspace()
+        a, b = root.add_workspace(), root.add_workspace()
+        a1, a2 = a.add_workspace(), a.add_workspace()
+        a11 = a1.add_workspace()
+        b1 = b.add_workspace()
+
+        top_level = Workspace.parent_workspace_id == root.id
+
+        self.assertEqual(
+            Workspace.tree_order(top_level),
+            [a.id, a1.id, a11.id, a2.id, b.id, b1.id],
+        )
+        self.assertEqual(
+            Workspace.tree_order(top_level, expanded=[a.id]),
+            [a.id, a1.id, a2.id, b.id],
+        )
+
+        a.shift_down()
+        self.assertEqual(Workspace.tree_order(top_level, expanded=[]), [b.id, a.id])
+
+    def test_in_tree(self):
+        root = Workspace()
+        a, b = root.add_workspace(), root.add_workspace()
+        a1 = a.add_workspace()
+        a11 = a1.add_workspace()
+        b.add_workspace()
+
+        top_level = Workspace.id == a.id
+        query = select(Workspace.id).where(Workspace.in_tree(top_level))
+        self.assertEqual(
+            set(self.session.execute(query).scalars()), {a.id, a1.id, a11.id}
+        )
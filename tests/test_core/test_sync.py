@@ -1,31 +1,149 @@
-# FIXME: This works but not in github workflows?
-#
-# from time import sleep
-# from pathlib import Path
-# from dooit.api.manager import Manager
-# from dooit.api.workspace import Workspace
-# from tests.test_core.core_base import CoreTestBase
-# import tempfile
-#
-#
-# class TestSync(CoreTestBase):
-#     def test_sync(self):
-#         # create a temporary folder
-#         temp_folder = tempfile.TemporaryDirectory()
-#         temp_db = Path(temp_folder.name) / "dooit1.db"
-#         TEMP_CONN = f"sqlite:////{temp_db}"
-#
-#         manager1 = Manager()
-#         manager2 = Manager()
-#
-#         manager1.connect(TEMP_CONN)
-#         manager2.connect(TEMP_CONN)
-#
-#         w = Workspace(description="test")
-#         manager1.save(w)
-#
-#         self.assertFalse(manager1.has_changed())
-#         sleep(1)  # ensuring the times dont match
-#
-#         self.assertTrue(manager2.has_changed())
-#         temp_folder.cleanup()
+import os
+import sqlite3
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from sqlalchemy import text
+from dooit.api import Todo, Workspace, manager
+from tests.test_core.core_base import CoreTestBase, TEMP_CONN
+
+
+class TestSync(CoreTestBase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.database = os.path.join(self.tempdir.name, "dooit.db")
+        manager.connect(f"sqlite:///{self.database}")
+
+        self.workspace = Workspace(description="workspace")
+        self.todo = self.workspace.add_todo()
+
+        # another process writing to the same database
+        self.external = sqlite3.connect(self.database, isolation_level=None)
+
+    def tearDown(self) -> None:
+        self.external.close()
+        super().tearDown()
+        manager.engine.dispose()
+        self.tempdir.cleanup()
+        manager.connect(TEMP_CONN)
+
+    def test_idle(self):
+        self.assertIsNone(manager.poll_changes())
+        self.assertIsNone(manager.poll_changes())
+
+    def test_own_changes_are_skipped(self):
+        self.todo.description = "changed"
+        self.todo.save()
+        self.workspace.add_todo()
+
+        self.assertIsNone(manager.poll_changes())
+
+    def test_external_update(self):
+        self.external.execute(
+            "UPDATE todo SET description = 'external' WHERE id = ?", (self.todo.id,)
+        )
+
+        changes = manager.poll_changes()
+        assert changes is not None
+
+        self.assertEqual(changes.uuids, {self.todo.uuid})
+        self.assertFalse(changes.structural)
+        self.assertFalse(changes.full)
+        self.assertEqual(self.todo.description, "external")
+        self.assertIsNone(manager.poll_changes())
+
+    def test_external_insert(self):
+        todos = self.workspace.todos
+        self.external.execute(
+            "INSERT INTO todo (order_index, description, effort, urgency, pending, "
+            "path, depth, parent_workspace_id) VALUES (1, 'new', 0, 1, 1, '/', 0, ?)",
+            (self.workspace.id,),
+        )
+
+        changes = manager.poll_changes()
+        assert changes is not None
+
+        self.assertTrue(changes.structural)
+        self.assertEqual(len(todos), 1)
+        self.assertEqual(len(self.workspace.todos), 2)
+
+    def test_pruned_log(self):
+        self.external.execute("UPDATE todo SET urgency = 2")
+        self.external.execute("UPDATE todo SET urgency = 3")
+        self.external.execute(
+            "DELETE FROM change_log WHERE seq = (SELECT max(seq) - 1 FROM change_log)"
+        )
+
+        changes = manager.poll_changes()
+        assert changes is not None
+
+        self.assertTrue(changes.full)
+        self.assertEqual(Todo.from_id(self.todo.uuid).urgency, 3)
+
+    def test_external_delete(self):
+        uuid = self.todo.uuid
+        self.assertEqual(Todo.from_ids([uuid]), [self.todo])
+        self.external.execute("DELETE FROM todo WHERE id = ?", (self.todo.id,))
+
+        changes = manager.poll_changes()
+        assert changes is not None
+
+        self.assertTrue(changes.structural)
+        self.assertEqual(Todo.from_ids([uuid]), [])
+
+    def test_external_change_after_own_commit(self):
+        self.todo.description = "own"
+        self.todo.save()
+        self.external.execute(
+            "UPDATE todo SET urgency = 2 WHERE id = ?", (self.todo.id,)
+        )
+
+        changes = manager.poll_changes()
+        assert changes is not None
+
+        self.assertEqual(changes.uuids, {self.todo.uuid})
+        self.assertIsNone(manager.poll_changes())
+
+    def test_external_change_before_own_commit(self):
+        self.external.execute(
+            "UPDATE todo SET urgency = 2 WHERE id = ?", (self.todo.id,)
+        )
+        self.workspace.add_todo()
+
+        changes = manager.poll_changes()
+        assert changes is not None
+        self.assertIn(self.todo.uuid, changes.uuids)
+
+    def test_large_transaction(self):
+        # with a tiny page cache the transaction is spilled to the database
+        # file, which locks out every other connection until it commits
+        manager.session.execute(text("PRAGMA cache_size = 1"))
+        with manager.batch():
+            for _ in range(500):
+                self.workspace.add_todo()
+
+        self.assertIsNone(manager.poll_changes())
+        self.external.execute("UPDATE todo SET urgency = 2")
+
+        changes = manager.poll_changes()
+        assert changes is not None
+        self.assertEqual(len(changes.uuids), 501)
+
+    def test_bulk_change(self):
+        self.external.execute(
+            "INSERT INTO change_log (model, row_id, op) VALUES ('', 0, 'F')"
+        )
+
+        changes = manager.poll_changes()
+        assert changes is not None
+        self.assertTrue(changes.full)
+
+    def test_log_is_pruned(self):
+        def logged():
+            return self.external.execute("SELECT count(*) FROM change_log").fetchone()
+
+        with patch("dooit.api.manager.CHANGE_LOG_RETENTION", 3):
+            for i in range(10):
+                self.todo.urgency = i % 4 + 1
+                self.todo.save()
+
+                self.assertLessEqual(logged()[0], 6)
@@ -4,7 +4,7 @@ from sqlalchemy import select
 from pytest import raises
 from dooit.api.exceptions import NoParentError, MultipleParentError
 from tests.test_core.core_base import CoreTestBase
-from dooit.api import Todo, Workspace
+from dooit.api import Todo, Workspace, manager
 
 
 class TestTodo(CoreTestBase):
@@ -87,6 +87,20 @@ class TestTodo(CoreTestBase):
         self.assertEqual(len(t2.siblings), 3)
         self.assertEqual(t2.order_index, 1)
 
+    def test_sibling_add_only_shifts_siblings(self):
+        other_workspace = Workspace()
+        others = [other_workspace.add_todo() for _ in range(3)]
+        nested = [others[0].add_todo() for _ in range(3)]
+
+        t = self.default_workspace.add_todo()
+        self.default_workspace.add_todo()
+        t.add_sibling()
+        self.session.expire_all()
+
+        self.assertEqual([t.order_index for t in t.siblings], [0, 1, 2])
+        self.assertEqual([t.order_index for t in others], [0, 1, 2])
+        self.assertEqual([t.order_index for t in nested], [0, 1, 2])
+
     def test_comparable_fields(self):
         fields = Todo.comparable_fields()
         expected_fields = [
@@ -116,6 +130,69 @@ class TestTodo(CoreTestBase):
 
         self.assertEqual(t_from_id, t)
 
+    def test_search(self):
+        descriptions = ["Buy apples", "apricot jam", "fix the app", "Call mom"]
+        todos = [
+            Todo(description=description, parent_workspace=self.default_workspace)
+            for description in descriptions
+        ]
+        child = Todo(description="green apples", parent_todo=todos[0])
+        for todo in todos + [child]:
+            todo.save()
+
+        def search(filter):
+            return {
+                todo.description
+                for todo in todos + [child]
+                if todo.id in Todo.search(filter)
+            }
+
+        self.assertTrue(manager.has_search_index)
+        self.assertEqual(search("app"), {"Buy apples", "fix the app", "green apples"})
+        self.assertEqual(search("APPLE"), {"Buy apples", "green apples"})
+        self.assertEqual(
+            search("ap"), {"Buy apples", "apricot jam", "fix the app", "green apples"}
+        )
+        self.assertEqual(search("apples buy"), {"Buy apples"})
+        self.assertEqual(search('"'), set())
+
+        todos[3].description = "Call the apple store"
+        todos[3].save()
+        child.drop()
+        self.assertEqual(search("apple"), {"Buy apples", "Call the apple store"})
+
+        manager.has_search_index = False
+        try:
+            self.assertEqual(search("apple"), {"Buy apples", "Call the apple store"})
+        finally:
+            manager.has_search_index = True
+
+    def test_tag_index(self):
+        descriptions = ["buy milk @home @Errand", "call bob @work", "fix @home @HOME"]
+        todos = [
+            Todo(description=description, parent_workspace=self.default_workspace)
+            for description in descriptions
+        ]
+        for todo in todos:
+            todo.save()
+
+        self.assertEqual(Todo.tag_counts(), {"@home": 2, "@Errand": 1, "@work": 1})
+        self.assertEqual(Todo.with_tags("@home"), [todos[0], todos[2]])
+        self.assertEqual(Todo.with_tags("@HOME", "@errand"), [todos[0]])
+        self.assertEqual(Todo.with_tags("@home", "@work"), [])
+
+        todos[1].description = "call bob @home"
+        todos[1].save()
+        todos[2].drop()
+
+        self.assertEqual(Todo.tag_counts(), {"@home": 2, "@Errand": 1})
+        self.assertEqual(Todo.with_tags("@work"), [])
+
+        # tags are matched by prefix in searches
+        self.assertEqual(Todo.search("@ho"), {todos[0].id, todos[1].id})
+        self.assertEqual(Todo.search("@err milk"), {todos[0].id})
+        self.assertEqual(Todo.search("@milk"), set())
+
     def test_toggle_complete(self):
         t = self.default_workspace.add_todo()
         self.assertTrue(t.pending)
@@ -177,6 +254,9 @@ class TestTodo(CoreTestBase):
         t.description = "This is a tag"
         self.assertEqual(t.tags, [])
 
+        t.description = "mail @ home @Tag @tag"
+        self.assertEqual(t.tags, ["@Tag"])
+
     def test_urgency(self):
         t = self.default_workspace.add_todo()
         assert t.urgency == 1
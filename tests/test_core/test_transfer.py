@@ -0,0 +1,235 @@
+import io
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from sqlalchemy import text
+from dooit.api import Todo, Workspace, manager
+from dooit.api.exceptions import DooitError
+from dooit.utils import transfer
+from tests.test_core.core_base import CoreTestBase, TEMP_CONN
+
+
+def export(format: str = "jsonl") -> str:
+    file = io.StringIO()
+    transfer.export(file, format)
+    return file.getvalue()
+
+
+def records() -> List[Dict[str, Any]]:
+    """
+    Exported records, with ids replaced by their position to compare databases
+    """
+
+    ids: Dict[str, Dict[int, int]] = {"workspace": {}, "todo": {}}
+    res = []
+
+    for record in transfer.iter_records(manager.session.connection()):
+        kind = record["type"]
+        ids[kind][record["id"]] = len(ids[kind])
+        record["id"] = ids[kind][record["id"]]
+
+        for kind in ("workspace", "todo"):
+            parent = record.get(f"parent_{kind}_id")
+            if parent is not None:
+                record[f"parent_{kind}_id"] = ids[kind][parent]
+
+        res.append(record)
+
+    return res
+
+
+class TestTransfer(CoreTestBase):
+    def setUp(self):
+        super().setUp()
+
+        work = Workspace(description="work")
+        work.save()
+        nested = Workspace(description="nested", parent_workspace=work)
+        nested.save()
+        Workspace(description="home").save()
+
+        self.parent = Todo(
+            description="parent @tag",
+            parent_workspace=work,
+            due=datetime(2024, 1, 2, 10, 30),
+            recurrence=timedelta(days=2),
+            urgency=4,
+            effort=3,
+        )
+        self.parent.save()
+
+        Todo(description="pending child", parent_todo=self.parent).save()
+        done = Todo(description="done child", parent_todo=self.parent)
+        done.save()
+        done.toggle_complete()
+        Todo(description="nested todo", parent_workspace=nested).save()
+
+    def test_round_trip(self):
+        for format in ("jsonl", "csv"):
+            with self.subTest(format=format):
+                expected = records()
+                data = export(format)
+
+                manager.connect(TEMP_CONN)
+                counts = transfer.import_file(io.StringIO(data), format)
+
+                self.assertEqual(counts, {"workspaces": 3, "todos": 4})
+                self.assertEqual(records(), expected)
+
+                # what the hooks would have maintained
+                todo = Todo.with_tags("@tag")[0]
+                self.assertEqual(todo.due, datetime(2024, 1, 2, 10, 30))
+                self.assertEqual(
+                    [t.description for t in todo.descendants()],
+                    ["pending child", "done child"],
+                )
+                self.assertEqual(todo.todos[0].nest_level, 1)
+                self.assertEqual(Todo.search("nested"), {todo.id + 3})
+
+                nested = Workspace.from_id(str(todo.parent_workspace_id)).workspaces
+                self.assertEqual(nested[0].nest_level, 1)
+
+    def test_import_into_existing(self):
+        data = export()
+        query = text("SELECT max(seq) FROM change_log")
+        last_change = manager.session.execute(query).scalar()
+
+        counts = transfer.import_file(io.StringIO(data))
+        self.assertEqual(counts["todos"], 4)
+
+        # a single change for the whole import
+        logged = manager.session.execute(
+            text("SELECT op FROM change_log WHERE seq > :seq"), {"seq": last_change}
+        )
+        self.assertEqual(logged.scalars().all(), ["F"])
+
+        # imported workspaces come after the existing ones
+        self.assertEqual(
+            [w.description for w in Workspace.all() if w.nest_level == 0],
+            ["work", "home", "work", "home"],
+        )
+        self.assertEqual(
+            [w.order_index for w in Workspace.all() if w.nest_level == 0],
+            [0, 1, 2, 3],
+        )
+        self.assertEqual(len(Todo.with_tags("@tag")), 2)
+
+    def test_pending_fixup(self):
+        data = "\n".join(
+            [
+                '{"type": "workspace", "id": 1, "description": "w"}',
+                '{"type": "todo", "id": 1, "parent_workspace_id": 1, "pending": false}',
+                '{"type": "todo", "id": 2, "parent_todo_id": 1}',
+                '{"type": "todo", "id": 3, "parent_todo_id": 2, "order_index": 0}',
+                # completed children complete their ancestors
+                '{"type": "todo", "id": 4, "parent_workspace_id": 1}',
+                '{"type": "todo", "id": 5, "parent_todo_id": 4}',
+                '{"type": "todo", "id": 6, "parent_todo_id": 5, "pending": false}',
+                '{"type": "todo", "id": 7, "parent_todo_id": 4}',
+                '{"type": "todo", "id": 8, "parent_todo_id": 7, "pending": false}',
+                # unless one of them is pending
+                '{"type": "todo", "id": 9, "parent_workspace_id": 1}',
+                '{"type": "todo", "id": 10, "parent_todo_id": 9, "pending": false}',
+                '{"type": "todo", "id": 11, "parent_todo_id": 9}',
+            ]
+        )
+
+        manager.connect(TEMP_CONN)
+        transfer.import_file(io.StringIO(data), fix_pending=True)
+
+        todos = manager.session.query(Todo).order_by(Todo.id).all()
+        self.assertEqual([t.pending for t in todos[:8]], [False] * 8)
+        self.assertEqual([t.pending for t in todos[8:]], [True, False, True])
+        self.assertEqual([t.nest_level for t in todos[:3]], [0, 1, 2])
+
+    def test_pending_kept(self):
+        data = "\n".join(
+            [
+                '{"type": "workspace", "id": 1, "description": "w"}',
+                '{"type": "todo", "id": 1, "parent_workspace_id": 1, "pending": false}',
+                '{"type": "todo", "id": 2, "parent_todo_id": 1}',
+                '{"type": "todo", "id": 3, "parent_workspace_id": 1}',
+                '{"type": "todo", "id": 4, "parent_todo_id": 3, "pending": false}',
+            ]
+        )
+
+        manager.connect(TEMP_CONN)
+        transfer.import_file(io.StringIO(data))
+
+        todos = manager.session.query(Todo).order_by(Todo.id).all()
+        self.assertEqual([t.pending for t in todos], [False, True, True, False])
+
+    def test_invalid_import(self):
+        before = export()
+        cases = {
+            '{"type": "todo", "id": 1}': "record 1: Todo must have a parent",
+            '{"type": "todo", "id": 1, "parent_todo_id": 5}': "todo 1 is missing",
+            '{"type": "todo", "id": 1, "parent_workspace_id": 9}': "workspace of todo",
+            '{"type": "tag"}': "record 1: Unknown record type",
+            '{"type": "workspace", "id": 1}\n' * 2: "Duplicate workspace ids",
+            '{"type": "todo", "id": "x"}': "Expected a number",
+            '{"type": "todo", "id": 1, "parent_todo_id": 1, "recurrence": "x"}': (
+                "record 1: Invalid recurrence 'x'"
+            ),
+            "not json": "record 1",
+        }
+
+        for line, error in cases.items():
+            with self.subTest(line=line):
+                with self.assertRaisesRegex(DooitError, error):
+                    transfer.import_file(io.StringIO(line))
+
+                self.assertEqual(export(), before)
+
+        # the search index still works after a failed import
+        Todo(description="after", parent_workspace=self.parent.parent_workspace).save()
+        self.assertEqual(len(Todo.search("after")), 1)
+
+    def test_formats(self):
+        self.assertEqual(list(transfer.WRITERS), transfer.FORMATS)
+        self.assertEqual(list(transfer.READERS), transfer.FORMATS)
+
+        with self.assertRaisesRegex(DooitError, "Unknown format"):
+            export("xml")
+
+    def test_todotxt(self):
+        self.assertEqual(
+            export("todo.txt").splitlines(),
+            [
+                "(A) parent @tag +work due:2024-01-02 rec:2d",
+                "pending child +work",
+                "x done child +work",
+                "nested todo +work/nested",
+            ],
+        )
+
+        data = "\n".join(
+            [
+                "x 2024-01-03 2024-01-01 call mom +Family_stuff @phone",
+                "(B) 2024-01-01 pay rent due:2024-02-01 rec:+1w",
+                "",
+                "fix bike +Family_stuff/garage pri:C",
+            ]
+        )
+
+        manager.connect(TEMP_CONN)
+        transfer.import_file(io.StringIO(data), "todo.txt", workspace="inbox")
+
+        rows = manager.session.execute(
+            text(
+                "SELECT w.description, t.description, t.pending, t.urgency, "
+                "t.due IS NOT NULL FROM todo t JOIN workspace w "
+                "ON w.id = t.parent_workspace_id ORDER BY t.id"
+            )
+        ).all()
+        self.assertEqual(
+            [tuple(row) for row in rows],
+            [
+                ("Family stuff", "call mom @phone", False, 1, 0),
+                ("inbox", "pay rent", True, 3, 1),
+                ("garage", "fix bike", True, 2, 0),
+            ],
+        )
+
+        garage = Workspace.from_id(str(Todo.from_id("3").parent_workspace_id))
+        self.assertEqual(garage.parent_workspace.description, "Family stuff")
+        self.assertEqual(Todo.from_id("2").recurrence, timedelta(weeks=1))
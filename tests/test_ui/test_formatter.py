@@ -1,10 +1,11 @@
+from functools import partial
 from typing import Optional
 from rich.text import Text
 from rich.style import Style
 from dooit.api.workspace import Workspace
 from dooit.ui.api.api_components.formatters import FormatterStore
 from dooit.ui.api.dooit_api import DooitAPI
-from dooit.ui.api import extra_formatter
+from dooit.ui.api import extra_formatter, pure_formatter
 from tests.test_ui.ui_base import run_pilot
 from dooit.ui.tui import Dooit
 
@@ -143,3 +144,88 @@ async def test_multiple_formatting_toggle():
         store.remove("italic")
         formatted = store.format_value(w1.description, w1)
         assert formatted.markup == "this is a test description 123"
+
+
+class Highlighter:
+    def __init__(self, word: str) -> None:
+        self.word = word
+
+    def __call__(self, value: str, _: Workspace, api: DooitAPI) -> Optional[str]:
+        return set_italic(value.replace(self.word, "test"), _, api)
+
+
+def add_prefix(value: str, _: Workspace, prefix: str) -> Optional[str]:
+    return f"{prefix} {value}"
+
+
+async def test_callable_formatters():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        store, w1, w2 = setup(app.api)
+
+        store.add(Highlighter("another"))
+        store.add(extra_formatter(partial(add_prefix, prefix=">")))
+
+        formatted = store.format_value(w1.description, w1)
+        assert (
+            formatted.markup
+            == "> this is a [italic #bf616a]test[/italic #bf616a] description"
+        )
+
+        formatted = store.format_value(w2.description, w2)
+        assert (
+            formatted.markup
+            == "> [italic #bf616a]test[/italic #bf616a] description 123"
+        )
+
+
+async def test_pure_formatter_cache():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        store, w1, w2 = setup(app.api)
+        calls = []
+
+        @pure_formatter
+        def counted(value: str, _: Workspace) -> Optional[str]:
+            calls.append(value)
+            return value.upper()
+
+        store.add(counted)
+        for _ in range(3):
+            assert (
+                store.format_value(w1.description, w1).plain == w1.description.upper()
+            )
+            store.format_value(w2.description, w2)
+
+        assert len(calls) == 2
+        info = store.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (4, 2, 2)
+        assert info.hit_rate == 4 / 6
+
+        # model changes, theme changes and new formatters invalidate the cache
+        w1.bump_version()
+        store.format_value(w1.description, w1)
+        assert len(calls) == 3
+
+        app.api.css.theme = app.api.css.theme
+        store.format_value(w1.description, w1)
+        assert len(calls) == 4
+
+        # formatters which are not pure are never cached
+        store.add(add_icon)
+        store.format_value(w1.description, w1)
+        store.format_value(w1.description, w1)
+        assert len(calls) == 6
+        assert store.cache_info().currsize == 0
+
+        columns = app.api.formatter.todos.cache_info()
+        assert set(columns) == {
+            "description",
+            "due",
+            "effort",
+            "recurrence",
+            "urgency",
+            "status",
+        }
@@ -0,0 +1,119 @@
+from unittest.mock import patch
+from sqlalchemy import event
+from dooit.api import manager
+from dooit.ui.api.api_components.keys import KeyManager, KeyMatchType, split_keys
+from tests.test_ui.ui_base import run_pilot, create_and_move_to_todo
+from dooit.ui.tui import Dooit
+
+
+def test_split_keys():
+    assert list(split_keys("gg")) == ["g", "g"]
+    assert list(split_keys("<ctrl+s>x")) == ["<ctrl+s>", "x"]
+    assert list(split_keys("<")) == ["<"]
+    assert list(split_keys("<>")) == ["<", ">"]
+
+
+def test_key_resolution():
+    mode = "NORMAL"
+    keys = KeyManager(lambda: mode)
+    keys.set("j", lambda: "j")
+    keys.set("gg", lambda: "gg")
+    keys.set("<ctrl+s>", lambda: "sort")
+    keys.set("1", lambda: "one")
+
+    match = keys.register_key("j")
+    assert match.match_type == KeyMatchType.MatchFound
+    assert match.function and match.function.callback() == "j"
+    assert match.count == 1
+
+    assert keys.register_key("g").match_type == KeyMatchType.MultipleMatchFound
+    assert keys.input == "g"
+    assert keys.register_key("x").match_type == KeyMatchType.NoMatchFound
+    assert keys.input == ""
+
+    match = keys.register_key("ctrl+s")
+    assert match.function and match.function.callback() == "sort"
+
+    # counts
+    assert keys.register_key("2").match_type == KeyMatchType.MultipleMatchFound
+    assert keys.register_key("0").match_type == KeyMatchType.MultipleMatchFound
+    assert keys.register_key("g").match_type == KeyMatchType.MultipleMatchFound
+    assert keys.input == "20g"
+    match = keys.register_key("g")
+    assert match.function and match.function.callback() == "gg"
+    assert match.count == 20
+
+    # bound digits are not counts
+    match = keys.register_key("1")
+    assert match.function and match.function.callback() == "one"
+    assert keys.register_key("0").match_type == KeyMatchType.NoMatchFound
+
+    keys.register_key("3")
+    assert keys.register_key("escape").match_type == KeyMatchType.NoMatchFound
+    assert keys.register_key("j").count == 1
+
+    # digits are typed as is outside of normal mode
+    mode = "INSERT"
+    assert keys.register_key("5").match_type == KeyMatchType.NoMatchFound
+
+
+async def test_count_prefix():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        for _ in range(6):
+            tree.add_sibling()
+            await pilot.press("escape")
+        await pilot.pause()
+
+        await pilot.press("g", "g")
+        assert tree.highlighted == 0
+
+        await pilot.press("3", "j")
+        assert tree.highlighted == 3
+
+        commits = []
+
+        def count(_):
+            commits.append(None)
+
+        event.listen(manager.session, "after_commit", count)
+
+        syncs = []
+        sync_options = tree.sync_options
+
+        def sync():
+            syncs.append(None)
+            sync_options()
+
+        tree.sync_options = sync
+
+        moved = tree.current_model
+        await pilot.press("2", "J")
+        await pilot.pause()
+        assert tree.highlighted == 5
+        assert tree.current_model == moved
+        assert len(commits) == 1
+        assert len(syncs) == 1
+
+        # a single keypress is not batched
+        with patch.object(manager, "batch", wraps=manager.batch) as batch:
+            await pilot.press("K")
+            await pilot.pause()
+
+        assert tree.highlighted == 4
+        assert len(commits) == 2
+        assert not batch.called
+
+        # rows removed with a count are synced before the next one is picked
+        app.api.vars.show_confirm = False
+        syncs.clear()
+        await pilot.press("3", "x", "x")
+        await pilot.pause()
+        assert len(tree._options) == 3
+        assert len(syncs) == 3
+        assert len(commits) == 3
+
+        event.remove(manager.session, "after_commit", count)
@@ -0,0 +1,124 @@
+from dooit.ui.api import subscribe, timer
+from dooit.ui.api.events import (
+    DooitEvent,
+    TodoEvent,
+    TodoRemoved,
+    TodoSelected,
+    WorkspaceSelected,
+)
+from tests.test_ui.ui_base import run_pilot, create_and_move_to_todo
+from dooit.ui.tui import Dooit
+from dooit.ui.screens import HelpScreen
+
+
+async def test_event_dispatch():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        plugins = app.api.plugin_manager
+        calls = []
+
+        @subscribe(TodoEvent)
+        def on_todo(api, event):
+            calls.append(("todo", event.__class__))
+
+        @subscribe(DooitEvent)
+        def on_any(api, event):
+            calls.append(("any", event.__class__))
+
+        plugins.register(on_todo)
+        plugins.on_event(TodoRemoved(None))
+        assert ("todo", TodoRemoved) in calls
+        assert ("any", TodoRemoved) not in calls
+
+        # registering a handler invalidates the resolved handlers
+        plugins.register(on_any)
+        calls.clear()
+        plugins.on_event(TodoRemoved(None))
+        assert calls == [("todo", TodoRemoved), ("any", TodoRemoved)]
+
+        calls.clear()
+        plugins.on_event(WorkspaceSelected(None))
+        assert calls == [("any", WorkspaceSelected)]
+        assert WorkspaceSelected in plugins._dispatch
+
+
+async def test_bar_refresh_coalesced():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+        for _ in range(5):
+            tree.add_sibling()
+            await pilot.press("escape")
+        await pilot.pause()
+
+        # the clock of the default bar would request refreshes of its own
+        plugins = app.api.plugin_manager
+        plugins.pause_timers()
+
+        refreshes = []
+        refresh_bar = plugins._refresh_bar
+
+        def count():
+            refreshes.append(None)
+            refresh_bar()
+
+        plugins._refresh_bar = count
+
+        for _ in range(3):
+            app.post_message(TodoSelected(tree.current_model))
+        await pilot.pause()
+
+        # one refresh per frame, never one per message or handler
+        assert len(refreshes) == 1
+        refreshes.clear()
+
+        plugins.refresh_bar()
+        plugins.refresh_bar()
+        await pilot.pause()
+        assert len(refreshes) == 1
+
+
+async def test_timers():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        plugins = app.api.plugin_manager
+        values = iter(range(1000))
+
+        @timer(0.05)
+        def counter(api):
+            return next(values)
+
+        @timer(0.05)
+        def constant(api):
+            return "constant"
+
+        intervals = len(plugins._intervals)
+        plugins.register(counter)
+        plugins.register(constant)
+        plugins.register(constant)
+        assert len(plugins._intervals) == intervals + 1
+        assert plugins.timers[0.05] == [counter, constant]
+
+        await pilot.pause(0.2)
+        stats = {s.name: s for s in plugins.timer_stats()}
+        counter_stats = stats[counter.__qualname__]
+        constant_stats = stats[constant.__qualname__]
+        assert counter_stats.calls > 1
+        assert counter_stats.skipped == 0
+        assert constant_stats.calls > 1
+        assert constant_stats.skipped == constant_stats.calls - 1
+        assert constant_stats.average >= 0
+
+        # paused while another screen is on top
+        await app.push_screen("help")
+        assert isinstance(app.screen, HelpScreen)
+        calls = plugins.timer_stats()[-1].calls
+        await pilot.pause(0.2)
+        assert plugins.timer_stats()[-1].calls == calls
+
+        await app.pop_screen()
+        await pilot.pause()
+        assert plugins.timer_stats()[-1].calls > calls
@@ -1,3 +1,4 @@
+from dooit.api import Todo, Workspace
 from dooit.ui.widgets.trees.todos_tree import TodosTree
 from tests.test_ui.ui_base import run_pilot, create_and_move_to_todo
 from dooit.ui.tui import Dooit
@@ -25,19 +26,23 @@ async def test_search():
 
         assert app.bar_switcher.search_bar
 
-        await pilot.press("a")
+        async def search(*keys: str):
+            await pilot.press(*keys)
+            await app.workers.wait_for_complete()
+
+        await search("a")
         assert sum(i.disabled for i in tree._options) == 0
 
-        await pilot.press("p", "p")
+        await search("p", "p")
         assert sum(i.disabled for i in tree._options) == 1
 
-        await pilot.press("l")
+        await search("l")
         assert sum(i.disabled for i in tree._options) == 2
 
-        await pilot.press(*(["backspace"] * 4))
+        await search(*(["backspace"] * 4))
         assert sum(i.disabled for i in tree._options) == 0
 
-        await pilot.press(*list("applet"))
+        await search(*list("applet"))
         assert sum(i.disabled for i in tree._options) == 3
 
         # confirm search
@@ -57,3 +62,158 @@ async def test_search():
 
         await pilot.pause()
         assert sum(i.disabled for i in tree._options) == 0
+
+
+async def test_search_collapsed():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+
+        parent = tree.model.add_todo()
+        parent.description = "groceries"
+        child = parent.add_todo()
+        child.description = "buy apples"
+        child.save()
+
+        tree.force_refresh()
+        await pilot.pause()
+        assert tree._options[-1].id == parent.uuid
+
+        tree.set_filter("apple")
+        await pilot.pause()
+
+        # children of collapsed todos are searched too
+        assert not tree.get_option(child.uuid).disabled
+        assert tree.get_option(parent.uuid).disabled
+
+        tree.set_filter("")
+        await pilot.pause()
+        assert tree._options[-1].id == parent.uuid
+
+
+async def test_search_debounce(monkeypatch):
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+
+        for description in ["apple", "apps", "banana"]:
+            todo = tree.model.add_todo()
+            todo.description = description
+            todo.save()
+
+        tree.force_refresh()
+        await pilot.pause()
+
+        queries = []
+        search = Todo.search_descriptions
+
+        def search_descriptions(filter, *where):
+            queries.append(filter)
+            return search(filter, *where)
+
+        monkeypatch.setattr(Todo, "search_descriptions", search_descriptions)
+
+        # only the last of quickly typed queries is searched
+        for filter in ["a", "ap", "app"]:
+            tree.search(filter)
+        await pilot.pause(tree.search_debounce)
+        await app.workers.wait_for_complete()
+
+        assert queries == ["app"]
+        assert sum(i.disabled for i in tree._options) == 1
+
+        # narrower queries filter the previous results
+        tree.search("appl")
+        await app.workers.wait_for_complete()
+
+        assert queries == ["app"]
+        assert sum(i.disabled for i in tree._options) == 2
+
+        tree.search("nan")
+        await app.workers.wait_for_complete()
+
+        assert queries == ["app", "nan"]
+        assert sum(i.disabled for i in tree._options) == 2
+
+        tree.search("")
+        assert sum(i.disabled for i in tree._options) == 0
+
+
+async def test_search_tags():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+
+        for description in ["@work report", "email @workshop", "about work"]:
+            todo = tree.model.add_todo()
+            todo.description = description
+            todo.save()
+
+        tree.force_refresh()
+        await pilot.pause()
+
+        tree.set_filter("@work")
+        assert [i.disabled for i in tree._options] == [False, False, True]
+
+        tree.set_filter("@works")
+        assert [i.disabled for i in tree._options] == [True, False, True]
+
+        tree.set_filter("work")
+        assert [i.disabled for i in tree._options] == [False, False, False]
+
+
+async def test_search_scope():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+
+        parent = tree.model.add_todo()
+        parent.description = "apple pie"
+        child = parent.add_todo()
+        child.description = "apples"
+        child.save()
+
+        # not in this tree
+        other = Workspace()
+        other.save()
+        elsewhere = other.add_todo()
+        elsewhere.description = "apple juice"
+        elsewhere.save()
+
+        tree.force_refresh()
+        await pilot.pause()
+        tree.set_filter("apple")
+        await pilot.pause()
+
+        assert tree._search_results is not None
+        assert set(tree._search_results[1]) == {parent.uuid, child.uuid}
+
+
+async def test_search_after_changes():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        tree = await create_and_move_to_todo(pilot)
+
+        todo = tree.model.add_todo()
+        todo.description = "apps"
+        todo.save()
+
+        tree.force_refresh()
+        await pilot.pause()
+        tree.set_filter("app")
+
+        # rows added while searching are matched by the next query
+        added = tree.model.add_todo()
+        added.description = "apple"
+        added.save()
+        tree.sync_options()
+
+        tree.set_filter("appl")
+        await pilot.pause()
+        assert not tree.get_option(added.uuid).disabled
+        assert tree.get_option(todo.uuid).disabled
@@ -1,5 +1,6 @@
 from tests.test_ui.ui_base import run_pilot
 from dooit.ui.tui import Dooit
+from dooit.startup_profile import startup_profile
 
 
 async def test_startup():
@@ -14,3 +15,26 @@ async def test_startup():
         app.workspace_tree
 
         assert app.get_dooit_mode() == "NORMAL"
+
+
+async def test_startup_profile():
+    startup_profile.enable()
+    try:
+        async with run_pilot() as pilot:
+            await pilot.pause()
+            await pilot.pause()
+            assert not pilot.app.is_running
+    finally:
+        startup_profile.enabled = False
+
+    phases = [name for name, _ in startup_profile.phases]
+    assert phases == [
+        "connect",
+        "create_all",
+        "migrations",
+        "api setup",
+        "plugin scan",
+        "first paint",
+    ]
+    assert startup_profile.total >= sum(t for _, t in startup_profile.phases)
+    assert "first paint" in startup_profile.report()
@@ -1,9 +1,17 @@
 from datetime import datetime, timedelta
+from inspect import signature
+from time import time
+from unittest.mock import patch
 from pytest import raises
+from sqlalchemy import event
+from textual import _widget_navigation
+from textual.widgets import OptionList
+from textual.widgets import _option_list
 from dooit.api.exceptions import NoNodeError
-from dooit.api import Todo
+from dooit.api import Todo, manager
 from dooit.ui.api.widgets import TodoWidget
 from dooit.ui.widgets.renderers.base_renderer import BaseRenderer
+from dooit.ui.widgets.trees._column_widths import ColumnWidths
 from tests.test_ui.ui_base import run_pilot, create_and_move_to_todo
 from dooit.ui.tui import Dooit
 
@@ -113,6 +121,84 @@ async def test_remove_todo():
         assert tree.highlighted is None
 
 
+async def test_remove_child_renders_parent():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        parent = tree.model.add_todo()
+        child = parent.add_todo()
+
+        tree.force_refresh()
+        tree.highlight_id(parent.uuid)
+        tree.expand_node()
+        await pilot.pause()
+
+        prompt = tree.get_option(parent.uuid).prompt
+        child_id = child.uuid
+        child.drop()
+        tree.sync_options()
+
+        # kept rows are rendered again when their model changed
+        assert child_id not in tree._option_ids
+        assert tree.get_option(parent.uuid).prompt is not prompt
+        assert (
+            tree.get_option(parent.uuid).prompt is tree._renderers[parent.uuid].prompt
+        )
+
+
+async def test_sync_splices_changed_rows():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        with manager.batch():
+            for _ in range(30):
+                tree.model.add_todo()
+
+        for virtual_threshold in [1000, 10]:
+            tree.virtual_threshold = virtual_threshold
+            tree.force_refresh()
+            await pilot.pause()
+
+            def check_layout():
+                # the same lines as laying out every option again
+                lines, spans = list(tree._lines), list(tree._spans)
+                tree._refresh_lines()
+                tree._populate()
+                assert (tree._lines, tree._spans) == (lines, spans)
+                assert tree._option_ids == {
+                    option.id: index for index, option in enumerate(tree._options)
+                }
+
+            options = list(tree._options)
+            models = [tree._renderers[option.id].model for option in options[:6]]
+
+            # a row is expanded with a new child, one moves and one is removed
+            models[1].add_todo()
+            tree.expanded_nodes[models[1].uuid] = True
+            models[0].shift_down()
+            models[5].drop()
+
+            # only the rows from the first to the last change are laid out
+            add_lines = tree._add_lines
+            with patch.object(tree, "_add_lines", side_effect=add_lines) as layouts:
+                tree.sync_options()
+
+            laid_out = sum(len(call.args[0]) for call in layouts.call_args_list)
+            assert tree._lines is not None
+            assert laid_out <= 10
+
+            # rows keep their options, the ones after the change are untouched
+            kept = [option for option in options if option.id in tree._option_ids]
+            assert all(tree.get_option(option.id) is option for option in kept)
+            assert tree._options[-20:] == options[-20:]
+
+            check_layout()
+
+
 async def test_due():
     async with run_pilot() as pilot:
         app = pilot.app
@@ -238,3 +324,205 @@ async def test_recurrence_change():
         await pilot.press("escape")
 
         assert todo.recurrence == timedelta(days=1)
+
+
+async def test_prompt_cache():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        tree.add_sibling()
+        await pilot.press("escape")
+        tree.add_sibling()
+        await pilot.press("escape")
+
+        renderer = tree.current
+        first, second = tree._options
+
+        prompts = [first.prompt, second.prompt]
+        tree.refresh_options()
+        assert [first.prompt, second.prompt] == prompts
+        assert renderer.prompt is second.prompt
+
+        # only the changed row is re-rendered
+        tree.toggle_complete()
+        assert first.prompt is prompts[0]
+        assert second.prompt is not prompts[1]
+
+        # as time passes, only rows with a due date are
+        due, no_due = tree._renderers[first.id], tree._renderers[second.id]
+        due.model.due = datetime.now()
+        due.model.bump_version()
+
+        prompts = [due.prompt, no_due.prompt]
+        later = time() + 120
+        with patch("dooit.ui.widgets.renderers.base_renderer.time", lambda: later):
+            assert due.prompt is not prompts[0]
+            assert no_due.prompt is prompts[1]
+
+        # formatter and layout changes rebuild the options
+        prompt = second.prompt
+        app.api.formatter.todos.description.add(custom_formatter)
+        assert tree.get_option(renderer.id).prompt is not prompt
+
+        prompt = tree.get_option(renderer.id).prompt
+        app.api.layouts.todo_layout = [TodoWidget.description]
+        assert tree.get_option(renderer.id).prompt is not prompt
+
+        # editing always renders the current value
+        tree.start_edit("description")
+        assert renderer.prompt is not renderer.prompt
+        await pilot.press("escape")
+
+
+async def test_virtual_rendering():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        with manager.batch():
+            for _ in range(100):
+                tree.model.add_todo()
+
+        tree.virtual_threshold = 10
+        tree.virtual_overscan = 5
+        tree.virtual_cache_size = 40
+        tree.force_refresh()
+        await pilot.pause()
+
+        assert tree.is_virtual
+        assert len(tree._options) == 100
+        assert 0 < len(tree._materialized) < 40
+        assert tree._options[-1].prompt == ""
+
+        tree.highlighted = 99
+        await pilot.pause()
+
+        assert tree._options[-1].prompt is tree._renderers[tree._options[-1].id].prompt
+        assert len(tree._materialized) <= 40
+        assert tree._options[0].prompt == ""
+
+
+def test_option_list_internals():
+    # virtual rendering builds on private parts of textual (which is pinned),
+    # this fails once an upgrade changes them
+    assert callable(_widget_navigation.find_next_enabled)
+    assert _option_list.OptionLineSpan._fields == ("first", "line_count")
+
+    methods = {
+        "_populate": [],
+        "_refresh_lines": [],
+        "_left_gutter_width": [],
+        "_add_lines": ["new_content", "width", "option_index"],
+        "_render_option_content": [
+            "option_index",
+            "content",
+            "component_class",
+            "width",
+        ],
+    }
+    for name, parameters in methods.items():
+        assert list(signature(getattr(OptionList, name)).parameters)[1:] == parameters
+
+    option_list = OptionList()
+    for name in ["_options", "_option_ids", "_content_render_cache"]:
+        assert hasattr(option_list, name)
+
+    assert option_list._lines is None
+    assert option_list._spans is None
+
+
+async def test_bulk_render_queries():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        with manager.batch():
+            for _ in range(50):
+                tree.model.add_todo()
+
+        tree._renderers.clear()
+        statements = []
+
+        def count(*_):
+            statements.append(None)
+
+        event.listen(manager.engine, "before_cursor_execute", count)
+        try:
+            tree.force_refresh()
+        finally:
+            event.remove(manager.engine, "before_cursor_execute", count)
+
+        assert len(tree._options) == 50
+        assert len(statements) < 10
+
+
+def test_column_widths_tracker():
+    widths = ColumnWidths()
+    assert widths.get("due") == 0
+
+    widths.set("a", {"due": 3, "urgency": 2})
+    widths.set("b", {"due": 10, "urgency": 2})
+    widths.set("c", {"due": 10, "urgency": 4})
+    assert (widths.get("due"), widths.get("urgency")) == (10, 4)
+
+    widths.discard("b")
+    assert widths.get("due") == 10
+
+    widths.set("c", {"due": 5, "urgency": 2})
+    assert (widths.get("due"), widths.get("urgency")) == (5, 2)
+
+    widths.discard("c")
+    widths.discard("missing")
+    assert widths.get("due") == 3
+
+    for width in range(100):
+        widths.set("a", {"due": width % 3})
+    assert widths.get("due") == 99 % 3
+    assert len(widths._heaps["due"]) < 20
+
+
+async def test_column_widths():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+
+        tree = await create_and_move_to_todo(pilot)
+        with manager.batch():
+            todos = [tree.model.add_todo() for _ in range(20)]
+
+        tree.force_refresh()
+        await pilot.pause()
+        assert tree.get_column_width("due") == 1
+
+        todo = todos[5]
+        todo.due = datetime(2024, 1, 1)
+        todo.save()
+
+        measured = []
+        get_widths = BaseRenderer.get_widths
+
+        def count(renderer):
+            measured.append(renderer.id)
+            return get_widths(renderer)
+
+        BaseRenderer.get_widths = count
+        try:
+            tree.update_prompt_by_id(todo.uuid)
+            assert tree.get_column_width("due") == len("2024-01-01")
+            assert tree._options[0].prompt is tree._renderers[todos[0].uuid].prompt
+
+            # dropping the widest row shrinks the column again
+            tree.highlight_id(todo.uuid)
+            tree.remove_node()
+            await pilot.pause()
+            await pilot.press("y")
+            assert tree.get_column_width("due") == 1
+        finally:
+            BaseRenderer.get_widths = get_widths
+
+        # the other rows were never measured again
+        assert measured == []
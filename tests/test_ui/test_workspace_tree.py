@@ -1,6 +1,9 @@
 from pytest import raises
+from sqlalchemy import delete, update
 from textual.widgets import ContentSwitcher
+from dooit.api import Workspace, manager
 from dooit.api.exceptions import NoNodeError
+from dooit.api.manager import ChangeSet
 from dooit.ui.widgets.trees.todos_tree import TodosTree
 from tests.test_ui.ui_base import run_pilot
 from dooit.ui.tui import Dooit
@@ -252,3 +255,72 @@ async def test_add_sibling_while_editing():
         assert wtree.highlighted == 0
 
         assert len(wtree._options) == 1
+
+
+async def test_shifts_reuse_options():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        wtree = app.workspace_tree
+
+        for _ in range(3):
+            wtree.add_sibling()
+            await pilot.press("escape")
+
+        options = {option.id: option for option in wtree._options}
+        ids = [option.id for option in wtree._options]
+
+        wtree.highlighted = 0
+        wtree.shift_down()
+        await pilot.pause()
+
+        assert [option.id for option in wtree._options] == [ids[1], ids[0], ids[2]]
+        assert all(option is options[option.id] for option in wtree._options)
+        assert wtree._option_ids == {
+            option.id: index for index, option in enumerate(wtree._options)
+        }
+        assert wtree.highlighted == 1
+
+        # nested items are inserted right after their parent
+        wtree.highlighted = 0
+        wtree.add_child_node()
+        await pilot.press("escape")
+        child = wtree.current_model.uuid
+
+        assert [option.id for option in wtree._options] == [
+            ids[1],
+            child,
+            ids[0],
+            ids[2],
+        ]
+        assert wtree._option_ids[ids[2]] == 3
+
+
+async def test_apply_external_changes():
+    async with run_pilot() as pilot:
+        app = pilot.app
+        assert isinstance(app, Dooit)
+        wtree = app.workspace_tree
+
+        w1 = wtree.add_workspace()
+        w2 = wtree.add_workspace()
+        await pilot.pause()
+
+        renderer = wtree._renderers[w2]
+
+        # simulate another connection writing to the database
+        _, id1 = w1.split("_")
+        _, id2 = w2.split("_")
+        manager.session.execute(
+            update(Workspace).where(Workspace.id == id2).values(description="new")
+        )
+        manager.session.execute(delete(Workspace).where(Workspace.id == id1))
+
+        changes = ChangeSet({w1, w2}, structural=True)
+        manager._expire_changes(changes)
+        wtree.apply_changes(changes)
+
+        assert [option.id for option in wtree._options] == [w2]
+        assert wtree._renderers[w2] is not renderer
+        assert wtree._renderers[w2].description.value == "new"
+        assert w1 not in wtree._renderers